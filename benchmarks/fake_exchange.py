@@ -0,0 +1,110 @@
+import http.client
+import http.server
+import json
+import socketserver
+import threading
+import time
+from typing import Dict, Optional
+
+
+class FakeExchangeServer:
+    """
+    A local HTTP server that answers GET /balances, GET /tickers and GET /tickers/<pair name> after a fixed delay,
+    standing in for the REST API of a live exchange so that the exchange I/O of live steps can be measured without one.
+    """
+
+    def __init__(self, **kwargs):
+        self.latency_sec: float = kwargs.get('latency_sec', 0.05)
+        self.balances: Dict[str, float] = kwargs.get('balances', {'USDT': 1000.0, 'BTC': 0.0})
+        # Asks and bids by pair name.
+        self.tickers: Dict[str, Dict[str, float]] = kwargs.get('tickers', {'BTC-USDT': {'bid': 9999.0, 'ask': 10001.0}})
+        self.http_server: Optional[socketserver.TCPServer] = None
+
+    @property
+    def port(self) -> int:
+        return self.http_server.server_address[1]
+
+    def start(self, port: int = 0):
+        """
+        Serve on a daemon thread, on a free port if port is 0.
+        """
+        fake_exchange_server: FakeExchangeServer = self
+
+        class FakeExchangeRequestHandler(http.server.BaseHTTPRequestHandler):
+            # Keep connections alive between requests, as exchange APIs do.
+            protocol_version = 'HTTP/1.1'
+            # Otherwise the body waits for the client to acknowledge the headers.
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                bodies: Dict[str, Dict] = {'/balances': fake_exchange_server.balances,
+                                           '/tickers': fake_exchange_server.tickers}
+                for pair_name, ticker in fake_exchange_server.tickers.items():
+                    bodies['/tickers/{0}'.format(pair_name)] = ticker
+                if self.path not in bodies:
+                    self.send_error(404)
+                    return
+                time.sleep(fake_exchange_server.latency_sec)
+                body: bytes = json.dumps(bodies[self.path]).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        class FakeExchangeHttpServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+            daemon_threads = True
+
+        self.http_server = FakeExchangeHttpServer(('127.0.0.1', port), FakeExchangeRequestHandler)
+        threading.Thread(target=self.http_server.serve_forever, name='fake_exchange_server', daemon=True).start()
+
+    def stop(self):
+        if self.http_server is not None:
+            self.http_server.shutdown()
+            self.http_server.server_close()
+
+
+class FakeExchange:
+    """
+    The subset of a live exchange service used by ExchangeStateRefresher, backed by a FakeExchangeServer. Each thread
+    keeps its own connection to the server open between requests.
+    """
+
+    def __init__(self, **kwargs):
+        self.exchange_id: int = kwargs.get('exchange_id', 1)
+        self.port: int = kwargs.get('port')
+        self.connections: threading.local = threading.local()
+        self.balances: Dict[str, float] = {}
+        self.tickers: Dict[str, Dict[str, float]] = {}
+
+    def _get(self, path: str) -> Dict:
+        connection: Optional[http.client.HTTPConnection] = getattr(self.connections, 'connection', None)
+        if connection is None:
+            connection = http.client.HTTPConnection('127.0.0.1', self.port)
+            self.connections.connection = connection
+        connection.request('GET', path)
+        return json.loads(connection.getresponse().read())
+
+    def fetch_balances(self):
+        self.balances = self._get('/balances')
+
+    def fetch_latest_tickers(self):
+        self.tickers = self._get('/tickers')
+
+    def get_tickers(self) -> Dict[str, Dict[str, float]]:
+        return self.tickers
+
+
+class FakePairTickerExchange(FakeExchange):
+    """
+    A FakeExchange that can also fetch the ticker of a single pair, with which ExchangeStateRefresher only fetches the
+    tickers of the traded pairs.
+    """
+
+    def fetch_ticker(self, pair) -> Dict[str, float]:
+        ticker: Dict[str, float] = self._get('/tickers/{0}'.format(pair.name))
+        self.tickers[pair.name] = ticker
+        return ticker
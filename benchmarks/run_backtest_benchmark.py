@@ -0,0 +1,234 @@
+import sys
+
+import argparse
+import concurrent.futures
+import gc
+import json
+import logging
+import os
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+sys.path.append(os.getcwd())
+from benchmarks.synthetic_tickers import generate_ticker_files
+from example_strategies.shared.backtest_service import BacktestService
+from example_strategies.shared.metrics_service import MetricsService
+from example_strategies.shared.persistence import Persistence, PersistenceMode
+from example_strategies.shared.strategy_registry import strategies
+from example_strategies.shared.strategy_runner import build_backtest_service
+from example_strategies.shared.ticker_cache_service import TickerCacheService
+
+from trading_platform.core.services.logging_service import LoggingService
+from trading_platform.utils.datetime_operations import datetime_now_with_utc_offset, strftime_minutes
+
+
+def peak_rss_mb() -> float:
+    max_rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return max_rss / 2 ** 20 if sys.platform == 'darwin' else max_rss / 2 ** 10
+
+
+def allocation_summary(snapshot: tracemalloc.Snapshot, gc_collections: List[int], step_count: int) -> Dict:
+    """
+    Returns:
+        The peak traced memory, the garbage collections per thousand steps, which grow with the number of container
+        objects allocated and so measure object churn, and the ten lines holding the most memory at the end of the run.
+    """
+    return {
+        'traced_peak_mb': tracemalloc.get_traced_memory()[1] / 2 ** 20,
+        'gc_collections_per_1000_steps': [collections * 1000 / max(step_count, 1) for collections in gc_collections],
+        'top_lines': [{
+            'line': str(statistic.traceback),
+            'size_kb': statistic.size / 2 ** 10,
+            'count': statistic.count
+        } for statistic in snapshot.statistics('lineno')[:10]]
+    }
+
+
+def run_benchmark(task: Dict) -> Dict:
+    """
+    Run one backtest and measure it. Runs in a fresh worker process, so the peak RSS is that of this backtest alone.
+
+    Args:
+        task: Dict
+            strategy_name: str
+            parameters: Dict
+            ticker_dir: str
+            ticker_cache_dir: str
+            profit_summary_dir: str
+            persistence_mode: str
+            trace_allocations: bool, whether to trace allocations with tracemalloc, which slows the backtest down
+
+    Returns:
+        The minutes simulated per second, the seconds spent per stage, their percentiles and the peak RSS of the
+        backtest, and an allocation summary if allocations were traced.
+    """
+    if task.get('trace_allocations'):
+        tracemalloc.start()
+    gc_collections: List[int] = [generation['collections'] for generation in gc.get_stats()]
+    metrics_service: MetricsService = MetricsService()
+    start: float = time.perf_counter()
+    with metrics_service.time('initialize'):
+        strategy_id: str = '{0}_benchmark'.format(strategies[task['strategy_name']]['strategy_base_id'])
+        backtest_service: BacktestService = build_backtest_service(**{
+            'logger': logging.getLogger(__name__),
+            'strategy_name': task['strategy_name'],
+            'strategy_id': strategy_id,
+            'parameters': task['parameters'],
+            'ticker_dir': task['ticker_dir'],
+            'ticker_cache_dir': task['ticker_cache_dir'],
+            'profit_summary_filepath': os.path.join(task['profit_summary_dir'], '{0}.csv'.format(strategy_id)),
+            'persistence': Persistence(task['persistence_mode']),
+            'stage_timer': metrics_service
+        })
+    backtest_service.run()
+    wall_seconds: float = time.perf_counter() - start
+    gc_collections = [generation['collections'] - collections
+                      for generation, collections in zip(gc.get_stats(), gc_collections)]
+
+    benchmark: Dict = {
+        'strategy_name': task['strategy_name'],
+        'parameters': task['parameters'],
+        'persistence_mode': task['persistence_mode'],
+        'minutes_simulated': backtest_service.minutes_simulated,
+        'step_count': backtest_service.step_count,
+        'wall_seconds': wall_seconds,
+        'minutes_per_second': backtest_service.minutes_simulated / wall_seconds,
+        'stages': metrics_service.summary(),
+        'stage_percentiles': metrics_service.percentile_summary(),
+        'peak_rss_mb': peak_rss_mb()
+    }
+    if task.get('trace_allocations'):
+        benchmark['allocations'] = allocation_summary(tracemalloc.take_snapshot(), gc_collections,
+                                                      backtest_service.step_count)
+        tracemalloc.stop()
+    return benchmark
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(logger: logging.Logger, arg_dict: Dict):
+    work_dir: str = tempfile.mkdtemp(prefix='backtest_benchmark_')
+    try:
+        ticker_dir: Optional[str] = arg_dict.get('ticker_dir')
+        if ticker_dir is None:
+            ticker_dir = os.path.join(work_dir, 'tickers')
+            logger.info('generating {0} days of tickers for {1} pairs in {2}'.format(
+                arg_dict.get('days'), arg_dict.get('pair_count'), ticker_dir))
+            generate_ticker_files(**{
+                'ticker_dir': ticker_dir,
+                'start': arg_dict.get('start'),
+                'days': arg_dict.get('days'),
+                'pair_count': arg_dict.get('pair_count'),
+                'tickers_per_minute': arg_dict.get('tickers_per_minute'),
+                'exchange_id': arg_dict.get('exchange_id'),
+                'base': arg_dict.get('base'),
+                'seed': arg_dict.get('seed')
+            })
+
+        ticker_cache_dir: Optional[str] = arg_dict.get('ticker_cache_dir')
+        ingest_seconds: Optional[float] = None
+        if ticker_cache_dir is not None:
+            # Ingest up front, so that the backtests measure reading from a warm cache.
+            ingest_start: float = time.perf_counter()
+            TickerCacheService.ingest(ticker_dir, ticker_cache_dir)
+            ingest_seconds = time.perf_counter() - ingest_start
+
+        profit_summary_dir: str = os.path.join(work_dir, 'profit_summaries')
+        os.makedirs(profit_summary_dir)
+        benchmarks: List[Dict] = []
+        for strategy_name in arg_dict.get('strategy'):
+            for persistence_mode in arg_dict.get('persistence'):
+                task: Dict = {
+                    'strategy_name': strategy_name,
+                    'parameters': arg_dict.get('parameter'),
+                    'ticker_dir': ticker_dir,
+                    'ticker_cache_dir': ticker_cache_dir,
+                    'profit_summary_dir': profit_summary_dir,
+                    'persistence_mode': persistence_mode,
+                    'trace_allocations': arg_dict.get('trace_allocations')
+                }
+                with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+                    benchmark: Dict = executor.submit(run_benchmark, task).result()
+                logger.info('{0} with {1} persistence: {2:.0f} minutes per second, {3:.0f} MB peak RSS'.format(
+                    strategy_name, persistence_mode, benchmark['minutes_per_second'], benchmark['peak_rss_mb']))
+                if 'allocations' in benchmark:
+                    logger.info('{0} with {1} persistence: {2:.1f} MB traced peak, {3} collections per 1000 steps'
+                                .format(strategy_name, persistence_mode, benchmark['allocations']['traced_peak_mb'],
+                                        ', '.join('{0:.2f}'.format(collections) for collections in
+                                                  benchmark['allocations']['gc_collections_per_1000_steps'])))
+                benchmarks.append(benchmark)
+    finally:
+        shutil.rmtree(work_dir)
+
+    results: Dict = {
+        'created': datetime_now_with_utc_offset().isoformat(),
+        'git_commit': git_commit(),
+        'arguments': arg_dict,
+        'ingest_seconds': ingest_seconds,
+        'benchmarks': benchmarks
+    }
+    with open(arg_dict.get('results_filepath'), 'w') as results_file:
+        json.dump(results, results_file, indent=2, default=str)
+    logger.info('wrote benchmark results to {0}'.format(arg_dict.get('results_filepath')))
+
+
+def parse_parameter(parameter: str) -> Dict:
+    name, value = parameter.split('=', 1)
+    return {name: value}
+
+
+def get_cli_args() -> Dict:
+    parser = argparse.ArgumentParser(description='Measure the throughput of cycle and DCA backtests.')
+    parser.add_argument('--strategy', action='append', choices=sorted(strategies.keys()),
+                        help='Strategy to benchmark. Can be repeated. Defaults to all strategies.')
+    parser.add_argument('--persistence', action='append', choices=PersistenceMode.all,
+                        help='Persistence mode to benchmark. Can be repeated. Defaults to in_memory, which needs no '
+                             'database.')
+    parser.add_argument('--parameter', action='append', type=parse_parameter, default=[],
+                        help='A property override for every benchmark, e.g. executions_per_hour=60. Can be repeated.')
+    parser.add_argument('--ticker_dir',
+                        help='Absolute path of an existing ticker directory. If not given, synthetic tickers are '
+                             'generated.')
+    parser.add_argument('--ticker_cache_dir', help='Absolute path of the binary ticker cache directory.')
+    parser.add_argument('--start', default='2018-01-01', help='First day of synthetic tickers, in UTC.')
+    parser.add_argument('--days', type=int, default=7, help='Days of synthetic tickers.')
+    parser.add_argument('--pair_count', type=int, default=2, help='Pairs of synthetic tickers.')
+    parser.add_argument('--tickers_per_minute', type=int, default=1, help='Synthetic tickers per pair per minute.')
+    parser.add_argument('--exchange_id', type=int, default=1, help='exchange_id of the synthetic tickers.')
+    parser.add_argument('--base', default='USDT', help='Base currency of the synthetic pairs.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic tickers.')
+    parser.add_argument('--trace_allocations', action='store_true',
+                        help='Also trace allocations with tracemalloc and count garbage collections, to measure object '
+                             'churn. Slows the backtests down, so their throughput is not comparable to untraced runs.')
+    parser.add_argument('--results_filepath', help='Where to write the JSON results.')
+    arg_dict: Dict = vars(parser.parse_args())
+    arg_dict['strategy'] = arg_dict['strategy'] or sorted(strategies.keys())
+    arg_dict['persistence'] = arg_dict['persistence'] or [PersistenceMode.in_memory]
+    parameters: Dict = {}
+    for parameter in arg_dict['parameter']:
+        parameters.update(parameter)
+    arg_dict['parameter'] = parameters
+    repo_dir: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    arg_dict['results_filepath'] = arg_dict['results_filepath'] or os.path.join(
+        repo_dir, 'backtest_results', 'benchmarks',
+        'benchmark_{0}.json'.format(datetime_now_with_utc_offset().strftime(strftime_minutes)))
+    return arg_dict
+
+
+if __name__ == '__main__':
+    arg_dict = get_cli_args()
+    stream_handler: logging.StreamHandler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(LoggingService.get_default_formatter())
+    logger: logging.Logger = LoggingService.set_logger(name=None, handler=stream_handler)
+    main(logger, arg_dict)
@@ -0,0 +1,81 @@
+import sys
+
+import argparse
+import logging
+import os
+import statistics
+import time
+from typing import Dict, List
+
+sys.path.append(os.getcwd())
+from benchmarks.fake_exchange import FakeExchange, FakeExchangeServer, FakePairTickerExchange
+from example_strategies.shared.exchange_state_refresher import ExchangeStateRefresher
+from example_strategies.shared.metrics_service import MetricsService
+
+from trading_platform.core.services.logging_service import LoggingService
+from trading_platform.exchanges.data.pair import Pair
+
+
+def main(logger: logging.Logger, arg_dict: Dict):
+    """
+    Measure how long it takes to fetch the balances and tickers of a local fake exchange, one request after the other
+    as step() does without a refresher, and concurrently as ExchangeStateRefresher does, with all tickers in one request
+    and with one request per traded pair.
+    """
+    pairs: List[Pair] = [Pair(base='USDT', quote='BTC')]
+    tickers: Dict[str, Dict[str, float]] = {pairs[0].name: {'bid': 9999.0, 'ask': 10001.0}}
+    # The tickers of the other pairs of the exchange, which only the refresher without per-pair requests fetches.
+    for index in range(arg_dict.get('untraded_pairs')):
+        tickers['COIN{0}_USDT'.format(index)] = {'bid': 1.0, 'ask': 1.01}
+    fake_exchange_server: FakeExchangeServer = FakeExchangeServer(latency_sec=arg_dict.get('latency_ms') / 1000,
+                                                                  tickers=tickers)
+    fake_exchange_server.start()
+    try:
+        fake_exchange: FakeExchange = FakeExchange(port=fake_exchange_server.port)
+
+        def fetch_sequentially():
+            fake_exchange.fetch_balances()
+            fake_exchange.fetch_latest_tickers()
+
+        exchange_state_refreshers: List[ExchangeStateRefresher] = [ExchangeStateRefresher(**{
+            'logger': logger,
+            'exchange': exchange,
+            'refresh_freq_sec': 1,
+            'stage_timer': MetricsService(),
+            'pairs': pairs
+        }) for exchange in [FakeExchange(port=fake_exchange_server.port),
+                            FakePairTickerExchange(port=fake_exchange_server.port)]]
+
+        for name, refresh in [('sequential', fetch_sequentially),
+                              ('concurrent, all tickers', exchange_state_refreshers[0].refresh),
+                              ('concurrent, traded pairs only', exchange_state_refreshers[1].refresh)]:
+            # The first refresh opens the connections.
+            refresh()
+            seconds: List[float] = []
+            for _ in range(arg_dict.get('refreshes')):
+                start: float = time.perf_counter()
+                refresh()
+                seconds.append(time.perf_counter() - start)
+            logger.info('{0}: median {1:.1f} ms, max {2:.1f} ms over {3} refreshes'.format(
+                name, statistics.median(seconds) * 1000, max(seconds) * 1000, len(seconds)))
+        for exchange_state_refresher in exchange_state_refreshers:
+            exchange_state_refresher.stop()
+    finally:
+        fake_exchange_server.stop()
+
+
+def get_cli_args() -> Dict:
+    parser = argparse.ArgumentParser(description='Measure the time to refresh the state of a fake exchange.')
+    parser.add_argument('--latency_ms', type=float, default=50, help='Delay of every response of the fake exchange.')
+    parser.add_argument('--refreshes', type=int, default=20, help='Refreshes to time per method.')
+    parser.add_argument('--untraded_pairs', type=int, default=500,
+                        help='Tickers of the fake exchange besides the traded pair.')
+    return vars(parser.parse_args())
+
+
+if __name__ == '__main__':
+    arg_dict = get_cli_args()
+    stream_handler: logging.StreamHandler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(LoggingService.get_default_formatter())
+    logger: logging.Logger = LoggingService.set_logger(name=None, handler=stream_handler)
+    main(logger, arg_dict)
@@ -0,0 +1,103 @@
+import sys
+
+import argparse
+import datetime
+import os
+from typing import Dict, List
+
+import numpy
+import pandas
+
+sys.path.append(os.getcwd())
+from example_strategies.shared.ticker_cache_service import TickerCacheService
+
+quote_currencies: List[str] = ['BTC', 'ETH', 'LTC', 'XRP', 'BCH', 'EOS', 'XLM', 'ADA', 'TRX', 'NEO']
+
+
+def pair_quotes(pair_count: int) -> List[str]:
+    """
+    Returns:
+        pair_count quote currencies, made up once the real ones run out.
+    """
+    return [quote_currencies[i] if i < len(quote_currencies) else 'SYN{0}'.format(i) for i in range(pair_count)]
+
+
+def generate_ticker_files(**kwargs) -> List[str]:
+    """
+    Write one minute-level ticker CSV per day, in the shape of the files recorded by TickerService, with the prices of
+    each pair following a geometric random walk.
+
+    Args:
+     kwargs: Dict
+        ticker_dir: str
+        start: str or naive datetime.datetime, the first day in UTC
+        days: int
+        pair_count: int
+        tickers_per_minute: int, tickers per pair per minute
+        exchange_id: int
+        base: str
+        seed: int
+
+    Returns:
+        The filenames written.
+    """
+    ticker_dir: str = kwargs.get('ticker_dir')
+    start: pandas.Timestamp = pandas.Timestamp(kwargs.get('start')).tz_localize('UTC')
+    days: int = kwargs.get('days')
+    quotes: List[str] = pair_quotes(kwargs.get('pair_count'))
+    tickers_per_minute: int = kwargs.get('tickers_per_minute', 1)
+    random_state: numpy.random.RandomState = numpy.random.RandomState(kwargs.get('seed', 0))
+
+    os.makedirs(ticker_dir, exist_ok=True)
+    ticker_filenames: List[str] = []
+    last_prices: numpy.ndarray = 10 ** random_state.uniform(0, 4, size=len(quotes))
+    for day in range(days):
+        timestamps: pandas.DatetimeIndex = pandas.date_range(start + datetime.timedelta(days=day),
+                                                            periods=24 * 60 * tickers_per_minute,
+                                                            freq='{0}ms'.format(60000 // tickers_per_minute))
+        columns: Dict[str, List[numpy.ndarray]] = {'quote': [], 'bid': [], 'ask': [], 'last': []}
+        for pair_position, quote in enumerate(quotes):
+            log_returns: numpy.ndarray = random_state.normal(0, 0.0005, size=len(timestamps))
+            prices: numpy.ndarray = last_prices[pair_position] * numpy.exp(numpy.cumsum(log_returns))
+            last_prices[pair_position] = prices[-1]
+            spreads: numpy.ndarray = prices * random_state.uniform(0.0001, 0.001, size=len(timestamps))
+            columns['quote'].append(numpy.full(len(timestamps), quote, dtype=object))
+            columns['bid'].append(prices - spreads / 2)
+            columns['ask'].append(prices + spreads / 2)
+            columns['last'].append(prices)
+
+        ticker_df: pandas.DataFrame = pandas.DataFrame({
+            'exchange_id': kwargs.get('exchange_id'),
+            'base': kwargs.get('base'),
+            'quote': numpy.concatenate(columns['quote']),
+            'bid': numpy.concatenate(columns['bid']),
+            'ask': numpy.concatenate(columns['ask']),
+            'last': numpy.concatenate(columns['last']),
+            TickerCacheService.timestamp_column: numpy.tile(timestamps, len(quotes))
+        })
+        # TickerService appends the tickers of all pairs as they are fetched, so the files are in time order.
+        ticker_df.sort_values(TickerCacheService.timestamp_column, kind='mergesort', inplace=True)
+
+        ticker_filename: str = 'tickers_{0}.csv'.format((start + datetime.timedelta(days=day)).strftime('%Y%m%d'))
+        ticker_df.to_csv(os.path.join(ticker_dir, ticker_filename), index=False)
+        ticker_filenames.append(ticker_filename)
+    return ticker_filenames
+
+
+def get_cli_args() -> Dict:
+    parser = argparse.ArgumentParser(description='Generate synthetic minute-level ticker files for benchmarks.')
+    parser.add_argument('--ticker_dir', required=True, help='Absolute path of the ticker directory to write.')
+    parser.add_argument('--start', default='2018-01-01', help='First day of tickers, in UTC.')
+    parser.add_argument('--days', type=int, default=7, help='Number of days of tickers, one file per day.')
+    parser.add_argument('--pair_count', type=int, default=2, help='Number of pairs.')
+    parser.add_argument('--tickers_per_minute', type=int, default=1, help='Tickers per pair per minute.')
+    parser.add_argument('--exchange_id', type=int, default=1, help='exchange_id of the tickers.')
+    parser.add_argument('--base', default='USDT', help='Base currency of every pair.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the random walks.')
+    return vars(parser.parse_args())
+
+
+if __name__ == '__main__':
+    arg_dict = get_cli_args()
+    for generated_filename in generate_ticker_files(**arg_dict):
+        print('generated {0}'.format(generated_filename))
@@ -7,6 +7,19 @@ from trading_platform.exchanges.data.financial_data import FinancialData
 class DcaProperties:
     # How many times per day to check for a trade
     executions_per_month: int = int(os.environ.get('EXECUTIONS_PER_MONTH', 4))
+    # Delay each execution by a pseudo random number of minutes less than this, to avoid always trading on the hour
+    step_jitter_minutes: int = int(os.environ.get('STEP_JITTER_MINUTES', 0))
+    # Seed of the execution jitter. Backtests with the same seed execute at the same times.
+    random_seed: int = int(os.environ.get('RANDOM_SEED', 0))
+    # In live mode, how often to refresh the exchange balances and tickers in the background
+    state_refresh_freq_sec: int = int(os.environ.get('STATE_REFRESH_FREQ_SEC', 10))
+    # In live mode, the oldest exchange state a trade may be based on before it is fetched again
+    max_state_staleness_sec: int = int(os.environ.get('MAX_STATE_STALENESS_SEC', 30))
+    # In live mode, how many orders to execute concurrently on worker threads. 0 executes each order in step() and waits
+    # for it to fill before the next step.
+    order_execution_workers: int = int(os.environ.get('ORDER_EXECUTION_WORKERS', 0))
+    # In live mode, seconds between logging the percentiles of the time spent in each phase of a step
+    metrics_log_interval_sec: int = int(os.environ.get('METRICS_LOG_INTERVAL_SEC', 300))
     # Add padding to the orders to increase the likelihood the orders will get filled
     order_padding_percent: FinancialData = FinancialData(os.environ.get('ORDER_PADDING_PERCENT', 0.02))
     balance_percent_per_trade: FinancialData = FinancialData(os.environ.get('BALANCE_PERCENT_PER_TRADE', 0.1))
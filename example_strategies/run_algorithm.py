@@ -0,0 +1,134 @@
+import sys
+
+import argparse
+import logging
+import os
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+sys.path.append(os.getcwd())
+from example_strategies.shared.persistence import PersistenceMode
+from example_strategies.shared.strategy_registry import strategies
+from example_strategies.shared.strategy_runner import StrategyRunner
+from example_strategies.shared.ticker_rollup import TickerResolution
+
+from trading_platform.core.services.logging_service import LoggingService
+from trading_platform.utils.datetime_operations import datetime_now_with_utc_offset, strftime_minutes
+
+if TYPE_CHECKING:
+    from example_strategies.shared.backtest_result_cache import BacktestResultCache
+
+
+def main(logger: logging.Logger, arg_dict: Dict):
+    result_cache: Optional['BacktestResultCache'] = None
+    if arg_dict.get('result_cache_dir') is not None:
+        # Imports the backtest exchange, which live runs don't need.
+        from example_strategies.shared.backtest_result_cache import BacktestResultCache
+
+        result_cache = BacktestResultCache(**{
+            'cache_dir': arg_dict.get('result_cache_dir'),
+            'max_size_bytes': int(arg_dict.get('result_cache_max_mb') * 1024 ** 2)
+        })
+
+    strategy_runner: StrategyRunner = StrategyRunner(**{
+        'logger': logger,
+        'strategy_name': arg_dict.get('strategy'),
+        'parameters': arg_dict.get('parameter'),
+        'live': arg_dict.get('live'),
+        'ticker_dir': arg_dict.get('ticker_dir'),
+        'ticker_cache_dir': arg_dict.get('ticker_cache_dir'),
+        'profit_summary_dir': arg_dict.get('profit_summary_dir'),
+        'persistence_mode': arg_dict.get('persistence'),
+        'metrics_port': arg_dict.get('metrics_port'),
+        'resume': arg_dict.get('resume'),
+        'update_tables': arg_dict.get('update_tables'),
+        'max_ticker_resolution': arg_dict.get('max_ticker_resolution'),
+        'result_cache': result_cache
+    })
+    strategy_runner.run()
+
+
+def parse_parameters(parameter_args: List[str]) -> Dict[str, str]:
+    """
+    Parse "name=value" command line arguments.
+    """
+    return dict(parameter_arg.split('=', 1) for parameter_arg in parameter_args)
+
+
+def get_cli_args(strategy_name: Optional[str] = None) -> Dict:
+    """
+    Args:
+        strategy_name: the strategy to run, or None to take it from --strategy
+    """
+    parser = argparse.ArgumentParser()
+    if strategy_name is None:
+        parser.add_argument('--strategy', required=True, choices=list(strategies.keys()), help='Strategy to run.')
+    parser.add_argument('--run_daemon', help='Whether to run the script as a daemon. Can be "True" or "False".')
+    parser.add_argument('--live',
+                        help='Whether to run the strategy in live or backtest_results mode. Can be "True" or "False".')
+    parser.add_argument('--parameter', action='append', default=[],
+                        help='A property of the strategy to override, as name=value. Can be repeated.')
+    parser.add_argument('--ticker_dir',
+                        help='Absolute path of the ticker directory. For use in backtest_results mode only.')
+    parser.add_argument('--ticker_cache_dir',
+                        help='Absolute path of the binary ticker cache directory. Stale or missing cache entries are '
+                             'built from --ticker_dir. For use in backtest_results mode only.')
+    parser.add_argument('--max_ticker_resolution', default=TickerResolution.day, choices=TickerResolution.all,
+                        help='The coarsest ticker rollup a backtest may read. The coarsest one whose bars the step '
+                             'schedule is aligned to is used, and only with --ticker_cache_dir. "minute" always reads '
+                             'every minute. For use in backtest_results mode only.')
+    parser.add_argument('--persistence', default=PersistenceMode.database, choices=PersistenceMode.all,
+                        help='How orders and strategy state are persisted. "buffered" writes them to the database once '
+                             'per ticker file, "in_memory" runs without a database. For use in backtest_results mode '
+                             'only.')
+    parser.add_argument('--metrics_port', type=int,
+                        help='Port on which to serve step timings in the Prometheus text format at /metrics. For use '
+                             'in live mode only.')
+    parser.add_argument('--resume',
+                        help='Whether to continue the latest backtest of the strategy from its last checkpoint, which '
+                             'is saved after every ticker file. Can be "True" or "False". For use in backtest_results '
+                             'mode only.')
+    parser.add_argument('--result_cache_dir',
+                        help='Absolute path of the backtest result cache. A backtest whose properties, code and ticker '
+                             'files match a cached one returns its result instead of running. For use in '
+                             'backtest_results mode only.')
+    parser.add_argument('--result_cache_max_mb', type=float, default=1024,
+                        help='Size of the backtest result cache above which the least recently used results are '
+                             'evicted.')
+    parser.add_argument('--update_tables',
+                        help='Whether to migrate the database tables to the current schema before running, e.g. after '
+                             'upgrading trading_platform. Can be "True" or "False".')
+    arg_dict: Dict = vars(parser.parse_args())
+    if strategy_name is not None:
+        arg_dict['strategy'] = strategy_name
+    arg_dict['parameter'] = parse_parameters(arg_dict['parameter'])
+    arg_dict['live'] = arg_dict['live'] == 'True'
+    arg_dict['run_daemon'] = arg_dict['run_daemon'] == 'True'
+    arg_dict['resume'] = arg_dict['resume'] == 'True'
+    arg_dict['update_tables'] = arg_dict['update_tables'] == 'True'
+    repo_dir: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    arg_dict['profit_summary_dir'] = arg_dict.get('profit_summary_dir',
+                                                  os.path.join(repo_dir, 'backtest_results', arg_dict['strategy']))
+    arg_dict['logfile_path'] = arg_dict.get('logfile_path', os.path.join(repo_dir, 'logs', arg_dict['strategy']))
+    return arg_dict
+
+
+def run_cli(strategy_name: Optional[str] = None):
+    arg_dict = get_cli_args(strategy_name)
+    os.makedirs(arg_dict.get('logfile_path'), exist_ok=True)
+    file: str = os.path.join(arg_dict.get('logfile_path'), '{0}_{1}.log'.format(
+        arg_dict.get('strategy'), datetime_now_with_utc_offset().strftime(strftime_minutes)))
+    print('Logging to {0}'.format(file))
+    file_handler: logging.FileHandler = logging.FileHandler(filename=file, mode='w+')
+    file_handler.setFormatter(LoggingService.get_default_formatter())
+    logger: logging.Logger = LoggingService.set_logger(name=None, handler=file_handler)
+
+    if arg_dict.get('run_daemon'):
+        import daemon
+        with daemon.DaemonContext(files_preserve=[file_handler.stream]):
+            main(logger, arg_dict)
+    else:
+        main(logger, arg_dict)
+
+
+if __name__ == '__main__':
+    run_cli()
@@ -0,0 +1,141 @@
+import sys
+
+import argparse
+import logging
+import os
+from typing import Dict, List
+
+sys.path.append(os.getcwd())
+from example_strategies.shared.parameter_sweep_service import BacktestEngine, ParameterSweepService, combine_grids, \
+    cycle_window_grid, parameter_grid
+from example_strategies.shared.persistence import PersistenceMode
+from example_strategies.shared.ticker_rollup import TickerResolution
+
+from trading_platform.core.services.logging_service import LoggingService
+from trading_platform.utils.datetime_operations import datetime_now_with_utc_offset, strftime_minutes
+
+
+def main(logger: logging.Logger, arg_dict: Dict):
+    strategy_name: str = arg_dict.get('strategy')
+    grids: List[List[Dict]] = [parameter_grid(arg_dict.get('parameter'))]
+    if arg_dict.get('window_length_hours') is not None:
+        grids.append(cycle_window_grid(arg_dict.get('window_length_hours')))
+    parameter_sets: List[Dict] = combine_grids(*grids)
+
+    # A resumed sweep reuses the strategy_ids of the earlier run, so that its backtests find their checkpoints.
+    sweep_id: str = arg_dict.get('resume') or datetime_now_with_utc_offset().strftime(strftime_minutes)
+    results_filepath: str = os.path.join(arg_dict.get('results_dir'), '{0}_sweep_{1}.csv'.format(strategy_name,
+                                                                                               sweep_id))
+    logger.info('running {0} backtests of the {1} strategy, writing results to {2}'.format(
+        len(parameter_sets), strategy_name, results_filepath))
+
+    parameter_sweep_service: ParameterSweepService = ParameterSweepService(**{
+        'logger': logger,
+        'max_workers': arg_dict.get('max_workers')
+    })
+    sweep_kwargs: Dict = {
+        'strategy_name': strategy_name,
+        'parameter_sets': parameter_sets,
+        'sweep_id': sweep_id,
+        'ticker_dir': arg_dict.get('ticker_dir'),
+        'ticker_cache_dir': arg_dict.get('ticker_cache_dir'),
+        'time_shards': arg_dict.get('time_shards'),
+        'profit_summary_dir': os.path.join(arg_dict.get('backtest_results_dir'), strategy_name),
+        'persistence_mode': arg_dict.get('persistence'),
+        'engine': arg_dict.get('engine'),
+        'cross_check': arg_dict.get('cross_check'),
+        'resume': arg_dict.get('resume') is not None,
+        'max_ticker_resolution': arg_dict.get('max_ticker_resolution'),
+        'result_cache_dir': arg_dict.get('result_cache_dir'),
+        'result_cache_max_size_bytes': int(arg_dict.get('result_cache_max_mb') * 1024 ** 2),
+        'results_filepath': results_filepath
+    }
+    if arg_dict.get('queue_url') is None:
+        parameter_sweep_service.run(**sweep_kwargs)
+    else:
+        parameter_sweep_service.run_distributed(**dict(sweep_kwargs, **{
+            'queue_url': arg_dict.get('queue_url'),
+            'local_workers': arg_dict.get('local_workers'),
+            'heartbeat_timeout_sec': arg_dict.get('heartbeat_timeout_sec'),
+            'max_attempts': arg_dict.get('max_attempts')
+        }))
+
+
+def parse_parameter_values(parameter_args: List[str]) -> Dict[str, List[str]]:
+    """
+    Parse "name=value1,value2" command line arguments.
+    """
+    values_by_parameter: Dict[str, List[str]] = {}
+    for parameter_arg in parameter_args:
+        name, values = parameter_arg.split('=', 1)
+        values_by_parameter[name] = values.split(',')
+    return values_by_parameter
+
+
+def get_cli_args() -> Dict:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--strategy', required=True, choices=['cycle', 'dca'], help='Strategy to backtest.')
+    parser.add_argument('--ticker_dir', required=True, help='Absolute path of the ticker directory.')
+    parser.add_argument('--ticker_cache_dir', required=True,
+                        help='Absolute path of the binary ticker cache directory shared by the workers.')
+    parser.add_argument('--parameter', action='append', default=[],
+                        help='Values of a property to sweep, e.g. "order_padding_percent=0.01,0.02". Can be repeated.')
+    parser.add_argument('--window_length_hours', type=int,
+                        help='Sweep every buy and sell window of this length. For use with the cycle strategy only.')
+    parser.add_argument('--max_ticker_resolution', default=TickerResolution.day, choices=TickerResolution.all,
+                        help='The coarsest ticker rollup an event-driven backtest may read. The coarsest one whose '
+                             'bars the step schedule is aligned to is used. "minute" always reads every minute.')
+    parser.add_argument('--persistence', default=PersistenceMode.buffered, choices=PersistenceMode.all,
+                        help='How orders and strategy state are persisted. "in_memory" runs without a database.')
+    parser.add_argument('--engine', default=BacktestEngine.event_driven, choices=BacktestEngine.all,
+                        help='"vectorized" computes the balances with array operations, which is orders of magnitude '
+                             'faster, but writes no profit history.')
+    parser.add_argument('--cross_check', action='store_true',
+                        help='Also run every vectorized backtest event-driven, and compare their final balances.')
+    parser.add_argument('--resume', metavar='SWEEP_ID',
+                        help='Continue the sweep with this id, e.g. 201806011200, after it was interrupted. '
+                             'Event-driven backtests continue from their last checkpoint, which is saved after every '
+                             'ticker file. '
+                             'The parameters must be the same as those of the interrupted sweep.')
+    parser.add_argument('--result_cache_dir',
+                        help='Absolute path of the backtest result cache. Event-driven backtests whose properties, '
+                             'code and ticker files match a cached one return its result instead of running.')
+    parser.add_argument('--result_cache_max_mb', type=float, default=1024,
+                        help='Size of the backtest result cache above which the least recently used results are '
+                             'evicted.')
+    parser.add_argument('--time_shards', type=int, default=1,
+                        help='Split the ticker files into this many consecutive time ranges, and backtest each '
+                             'parameter set on each of them separately.')
+    parser.add_argument('--max_workers', type=int, help='Number of worker processes. Defaults to the number of CPUs.')
+    parser.add_argument('--queue_url',
+                        help='SQLAlchemy database URL of a work queue, e.g. sqlite:////tmp/sweep_queue.db or '
+                             'postgresql://user@localhost/sweeps. If set, the backtests are queued as shards, which '
+                             'local worker processes and workers started on other nodes with run_sweep_worker.py '
+                             'claim. --resume continues the queued sweep.')
+    parser.add_argument('--local_workers', type=int,
+                        help='Number of worker processes to start on this node with --queue_url. Defaults to '
+                             '--max_workers. 0 only waits for workers on other nodes.')
+    parser.add_argument('--heartbeat_timeout_sec', type=float, default=120,
+                        help='With --queue_url, seconds without a heartbeat after which the worker of a shard is '
+                             'presumed dead and the shard is run again.')
+    parser.add_argument('--max_attempts', type=int, default=3,
+                        help='With --queue_url, how many times a shard is run before it is failed.')
+    arg_dict: Dict = vars(parser.parse_args())
+    arg_dict['parameter'] = parse_parameter_values(arg_dict['parameter'])
+    repo_dir: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    arg_dict['backtest_results_dir'] = arg_dict.get('backtest_results_dir', os.path.join(repo_dir, 'backtest_results'))
+    arg_dict['results_dir'] = arg_dict.get('results_dir', os.path.join(repo_dir, 'backtest_results', 'sweeps'))
+    arg_dict['logfile_path'] = arg_dict.get('logfile_path', os.path.join(repo_dir, 'logs'))
+    return arg_dict
+
+
+if __name__ == '__main__':
+    arg_dict = get_cli_args()
+    file: str = os.path.join(arg_dict.get('logfile_path'),
+                             'sweep_{0}.log'.format(datetime_now_with_utc_offset().strftime(strftime_minutes)))
+    print('Logging to {0}'.format(file))
+    file_handler: logging.FileHandler = logging.FileHandler(filename=file, mode='w+')
+    file_handler.setFormatter(LoggingService.get_default_formatter())
+    logger: logging.Logger = LoggingService.set_logger(name=None, handler=file_handler)
+
+    main(logger, arg_dict)
@@ -0,0 +1,88 @@
+import sys
+
+import argparse
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+sys.path.append(os.getcwd())
+from example_strategies.shared.metrics_service import MetricsService
+from example_strategies.shared.multi_strategy_runner import MultiStrategyRunner
+from example_strategies.shared.persistence import Persistence, PersistenceMode
+
+from trading_platform.core.services.logging_service import LoggingService
+from trading_platform.utils.datetime_operations import datetime_now_with_utc_offset, strftime_minutes
+
+
+def main(logger: logging.Logger, strategy_configs_filepath: str, profit_summary_dir: str, tick_sec: float,
+         order_execution_workers: int, metrics_port: Optional[int], metrics_log_interval_sec: float,
+         update_tables: bool):
+    with open(strategy_configs_filepath) as strategy_configs_file:
+        strategy_configs: List[Dict] = json.load(strategy_configs_file)
+    logger.info('running {0} strategies in live mode'.format(len(strategy_configs)))
+
+    metrics_service: MetricsService = MetricsService()
+    metrics_service.start_logging(logger, metrics_log_interval_sec)
+    if metrics_port is not None:
+        metrics_service.serve(metrics_port)
+
+    multi_strategy_runner: MultiStrategyRunner = MultiStrategyRunner(**{
+        'logger': logger,
+        'strategy_configs': strategy_configs,
+        'persistence': Persistence(PersistenceMode.database, update_tables),
+        'profit_summary_dir': profit_summary_dir,
+        'tick_sec': tick_sec,
+        'order_execution_workers': order_execution_workers,
+        'metrics_service': metrics_service
+    })
+    multi_strategy_runner.run()
+
+
+def get_cli_args() -> Dict:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--run_daemon', help='Whether to run the script as a daemon. Can be "True" or "False".')
+    parser.add_argument('--strategy_configs', required=True,
+                        help='Absolute path of a JSON file with a list of strategy configs, e.g. '
+                             '[{"strategy": "cycle", "exchange_id": 1, "base": "USDT", "quote": "BTC", '
+                             '"properties": {"order_padding_percent": 0.01}}].')
+    parser.add_argument('--tick_sec', type=float, default=60,
+                        help='Longest sleep in seconds before checking for due strategy steps again.')
+    parser.add_argument('--order_execution_workers', type=int, default=0,
+                        help='How many orders to execute concurrently. 0 waits for each order to fill before stepping '
+                             'the next strategy.')
+    parser.add_argument('--metrics_port', type=int,
+                        help='Port on which to serve step timings in the Prometheus text format at /metrics.')
+    parser.add_argument('--metrics_log_interval_sec', type=float, default=300,
+                        help='Seconds between logging the percentiles of the step timings.')
+    parser.add_argument('--update_tables',
+                        help='Whether to migrate the database tables to the current schema before running, e.g. after '
+                             'upgrading trading_platform. Can be "True" or "False".')
+    arg_dict: Dict = vars(parser.parse_args())
+    arg_dict['run_daemon'] = arg_dict['run_daemon'] == 'True'
+    arg_dict['update_tables'] = arg_dict['update_tables'] == 'True'
+    repo_dir: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    arg_dict['profit_summary_dir'] = arg_dict.get('profit_summary_dir', os.path.join(repo_dir, 'backtest_results'))
+    arg_dict['logfile_path'] = arg_dict.get('logfile_path', os.path.join(repo_dir, 'logs'))
+    return arg_dict
+
+
+if __name__ == '__main__':
+    arg_dict = get_cli_args()
+    file: str = os.path.join(arg_dict.get('logfile_path'),
+                             'strategies_{0}.log'.format(datetime_now_with_utc_offset().strftime(strftime_minutes)))
+    print('Logging to {0}'.format(file))
+    file_handler: logging.FileHandler = logging.FileHandler(filename=file, mode='w+')
+    file_handler.setFormatter(LoggingService.get_default_formatter())
+    logger: logging.Logger = LoggingService.set_logger(name=None, handler=file_handler)
+
+    if arg_dict.get('run_daemon'):
+        import daemon
+        with daemon.DaemonContext(files_preserve=[file_handler.stream]):
+            main(logger, arg_dict.get('strategy_configs'), arg_dict.get('profit_summary_dir'), arg_dict.get('tick_sec'),
+                 arg_dict.get('order_execution_workers'), arg_dict.get('metrics_port'),
+                 arg_dict.get('metrics_log_interval_sec'), arg_dict.get('update_tables'))
+    else:
+        main(logger, arg_dict.get('strategy_configs'), arg_dict.get('profit_summary_dir'), arg_dict.get('tick_sec'),
+             arg_dict.get('order_execution_workers'), arg_dict.get('metrics_port'),
+             arg_dict.get('metrics_log_interval_sec'), arg_dict.get('update_tables'))
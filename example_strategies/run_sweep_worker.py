@@ -0,0 +1,52 @@
+import sys
+
+import argparse
+import logging
+import os
+from typing import Dict
+
+sys.path.append(os.getcwd())
+from example_strategies.shared.parameter_sweep_service import run_sweep_worker
+
+from trading_platform.core.services.logging_service import LoggingService
+from trading_platform.utils.datetime_operations import datetime_now_with_utc_offset, strftime_minutes
+
+
+def main(logger: logging.Logger, arg_dict: Dict):
+    logger.info('running shards from {0}'.format(arg_dict.get('queue_url')))
+    run_sweep_worker(**{
+        'logger': logger,
+        'queue_url': arg_dict.get('queue_url'),
+        'sweep_id': arg_dict.get('sweep_id'),
+        'exit_when_finished': arg_dict.get('exit_when_finished'),
+        'heartbeat_timeout_sec': arg_dict.get('heartbeat_timeout_sec'),
+        'max_attempts': arg_dict.get('max_attempts')
+    })
+
+
+def get_cli_args() -> Dict:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--queue_url', required=True,
+                        help='SQLAlchemy database URL of the work queue of run_parameter_sweep.py --queue_url.')
+    parser.add_argument('--sweep_id', help='Only run shards of this sweep. Shards of any sweep by default.')
+    parser.add_argument('--exit_when_finished', action='store_true',
+                        help='Exit once every queued shard is finished instead of waiting for more sweeps.')
+    parser.add_argument('--heartbeat_timeout_sec', type=float, default=120,
+                        help='Must match that of run_parameter_sweep.py.')
+    parser.add_argument('--max_attempts', type=int, default=3, help='Must match that of run_parameter_sweep.py.')
+    arg_dict: Dict = vars(parser.parse_args())
+    repo_dir: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    arg_dict['logfile_path'] = arg_dict.get('logfile_path', os.path.join(repo_dir, 'logs'))
+    return arg_dict
+
+
+if __name__ == '__main__':
+    arg_dict = get_cli_args()
+    file: str = os.path.join(arg_dict.get('logfile_path'), 'sweep_worker_{0}_{1}.log'.format(
+        datetime_now_with_utc_offset().strftime(strftime_minutes), os.getpid()))
+    print('Logging to {0}'.format(file))
+    file_handler: logging.FileHandler = logging.FileHandler(filename=file, mode='w+')
+    file_handler.setFormatter(LoggingService.get_default_formatter())
+    logger: logging.Logger = LoggingService.set_logger(name=None, handler=file_handler)
+
+    main(logger, arg_dict)
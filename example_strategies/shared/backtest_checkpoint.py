@@ -0,0 +1,93 @@
+import glob
+import os
+import pickle
+from typing import Dict, List, Optional
+
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.ticker import Ticker
+
+
+class BacktestCheckpoint:
+    """
+    The state of a backtest after its last completed ticker file, from which BacktestService can resume the run.
+
+    Steps are scheduled from the seed and the step number of each file, so the file cursor is all that is needed to
+    reproduce the rest of the schedule. The ProfitTracker is rebuilt from its running aggregates, and the profit
+    history already written is truncated to its length at the checkpoint, so that rows of a partially simulated file
+    aren't written twice. A checkpoint only resumes a run of the properties it was written with, see check_properties.
+    """
+    format_version: int = 3
+
+    def __init__(self, **kwargs):
+        self.strategy_id: str = kwargs.get('strategy_id')
+        # Every property of the strategy, as strings.
+        self.properties: Dict[str, str] = kwargs.get('properties', {})
+        # The ticker files that were completely simulated, in order.
+        self.completed_ticker_filenames: List[str] = kwargs.get('completed_ticker_filenames', [])
+        self.balances: Dict[str, FinancialData] = kwargs.get('balances', {})
+        # The tickers the exchange last saw, which stand in for pairs without a ticker in the next step's minute.
+        self.tickers: Dict[str, Ticker] = kwargs.get('tickers', {})
+        self.strategy_state: Dict = kwargs.get('strategy_state', {})
+        # The running aggregates of the ProfitTracker, see ProfitTracker.state.
+        self.profit_tracker_state: Optional[Dict] = kwargs.get('profit_tracker_state')
+        self.profit_history_size: int = kwargs.get('profit_history_size', 0)
+        self.minutes_simulated: int = kwargs.get('minutes_simulated', 0)
+        self.step_count: int = kwargs.get('step_count', 0)
+
+    @staticmethod
+    def saved_properties(properties: Dict) -> Dict[str, str]:
+        return {name: str(value) for name, value in properties.items()}
+
+    def check_properties(self, properties: Dict):
+        """
+        Raises:
+            ValueError: if the checkpoint was written by a run with other properties, which it can't resume
+        """
+        saved_properties: Dict[str, str] = BacktestCheckpoint.saved_properties(properties)
+        differences: List[str] = ['{0}: {1} != {2}'.format(name, self.properties.get(name), value)
+                                  for name, value in sorted(saved_properties.items())
+                                  if self.properties.get(name) != value]
+        if differences:
+            raise ValueError('checkpoint of {0} was written with other properties, {1}'.format(
+                self.strategy_id, ', '.join(differences)))
+
+    @staticmethod
+    def filepath(profit_summary_filepath: str) -> str:
+        return '{0}.checkpoint'.format(os.path.splitext(profit_summary_filepath)[0])
+
+    def save(self, filepath: str):
+        """
+        Write the checkpoint to a temporary file and rename it over the last one, so that a crash while saving leaves
+        the previous checkpoint intact.
+        """
+        temporary_filepath: str = '{0}.tmp'.format(filepath)
+        with open(temporary_filepath, 'wb') as checkpoint_file:
+            pickle.dump({'format_version': self.format_version, 'checkpoint': vars(self)}, checkpoint_file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(temporary_filepath, filepath)
+
+    @staticmethod
+    def load(filepath: str) -> Optional['BacktestCheckpoint']:
+        """
+        Returns:
+            The checkpoint at filepath, or None if there is none or it was written by another format version.
+        """
+        if not os.path.isfile(filepath):
+            return None
+        with open(filepath, 'rb') as checkpoint_file:
+            saved: Dict = pickle.load(checkpoint_file)
+        if saved.get('format_version') != BacktestCheckpoint.format_version:
+            return None
+        return BacktestCheckpoint(**saved['checkpoint'])
+
+    @staticmethod
+    def latest_filepath(profit_summary_dir: str, strategy_id_prefix: str) -> Optional[str]:
+        """
+        Returns:
+            The most recently written checkpoint of a strategy whose id starts with strategy_id_prefix, or None.
+        """
+        filepaths: List[str] = glob.glob(os.path.join(glob.escape(profit_summary_dir),
+                                                      '{0}*.checkpoint'.format(glob.escape(strategy_id_prefix))))
+        return max(filepaths, key=os.path.getmtime) if filepaths else None
@@ -0,0 +1,162 @@
+import glob
+import hashlib
+import inspect
+import json
+import os
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+from trading_platform.exchanges.backtest.backtest_exchange_service import BacktestExchangeService
+
+from example_strategies.shared.strategy_registry import strategies
+
+
+class BacktestResultCache:
+    """
+    Content-addressed cache of backtest results on local disk.
+
+    An entry is keyed by a hash of the strategy's properties, the source of the strategy, of the shared backtest code
+    and of the backtest exchange, and the names, sizes and mtimes of the ticker files, so a backtest whose inputs are
+    unchanged is looked up instead of simulated again. Each entry is a directory holding the result and the profit
+    summary. Lookups touch the entry's mtime, and the least recently used entries are evicted once the cache outgrows
+    max_size_bytes.
+    """
+    # Bump whenever the layout of an entry changes so that old entries are missed instead of misread.
+    format_version: int = 1
+    result_filename: str = 'result.json'
+    profit_summary_filename: str = 'profit_summary.csv'
+
+    def __init__(self, **kwargs):
+        self.cache_dir: str = kwargs.get('cache_dir')
+        self.max_size_bytes: int = kwargs.get('max_size_bytes', 1024 ** 3)
+
+    @staticmethod
+    def key(strategy_name: str, properties: Dict, ticker_dir: str, options: Optional[Dict] = None) -> str:
+        """
+        Args:
+            strategy_name: a key of strategies
+            properties: every property of the strategy, e.g. from properties_with_overrides
+            ticker_dir: the ticker files the backtest replays
+            options: any other settings of the backtest that change its result
+        """
+        key_fields: Dict = {
+            'format_version': BacktestResultCache.format_version,
+            'strategy_name': strategy_name,
+            'properties': {name: str(value) for name, value in properties.items()},
+            'code_version': BacktestResultCache.code_version(strategy_name),
+            'ticker_files': BacktestResultCache.ticker_dir_fingerprint(ticker_dir),
+            'options': options or {}
+        }
+        return hashlib.sha256(json.dumps(key_fields, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def code_version(strategy_name: str) -> str:
+        """
+        Returns:
+            A hash of the source files of the strategy's package, of the shared backtest code and of the backtest
+            exchange, which fills the orders.
+        """
+        strategy_dir: str = os.path.dirname(inspect.getsourcefile(strategies[strategy_name]['properties_class']))
+        source_filepaths: List[str] = sorted(glob.glob(os.path.join(strategy_dir, '*.py')) +
+                                             glob.glob(os.path.join(os.path.dirname(__file__), '*.py')))
+        source_filepaths.append(inspect.getsourcefile(BacktestExchangeService))
+        code_hash = hashlib.sha256()
+        for source_filepath in source_filepaths:
+            with open(source_filepath, 'rb') as source_file:
+                code_hash.update(source_file.read())
+        return code_hash.hexdigest()
+
+    @staticmethod
+    def ticker_dir_fingerprint(ticker_dir: str) -> List[Tuple[str, int, int]]:
+        """
+        Returns:
+            The name, size and mtime of every ticker file, which TickerCacheService also uses to detect changed files.
+        """
+        fingerprint: List[Tuple[str, int, int]] = []
+        for ticker_filename in sorted(os.listdir(ticker_dir)):
+            stat: os.stat_result = os.stat(os.path.join(ticker_dir, ticker_filename))
+            fingerprint.append((ticker_filename, stat.st_size, stat.st_mtime_ns))
+        return fingerprint
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Returns:
+            The cached result, or None on a miss. The profit summary of a hit is at profit_summary_filepath(key), if the
+            backtest wrote one.
+        """
+        entry_path: str = self.entry_path(key)
+        try:
+            with open(os.path.join(entry_path, self.result_filename)) as result_file:
+                result: Dict = json.load(result_file)
+            # Mark the entry as recently used.
+            os.utime(entry_path)
+        except FileNotFoundError:
+            # Missing, or evicted by another process since it was opened.
+            return None
+        return result
+
+    def profit_summary_filepath(self, key: str) -> str:
+        return os.path.join(self.entry_path(key), self.profit_summary_filename)
+
+    def put(self, key: str, result: Dict, profit_summary_filepath: Optional[str] = None):
+        """
+        Cache a result and the profit summary it was computed with, then evict the least recently used entries if the
+        cache has outgrown max_size_bytes.
+        """
+        # Write to a temporary directory and rename it into place so that readers never see a partial entry.
+        tmp_entry_path: str = '{0}.{1}.tmp'.format(self.entry_path(key), os.getpid())
+        shutil.rmtree(tmp_entry_path, ignore_errors=True)
+        os.makedirs(tmp_entry_path)
+        if profit_summary_filepath is not None and os.path.isfile(profit_summary_filepath):
+            shutil.copyfile(profit_summary_filepath, os.path.join(tmp_entry_path, self.profit_summary_filename))
+        with open(os.path.join(tmp_entry_path, self.result_filename), 'w') as result_file:
+            # Values read from a profit summary may be numpy scalars.
+            json.dump(result, result_file, default=lambda value: value.item())
+        if self.entry_size(tmp_entry_path) > self.max_size_bytes:
+            # The entry alone would outgrow the cache, so it isn't cached rather than evicted right away.
+            shutil.rmtree(tmp_entry_path, ignore_errors=True)
+            return
+        try:
+            os.rename(tmp_entry_path, self.entry_path(key))
+        except OSError:
+            # Another process cached the same backtest first.
+            shutil.rmtree(tmp_entry_path, ignore_errors=True)
+        self.evict(keep_key=key)
+
+    @staticmethod
+    def entry_size(entry_path: str) -> int:
+        return sum(os.path.getsize(os.path.join(entry_path, filename)) for filename in os.listdir(entry_path))
+
+    def evict(self, keep_key: Optional[str] = None):
+        """
+        Evict the least recently used entries until the cache fits in max_size_bytes.
+
+        Args:
+            keep_key: an entry that isn't evicted, e.g. the one just written
+        """
+        entries: List[Tuple[float, int, str]] = []
+        # The size of the entry that is kept, which counts towards the size of the cache.
+        kept_size: int = 0
+        for entry_name in os.listdir(self.cache_dir):
+            entry_path: str = os.path.join(self.cache_dir, entry_name)
+            if entry_name.endswith('.tmp'):
+                continue
+            try:
+                size: int = self.entry_size(entry_path)
+                if entry_name == keep_key:
+                    kept_size = size
+                    continue
+                entries.append((os.path.getmtime(entry_path), size, entry_path))
+            except FileNotFoundError:
+                # Evicted by another process.
+                continue
+
+        total_size: int = kept_size + sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            shutil.rmtree(entry_path, ignore_errors=True)
+            total_size -= size
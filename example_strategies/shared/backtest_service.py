@@ -0,0 +1,165 @@
+import datetime
+import logging
+from typing import Dict, List, Optional
+
+from trading_platform.exchanges.backtest.backtest_exchange_service import BacktestExchangeService
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.ticker import Ticker
+from trading_platform.strategy.services.strategy_executer_service_abc import StrategyExecuterServiceAbc
+
+from example_strategies.shared.backtest_checkpoint import BacktestCheckpoint
+from example_strategies.shared.persistence import Persistence
+from example_strategies.shared.profit_history_writer import ProfitHistoryWriter
+from example_strategies.shared.profit_tracker import ProfitTracker
+from example_strategies.shared.stage_timer import StageTimer
+from example_strategies.shared.step_schedule import StepSchedule
+from example_strategies.shared.ticker_file import TickerFile
+from example_strategies.shared.ticker_rollup import TickerResolution
+from example_strategies.shared.ticker_stream import TickerStream
+
+
+class BacktestService:
+    """
+    Replays a directory of minute-level ticker files against a strategy on a backtest exchange.
+    """
+
+    def __init__(self, **kwargs):
+        self.logger: logging.Logger = kwargs.get('logger')
+        self.strategy_executer_service: StrategyExecuterServiceAbc = kwargs.get('strategy_executer_service')
+        self.exchange: BacktestExchangeService = kwargs.get('exchange')
+
+        self.ticker_dir: str = kwargs.get('ticker_dir')
+        self.ticker_cache_dir: Optional[str] = kwargs.get('ticker_cache_dir')
+        # If set, only these ticker files are replayed, e.g. the time range of a shard of a parameter sweep.
+        self.ticker_filenames: Optional[List[str]] = kwargs.get('ticker_filenames')
+        self.step_schedule: StepSchedule = kwargs.get('step_schedule')
+        # A TickerResolution. Rollups need a ticker_cache_dir, and only step at the same minutes as the minute-level
+        # tickers if the step_schedule is aligned to their bars, see coarsest_resolution.
+        self.ticker_resolution: str = kwargs.get('ticker_resolution', TickerResolution.minute)
+        # If set, only the tickers of these pairs are loaded, so the exchange only sees and values their tickers, and
+        # steps only fire in minutes in which one of them has a ticker.
+        self.pairs: Optional[List[Pair]] = kwargs.get('pairs')
+
+        self.initial_base_currency: str = kwargs.get('initial_base_currency')
+        self.initial_base_capital: FinancialData = kwargs.get('initial_base_capital')
+        self.profit_summary_filepath: str = kwargs.get('profit_summary_filepath')
+        # Buffered orders and strategy state are flushed along with the profit history.
+        self.persistence: Optional[Persistence] = kwargs.get('persistence')
+        # Minutes of tickers converted to FinancialData at a time, and how many converted batches may be read ahead.
+        self.batch_minutes: int = kwargs.get('batch_minutes', 24 * 60)
+        self.max_queued_batches: int = kwargs.get('max_queued_batches', 2)
+        self.stage_timer: StageTimer = kwargs.get('stage_timer') or StageTimer()
+        # If set, the state of the backtest is saved here after every ticker file.
+        self.checkpoint_filepath: Optional[str] = kwargs.get('checkpoint_filepath')
+        # The properties of the strategy, which a checkpoint must match to be resumed, see BacktestCheckpoint.
+        self.checkpoint_properties: Dict[str, str] = kwargs.get('checkpoint_properties', {})
+        # If set, the run continues after the last file of this checkpoint. The strategy must have been initialized
+        # with the checkpoint's strategy_id and strategy_state.
+        self.resume_checkpoint: Optional[BacktestCheckpoint] = kwargs.get('resume_checkpoint')
+
+        # Counters of the last run.
+        self.minutes_simulated: int = 0
+        self.step_count: int = 0
+
+    def run(self) -> ProfitTracker:
+        exchange: BacktestExchangeService = self.exchange
+        pair: Pair = self.strategy_executer_service.pair
+        profit_history_writer: ProfitHistoryWriter = ProfitHistoryWriter(self.profit_summary_filepath)
+        checkpoint: BacktestCheckpoint = BacktestCheckpoint(**{
+            'strategy_id': self.strategy_executer_service.strategy_execution.strategy_id,
+            'properties': self.checkpoint_properties
+        })
+        profit_tracker: ProfitTracker = ProfitTracker(**{
+            'valuation_currency': self.initial_base_currency,
+            'pairs': self.pairs or [pair]
+        })
+        if self.resume_checkpoint is None:
+            exchange.deposit_immediately(self.initial_base_currency, self.initial_base_capital)
+        else:
+            checkpoint = self.resume_checkpoint
+            self.logger.info('resuming after {0}'.format(checkpoint.completed_ticker_filenames[-1:]))
+            for currency, balance in checkpoint.balances.items():
+                exchange.deposit_immediately(currency, balance)
+            exchange.set_tickers(dict(checkpoint.tickers))
+            if checkpoint.profit_tracker_state is not None:
+                profit_tracker = ProfitTracker(**dict(checkpoint.profit_tracker_state, **{
+                    'valuation_currency': self.initial_base_currency,
+                    'pairs': self.pairs or [pair]
+                }))
+            profit_history_writer.truncate(checkpoint.profit_history_size)
+            self.minutes_simulated = checkpoint.minutes_simulated
+            self.step_count = checkpoint.step_count
+        # Read from the binary ticker cache if one is configured, so that CSVs are only parsed once. The next batches
+        # are read and converted to FinancialData while the current one is simulated.
+        ticker_stream: TickerStream = TickerStream(**{
+            'logger': self.logger,
+            'ticker_dir': self.ticker_dir,
+            'ticker_cache_dir': self.ticker_cache_dir,
+            'ticker_filenames': self.ticker_filenames,
+            'resolution': self.ticker_resolution,
+            'pairs': self.pairs,
+            'exchange_id': exchange.exchange_id,
+            'step_schedule': self.step_schedule,
+            'batch_minutes': self.batch_minutes,
+            'max_queued_batches': self.max_queued_batches,
+            'stage_timer': self.stage_timer,
+            'skip_ticker_filenames': checkpoint.completed_ticker_filenames
+        })
+        for ticker_batch in ticker_stream:
+            if ticker_batch.is_start_of_file:
+                self.logger.info(ticker_batch.ticker_filename)
+            ticker_file: TickerFile = ticker_batch.ticker_file
+            self.minutes_simulated += len(ticker_file)
+
+            if profit_tracker.initial_value is None and len(ticker_file) > 0:
+                self.logger.info('initial_tickers')
+                ticker_file.set_latest_tickers(exchange, 0)
+
+                initial_tickers: Dict[str, Ticker] = exchange.get_tickers()
+                profit_tracker.initialize(list(initial_tickers.values())[0].app_create_timestamp.to_pydatetime(),
+                                          exchange, initial_tickers)
+
+            # Only visit the minutes at which the strategy is scheduled to step.
+            for minute_position in ticker_batch.step_positions:
+                ticker_period = ticker_file.minute(minute_position)
+                with self.stage_timer.time('step'):
+                    ticker_file.set_latest_tickers(exchange, minute_position)
+
+                    self.strategy_executer_service.step(**{
+                        'exchange': exchange,
+                        'now_datetime': ticker_period.to_pydatetime(),
+                        'check_if_order_filled': False
+                    })
+                self.step_count += 1
+                if len(exchange.get_tickers().values()) > 0:
+                    with self.stage_timer.time('profit_summary'):
+                        ticker_datetime: datetime.datetime = (
+                            list(exchange.get_tickers().values())[0].app_create_timestamp).to_pydatetime()
+                        profit_history_writer.append(
+                            profit_tracker.update(ticker_datetime, exchange, exchange.get_tickers()))
+
+            # Checkpoint the profit history after every aggregation file
+            if ticker_batch.is_end_of_file:
+                with self.stage_timer.time('persist'):
+                    profit_history_writer.checkpoint()
+                    if self.persistence is not None:
+                        self.persistence.flush()
+                    if self.checkpoint_filepath is not None:
+                        checkpoint.completed_ticker_filenames.append(ticker_batch.ticker_filename)
+                        self.save_checkpoint(checkpoint, profit_history_writer, profit_tracker)
+
+        return profit_tracker
+
+    def save_checkpoint(self, checkpoint: BacktestCheckpoint, profit_history_writer: ProfitHistoryWriter,
+                        profit_tracker: ProfitTracker):
+        pair: Pair = self.strategy_executer_service.pair
+        currencies: List[str] = sorted({self.initial_base_currency, pair.base, pair.quote})
+        checkpoint.balances = {currency: self.exchange.get_balance(currency).free for currency in currencies}
+        checkpoint.tickers = dict(self.exchange.get_tickers())
+        checkpoint.profit_tracker_state = profit_tracker.state()
+        checkpoint.strategy_state = dict(self.strategy_executer_service.strategy_execution.state)
+        checkpoint.profit_history_size = profit_history_writer.size()
+        checkpoint.minutes_simulated = self.minutes_simulated
+        checkpoint.step_count = self.step_count
+        checkpoint.save(self.checkpoint_filepath)
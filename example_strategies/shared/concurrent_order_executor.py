@@ -0,0 +1,67 @@
+import concurrent.futures
+import logging
+import threading
+from typing import Callable, Optional
+
+from sqlalchemy.orm import scoped_session
+from trading_platform.exchanges.data.order import Order
+from trading_platform.exchanges.order_execution_service import OrderExecutionService
+
+from example_strategies.shared.stage_timer import StageTimer
+
+
+class ConcurrentOrderExecutor:
+    """
+    Executes orders on a bounded pool of worker threads, so that polling an order until it fills doesn't block the
+    strategy loop.
+
+    Each order is executed with its own session from the thread-local scoped_session_maker. When execution finishes,
+    on_complete is called on the worker thread with the executed order and the exception raised, if any.
+    """
+
+    def __init__(self, **kwargs):
+        self.logger: logging.Logger = kwargs.get('logger')
+        self.order_execution_service: OrderExecutionService = kwargs.get('order_execution_service')
+        self.scoped_session_maker: scoped_session = kwargs.get('scoped_session_maker')
+        self.max_workers: int = kwargs.get('max_workers', 4)
+        # submit() blocks once this many orders are queued or executing.
+        self.max_pending_orders: int = kwargs.get('max_pending_orders', 4 * self.max_workers)
+        self.stage_timer: StageTimer = kwargs.get('stage_timer') or StageTimer()
+
+        self.executor: concurrent.futures.ThreadPoolExecutor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers)
+        self.pending_orders: threading.BoundedSemaphore = threading.BoundedSemaphore(self.max_pending_orders)
+
+    def submit(self, order: Order, check_if_order_filled: bool,
+               on_complete: Callable[[Order, Optional[Exception]], None]) -> concurrent.futures.Future:
+        self.pending_orders.acquire()
+        try:
+            return self.executor.submit(self._execute, order, check_if_order_filled, on_complete)
+        except Exception:
+            self.pending_orders.release()
+            raise
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
+
+    def _execute(self, order: Order, check_if_order_filled: bool,
+                 on_complete: Callable[[Order, Optional[Exception]], None]):
+        try:
+            executed_order: Optional[Order] = None
+            exception: Optional[Exception] = None
+            try:
+                with self.stage_timer.time('execute_order'):
+                    executed_order = self.order_execution_service.execute_order(
+                        order, session=self.scoped_session_maker(), write_pending_order=True,
+                        check_if_order_filled=check_if_order_filled)
+            except Exception as execution_exception:
+                self.logger.exception('failed to execute order {0}'.format(order))
+                exception = execution_exception
+
+            try:
+                on_complete(executed_order if executed_order is not None else order, exception)
+            except Exception:
+                self.logger.exception('order completion callback failed for order {0}'.format(order))
+        finally:
+            self.scoped_session_maker.remove()
+            self.pending_orders.release()
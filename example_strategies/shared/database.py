@@ -0,0 +1,37 @@
+from typing import TYPE_CHECKING, Callable
+
+from trading_platform.properties.env_properties import EnvProperties, DatabaseProperties
+
+if TYPE_CHECKING:
+    from trading_platform.storage.sql_alchemy_engine import SqlAlchemyEngine
+
+
+def make_engine(update_tables: bool = False) -> 'SqlAlchemyEngine':
+    """
+    Create the engine for the environment's database.
+
+    The storage modules and the parameter store client are imported here rather than at module load, so that runs that
+    don't use a database don't pay for importing them.
+
+    Args:
+        update_tables: whether to migrate the tables to the current schema, which is only needed after an upgrade of
+            trading_platform
+    """
+    from trading_platform.storage.sql_alchemy_dtos import table_classes
+    from trading_platform.storage.sql_alchemy_engine import SqlAlchemyEngine
+
+    table_classes.exchange_data_tables()
+
+    if EnvProperties.is_prod:
+        from trading_platform.aws_utils.parameter_store_service import ParameterStoreService
+        ParameterStoreService.load_properties_from_parameter_store_and_set('database_credentials')
+        engine_maker_method: Callable = SqlAlchemyEngine.rds_engine
+    else:
+        engine_maker_method: Callable = SqlAlchemyEngine.local_engine_maker
+
+    DatabaseProperties.set_properties_from_env_variables()
+    engine = engine_maker_method()
+    engine.add_engine_pidguard()
+    if update_tables:
+        engine.update_tables()
+    return engine
@@ -0,0 +1,161 @@
+import concurrent.futures
+import contextlib
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.ticker import Ticker
+from trading_platform.exchanges.exchange_service_abc import ExchangeServiceAbc
+
+from example_strategies.shared.stage_timer import StageTimer
+
+
+class ExchangeStateRefresher:
+    """
+    Keeps the balances and tickers of an exchange warm by fetching them on a background thread, so that a strategy step
+    can place an order without first waiting for two exchange round-trips.
+
+    trading_platform's exchange services make blocking requests, so the balances and tickers are requested concurrently
+    on a pool of I/O threads, and a refresh takes about one round-trip. The pool is kept for the life of the refresher,
+    so connections the exchange keeps per thread are reused across refreshes. If the exchange service has a
+    fetch_ticker(pair) request, only the tickers of the traded pairs are fetched, one request per pair, instead of
+    every ticker of the exchange with fetch_latest_tickers().
+    """
+
+    def __init__(self, **kwargs):
+        self.logger: logging.Logger = kwargs.get('logger')
+        self.exchange: ExchangeServiceAbc = kwargs.get('exchange')
+        self.refresh_freq_sec: float = kwargs.get('refresh_freq_sec')
+        # State older than this is fetched synchronously by ensure_fresh() instead of being used.
+        self.max_staleness_sec: float = kwargs.get('max_staleness_sec', 2 * self.refresh_freq_sec)
+        self.stage_timer: StageTimer = kwargs.get('stage_timer') or StageTimer()
+        # The pairs traded on the exchange. Only their tickers are returned by tickers().
+        self.pairs: List[Pair] = kwargs.get('pairs', [])
+
+        # Held while the exchange state is being fetched.
+        self.lock: threading.RLock = threading.RLock()
+        # One thread for the balances and one per concurrent ticker request.
+        self.io_executor: concurrent.futures.ThreadPoolExecutor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=kwargs.get('io_workers', 4), thread_name_prefix='exchange_io')
+        # The per-pair ticker request of the exchange service, if it has one.
+        self.fetch_ticker: Optional[Callable[[Pair], Ticker]] = getattr(self.exchange, 'fetch_ticker', None)
+        # The tickers fetched with fetch_ticker, by pair name.
+        self.pair_tickers: Dict[str, Ticker] = {}
+        self.last_refresh_monotonic: Optional[float] = None
+        self.stop_event: threading.Event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def refresh(self):
+        self.refresh_all([self])
+
+    @staticmethod
+    def refresh_all(exchange_state_refreshers: List['ExchangeStateRefresher']):
+        """
+        Refresh the state of several exchanges at once, so that the refresh takes about one round-trip to the slowest
+        exchange rather than two round-trips to each.
+        """
+        with contextlib.ExitStack() as lock_stack:
+            # Always locked in the same order, so that concurrent calls can't deadlock.
+            for exchange_state_refresher in sorted(exchange_state_refreshers,
+                                                   key=lambda refresher: refresher.exchange.exchange_id):
+                lock_stack.enter_context(exchange_state_refresher.lock)
+
+            futures: List[concurrent.futures.Future] = []
+            for exchange_state_refresher in exchange_state_refreshers:
+                futures.extend(exchange_state_refresher.submit_fetches())
+            # Raises the first error of the fetches, once all of them are done.
+            concurrent.futures.wait(futures)
+            for future in futures:
+                future.result()
+            for exchange_state_refresher in exchange_state_refreshers:
+                exchange_state_refresher.last_refresh_monotonic = time.monotonic()
+
+    def submit_fetches(self) -> List[concurrent.futures.Future]:
+        """
+        Start fetching the balances and tickers on the I/O threads. The caller must hold the lock.
+        """
+        futures: List[concurrent.futures.Future] = [
+            self.io_executor.submit(self._fetch, 'fetch_balances', self.exchange.fetch_balances)]
+        if self.fetch_ticker is None:
+            futures.append(self.io_executor.submit(self._fetch, 'fetch_latest_tickers',
+                                                   self.exchange.fetch_latest_tickers))
+        else:
+            for pair in list(self.pairs):
+                futures.append(self.io_executor.submit(self._fetch_pair_ticker, pair))
+        return futures
+
+    def _fetch(self, stage: str, fetch: Callable[[], None]):
+        with self.stage_timer.time(stage):
+            fetch()
+
+    def _fetch_pair_ticker(self, pair: Pair):
+        with self.stage_timer.time('fetch_ticker'):
+            ticker: Optional[Ticker] = self.fetch_ticker(pair)
+        if ticker is not None:
+            self.pair_tickers[pair.name] = ticker
+
+    def tickers(self) -> Dict[str, Ticker]:
+        """
+        Returns:
+            The last fetched tickers of the traded pairs, by pair name. Pairs without a ticker are left out.
+        """
+        tickers: Dict[str, Ticker] = {}
+        for pair in self.pairs:
+            ticker: Optional[Ticker] = self.ticker(pair)
+            if ticker is not None:
+                tickers[pair.name] = ticker
+        return tickers
+
+    def ticker(self, pair: Pair) -> Optional[Ticker]:
+        """
+        Returns:
+            The last fetched ticker of the pair, or None if it has none.
+        """
+        if self.fetch_ticker is not None:
+            return self.pair_tickers.get(pair.name)
+        return self.exchange.get_tickers().get(pair.name)
+
+    def is_fresh(self) -> bool:
+        last_refresh_monotonic: Optional[float] = self.last_refresh_monotonic
+        return last_refresh_monotonic is not None and (
+                time.monotonic() - last_refresh_monotonic) <= self.max_staleness_sec
+
+    def invalidate(self):
+        """
+        Mark the cached state as stale, e.g. after placing an order that changed the balances.
+        """
+        self.last_refresh_monotonic = None
+
+    def ensure_fresh(self):
+        """
+        Refresh the exchange state synchronously if the background thread hasn't refreshed it recently enough.
+        """
+        if not self.is_fresh():
+            self.refresh()
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='exchange_state_refresher', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.io_executor.shutdown(wait=True)
+
+    def _run(self):
+        next_refresh_monotonic: float = time.monotonic()
+        while not self.stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                # Keep refreshing. Steps fall back to fetching synchronously once the state is stale.
+                self.logger.exception('failed to refresh the state of exchange {0}'.format(self.exchange.exchange_id))
+            # Schedule against the previous deadline so that the time spent fetching doesn't add up as drift.
+            next_refresh_monotonic = max(next_refresh_monotonic + self.refresh_freq_sec, time.monotonic())
+            self.stop_event.wait(next_refresh_monotonic - time.monotonic())
@@ -0,0 +1,38 @@
+from typing import Dict, Iterable, Set
+
+from trading_platform.exchanges.exchange_service_abc import ExchangeServiceAbc
+
+
+def instantiate_exchanges(exchange_ids: Iterable[int], live: bool) -> Dict[int, ExchangeServiceAbc]:
+    """
+    Instantiate the exchanges with the given ids. Live exchanges connect to their APIs when they are created, so only
+    the exchanges that are traded are created. The exchange modules are imported here, so that only those of the
+    selected mode are loaded.
+
+    Returns:
+        The exchanges by exchange_id.
+
+    Raises:
+        ValueError: if there is no exchange of the selected mode with one of the exchange_ids.
+    """
+    traded_exchange_ids: Set[int] = set(exchange_ids)
+    if live:
+        from trading_platform.exchanges.live import live_subclasses
+        subclasses_by_id: Dict[int, type] = {subclass.exchange_id: subclass for subclass in live_subclasses.all_live()
+                                             if hasattr(subclass, 'exchange_id')}
+        check_exchange_ids(traded_exchange_ids, subclasses_by_id.keys())
+        return live_subclasses.instantiate(subclasses=[subclasses_by_id[exchange_id]
+                                                       for exchange_id in sorted(traded_exchange_ids)])
+
+    from trading_platform.exchanges.backtest import backtest_subclasses
+    exchanges_by_id: Dict[int, ExchangeServiceAbc] = backtest_subclasses.instantiate()
+    check_exchange_ids(traded_exchange_ids, exchanges_by_id.keys())
+    return {exchange_id: exchange for exchange_id, exchange in exchanges_by_id.items()
+            if exchange_id in traded_exchange_ids}
+
+
+def check_exchange_ids(exchange_ids: Set[int], known_exchange_ids: Iterable[int]):
+    unknown_exchange_ids: Set[int] = exchange_ids - set(known_exchange_ids)
+    if unknown_exchange_ids:
+        raise ValueError('unknown exchange_id {0}'.format(', '.join(str(exchange_id)
+                                                                  for exchange_id in sorted(unknown_exchange_ids))))
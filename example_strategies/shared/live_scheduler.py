@@ -0,0 +1,62 @@
+import threading
+import time
+from typing import Optional
+
+from example_strategies.shared.step_schedule import StepSchedule
+
+
+def wall_clock_ns() -> int:
+    return int(time.time() * 10 ** 9)
+
+
+class LiveScheduler:
+    """
+    Sleeps until the steps of a StepSchedule are due, so that live trading steps at the same times a backtest would.
+
+    Deadlines are wall clock times, so the time spent in a step doesn't add up as drift, and the scheduler sleeps
+    straight through the hours outside of the schedule's active_utc_hours. Sleeps are measured with the monotonic clock
+    and capped at max_sleep_sec, after which the remaining time is recomputed from the wall clock, so a wall clock
+    adjustment delays a step by at most max_sleep_sec.
+    """
+
+    def __init__(self, **kwargs):
+        self.step_schedule: StepSchedule = kwargs.get('step_schedule')
+        self.max_sleep_sec: float = kwargs.get('max_sleep_sec', 60)
+        # If set, wait() returns as soon as the event is set.
+        self.stop_event: threading.Event = kwargs.get('stop_event') or threading.Event()
+
+        self.next_step_ns: int = self.step_schedule.next_step_time(wall_clock_ns())
+
+    def advance(self, now_ns: int):
+        """
+        Schedule the first step after now_ns. Steps that were missed while stepping are skipped rather than caught up.
+        """
+        self.next_step_ns = self.step_schedule.next_step_time(max(self.next_step_ns, now_ns))
+
+    def wait(self) -> bool:
+        """
+        Sleep until the next step is due and schedule the step after it.
+
+        Returns:
+            False if the stop_event was set before the step was due, otherwise True.
+        """
+        if not self.sleep_until(self.next_step_ns, self.stop_event, self.max_sleep_sec):
+            return False
+        self.advance(wall_clock_ns())
+        return True
+
+    @staticmethod
+    def sleep_until(deadline_ns: int, stop_event: Optional[threading.Event], max_sleep_sec: float) -> bool:
+        """
+        Returns:
+            False if stop_event was set before deadline_ns, otherwise True.
+        """
+        while True:
+            remaining_sec: float = (deadline_ns - wall_clock_ns()) / 10 ** 9
+            if remaining_sec <= 0:
+                return True
+            sleep_sec: float = min(remaining_sec, max_sleep_sec)
+            if stop_event is None:
+                time.sleep(sleep_sec)
+            elif stop_event.wait(sleep_sec):
+                return False
@@ -0,0 +1,150 @@
+import bisect
+import http.server
+import logging
+import socketserver
+import threading
+from typing import Dict, List, Optional
+
+from example_strategies.shared.stage_timer import StageTimer
+
+# Upper bounds in seconds of the histogram buckets, doubling from 10 microseconds to about 84 seconds.
+bucket_bounds: List[float] = [10 ** -5 * 2 ** i for i in range(24)]
+
+
+class Histogram:
+    """
+    Counts of observations per bucket, from which percentiles are estimated by interpolating within a bucket.
+
+    Recording an observation is a binary search and an increment, so it is cheap enough to do on every step.
+    """
+
+    def __init__(self):
+        # The last count is of observations above the last bound.
+        self.counts: List[int] = [0] * (len(bucket_bounds) + 1)
+        self.count: int = 0
+        self.sum: float = 0.0
+        self.max: float = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(bucket_bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank: float = percent / 100 * self.count
+        cumulative_count: int = 0
+        for bucket, bucket_count in enumerate(self.counts):
+            if bucket_count > 0 and cumulative_count + bucket_count >= rank:
+                lower_bound: float = bucket_bounds[bucket - 1] if bucket > 0 else 0.0
+                upper_bound: float = bucket_bounds[bucket] if bucket < len(bucket_bounds) else self.max
+                return lower_bound + (upper_bound - lower_bound) * (rank - cumulative_count) / bucket_count
+            cumulative_count += bucket_count
+        return self.max
+
+
+class MetricsService(StageTimer):
+    """
+    A StageTimer that also keeps a histogram of the durations of each stage.
+
+    The histograms can be written to the log periodically and are served in the Prometheus text format, so the time
+    spent fetching exchange state, executing orders and saving strategy state can be watched in live mode.
+    """
+    percentiles: List[float] = [50, 95, 99]
+
+    def __init__(self):
+        super().__init__()
+        self.histograms: Dict[str, Histogram] = {}
+        self.stop_event: threading.Event = threading.Event()
+        self.http_server: Optional[socketserver.TCPServer] = None
+
+    def observe(self, stage: str, seconds: float):
+        super().observe(stage, seconds)
+        with self.lock:
+            histogram: Optional[Histogram] = self.histograms.get(stage)
+            if histogram is None:
+                histogram = Histogram()
+                self.histograms[stage] = histogram
+            histogram.observe(seconds)
+
+    def percentile_summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns:
+            The count and the 50th, 95th and 99th percentile seconds of each stage, keyed by stage.
+        """
+        with self.lock:
+            summary: Dict[str, Dict[str, float]] = {}
+            for stage, histogram in sorted(self.histograms.items()):
+                summary[stage] = {'count': histogram.count}
+                for percent in self.percentiles:
+                    summary[stage]['p{0:g}'.format(percent)] = histogram.percentile(percent)
+            return summary
+
+    def log_summary(self, logger: logging.Logger):
+        for stage, stage_summary in self.percentile_summary().items():
+            logger.info('{0}: count {1}, {2}'.format(stage, stage_summary['count'], ', '.join(
+                '{0} {1:.2f} ms'.format(name, value * 1000) for name, value in stage_summary.items()
+                if name != 'count')))
+
+    def start_logging(self, logger: logging.Logger, interval_sec: float):
+        """
+        Log the summary every interval_sec seconds on a daemon thread, until stop() is called.
+        """
+        def log_periodically():
+            while not self.stop_event.wait(interval_sec):
+                self.log_summary(logger)
+
+        threading.Thread(target=log_periodically, name='metrics_logger', daemon=True).start()
+
+    def prometheus_text(self) -> str:
+        lines: List[str] = ['# HELP strategy_stage_seconds Time spent in each stage of trading or backtesting.',
+                            '# TYPE strategy_stage_seconds histogram']
+        with self.lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative_count: int = 0
+                for bound, bucket_count in zip(bucket_bounds, histogram.counts):
+                    cumulative_count += bucket_count
+                    lines.append('strategy_stage_seconds_bucket{{stage="{0}",le="{1:g}"}} {2}'.format(
+                        stage, bound, cumulative_count))
+                lines.append('strategy_stage_seconds_bucket{{stage="{0}",le="+Inf"}} {1}'.format(stage,
+                                                                                               histogram.count))
+                lines.append('strategy_stage_seconds_sum{{stage="{0}"}} {1}'.format(stage, histogram.sum))
+                lines.append('strategy_stage_seconds_count{{stage="{0}"}} {1}'.format(stage, histogram.count))
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port: int, host: str = '127.0.0.1'):
+        """
+        Serve the histograms in the Prometheus text format at http://host:port/metrics on a daemon thread.
+        """
+        metrics_service: MetricsService = self
+
+        class MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body: bytes = metrics_service.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Scrapes would otherwise be written to stderr.
+                pass
+
+        class MetricsHttpServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+            daemon_threads = True
+
+        self.http_server = MetricsHttpServer((host, port), MetricsRequestHandler)
+        threading.Thread(target=self.http_server.serve_forever, name='metrics_http_server', daemon=True).start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.http_server is not None:
+            self.http_server.shutdown()
+            self.http_server.server_close()
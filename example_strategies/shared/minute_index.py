@@ -0,0 +1,43 @@
+import numpy
+import pandas
+
+
+class MinuteIndex:
+    """
+    Group offsets of a ticker DataFrame whose rows are sorted by minute.
+
+    Group i holds the rows in [offsets[i], offsets[i + 1]), so the tickers for a minute are a positional slice of the
+    DataFrame. Slicing is a view on the underlying arrays and costs the same no matter how large the file is, unlike
+    .loc lookups on a non-unique DatetimeIndex.
+    """
+
+    def __init__(self, minutes: pandas.DatetimeIndex, offsets: numpy.ndarray):
+        self.minutes: pandas.DatetimeIndex = minutes
+        self.offsets: numpy.ndarray = offsets
+
+    @staticmethod
+    def from_ticker_df(ticker_df: pandas.DataFrame) -> 'MinuteIndex':
+        index: pandas.DatetimeIndex = ticker_df.index
+        if not index.is_monotonic_increasing:
+            raise ValueError('ticker_df must be sorted by minute to build a MinuteIndex')
+
+        index_values: numpy.ndarray = index.asi8
+        if len(index_values) == 0:
+            return MinuteIndex(index[:0], numpy.zeros(1, dtype=numpy.int64))
+
+        group_starts: numpy.ndarray = numpy.concatenate(
+            ([0], numpy.flatnonzero(index_values[1:] != index_values[:-1]) + 1))
+        offsets: numpy.ndarray = numpy.append(group_starts, len(index_values)).astype(numpy.int64)
+        return MinuteIndex(index[group_starts], offsets)
+
+    def __len__(self) -> int:
+        return len(self.minutes)
+
+    def minute(self, position: int) -> pandas.Timestamp:
+        return self.minutes[position]
+
+    def rows(self, position: int) -> slice:
+        return slice(int(self.offsets[position]), int(self.offsets[position + 1]))
+
+    def tickers(self, ticker_df: pandas.DataFrame, position: int) -> pandas.DataFrame:
+        return ticker_df.iloc[self.rows(position)]
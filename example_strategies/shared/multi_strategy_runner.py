@@ -0,0 +1,193 @@
+import datetime
+import logging
+import os
+import random
+from typing import Dict, List, Optional, Set
+
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.ticker import Ticker
+from trading_platform.exchanges.exchange_service_abc import ExchangeServiceAbc
+from trading_platform.exchanges.order_execution_service import OrderExecutionService
+from trading_platform.utils.datetime_operations import datetime_now_with_utc_offset, strftime_minutes
+
+from example_strategies.shared.concurrent_order_executor import ConcurrentOrderExecutor
+from example_strategies.shared.exchange_state_refresher import ExchangeStateRefresher
+from example_strategies.shared.exchanges import instantiate_exchanges
+from example_strategies.shared.live_scheduler import LiveScheduler
+from example_strategies.shared.metrics_service import MetricsService
+from example_strategies.shared.persistence import Persistence
+from example_strategies.shared.profit_history_writer import ProfitHistoryWriter
+from example_strategies.shared.profit_tracker import ProfitTracker
+from example_strategies.shared.strategy_registry import properties_with_overrides, strategies
+from example_strategies.shared.strategy_runner import build_order_execution_service
+
+
+class MultiStrategyRunner:
+    """
+    Trades many (strategy, exchange, pair) configurations from one process.
+
+    The exchanges, the order execution service and the database engine are shared by all the strategies. Each exchange
+    has one ExchangeStateRefresher, so its balances and tickers are fetched once per step no matter how many strategies
+    trade on it, and the exchanges with a due step are fetched concurrently. If order_execution_workers is positive, the
+    strategies also share a ConcurrentOrderExecutor, so an order that is slow to fill doesn't delay the steps of the
+    other strategies.
+    """
+
+    def __init__(self, **kwargs):
+        self.logger: logging.Logger = kwargs.get('logger')
+        # Each config has a "strategy", a key of strategy_registry.strategies, and optionally "exchange_id", "base",
+        # "quote" and "properties", which override the values of the strategy's properties class.
+        self.strategy_configs: List[Dict] = kwargs.get('strategy_configs')
+        self.persistence: Persistence = kwargs.get('persistence')
+        self.profit_summary_dir: str = kwargs.get('profit_summary_dir')
+        # Longest sleep before the wall clock is checked again for steps that are due.
+        self.tick_sec: float = kwargs.get('tick_sec', 60)
+        # How many orders to execute concurrently. 0 executes each order in its strategy's step.
+        self.order_execution_workers: int = kwargs.get('order_execution_workers', 0)
+        # Times the phases of the steps of every strategy.
+        self.metrics_service: MetricsService = kwargs.get('metrics_service') or MetricsService()
+
+        self.exchanges_by_id: Dict[int, ExchangeServiceAbc] = {}
+        self.exchange_state_refreshers_by_id: Dict[int, ExchangeStateRefresher] = {}
+        self.strategy_runs: List[Dict] = []
+        self.concurrent_order_executor: Optional[ConcurrentOrderExecutor] = None
+
+    def initialize(self):
+        properties_by_config: List[Dict] = []
+        for strategy_config in self.strategy_configs:
+            overrides: Dict = dict(strategy_config.get('properties', {}))
+            for config_key, property_name in [('exchange_id', 'exchange_id_to_trade'), ('base', 'base_currency'),
+                                              ('quote', 'quote_currency')]:
+                if config_key in strategy_config:
+                    overrides[property_name] = strategy_config[config_key]
+            properties_by_config.append(properties_with_overrides(
+                strategies[strategy_config['strategy']]['properties_class'], overrides))
+
+        # Only the exchanges that are traded are connected to.
+        self.exchanges_by_id = instantiate_exchanges([properties['exchange_id_to_trade']
+                                                      for properties in properties_by_config], live=True)
+        order_execution_service: OrderExecutionService = build_order_execution_service(
+            self.logger, self.exchanges_by_id, self.persistence)
+        if self.order_execution_workers > 0:
+            self.concurrent_order_executor = ConcurrentOrderExecutor(**{
+                'logger': self.logger,
+                'order_execution_service': order_execution_service,
+                'scoped_session_maker': self.persistence.scoped_session_maker,
+                'max_workers': self.order_execution_workers,
+                'stage_timer': self.metrics_service
+            })
+
+        for strategy_config, properties in zip(self.strategy_configs, properties_by_config):
+            strategy: Dict = strategies[strategy_config['strategy']]
+            exchange_id: int = properties['exchange_id_to_trade']
+            if exchange_id not in self.exchange_state_refreshers_by_id:
+                self.exchange_state_refreshers_by_id[exchange_id] = ExchangeStateRefresher(**{
+                    'logger': self.logger,
+                    'exchange': self.exchanges_by_id[exchange_id],
+                    'refresh_freq_sec': properties['state_refresh_freq_sec'],
+                    'max_staleness_sec': properties['max_state_staleness_sec'],
+                    'stage_timer': self.metrics_service
+                })
+
+            pair: Pair = Pair(base=properties['base_currency'], quote=properties['quote_currency'])
+            exchange_pairs: List[Pair] = self.exchange_state_refreshers_by_id[exchange_id].pairs
+            if pair.name not in [exchange_pair.name for exchange_pair in exchange_pairs]:
+                exchange_pairs.append(pair)
+            built_strategy: Dict = strategy['build'](properties, **{
+                'logger': self.logger,
+                'order_execution_service': order_execution_service,
+                'strategy_execution_dao': self.persistence.strategy_execution_dao,
+                'scoped_session_maker': self.persistence.scoped_session_maker,
+                'exchange_state_refresher': self.exchange_state_refreshers_by_id[exchange_id],
+                'concurrent_order_executor': self.concurrent_order_executor,
+                'stage_timer': self.metrics_service,
+                'pair': pair
+            })
+            # Example: cycle_strategy_btc_usd_exchange_1_6172
+            # Include a random int in case a strategy with the same properties is run multiple times.
+            strategy_id: str = '{0}_{1}_exchange_{2}_{3}'.format(strategy['strategy_base_id'], pair.name, exchange_id,
+                                                                random.randint(0, 100000))
+            built_strategy['strategy_executer_service'].initialize(strategy_id)
+            self.logger.info('initialized {0}'.format(strategy_id))
+            self.strategy_runs.append(dict(built_strategy, exchange_id=exchange_id, strategy_id=strategy_id))
+
+    def run(self):
+        self.initialize()
+
+        traded_exchange_ids: Set[int] = set(self.exchange_state_refreshers_by_id.keys())
+        # By exchange id and valuation currency.
+        profit_trackers_by_exchange_id: Dict[int, Dict[str, ProfitTracker]] = {}
+        profit_history_writers_by_exchange_id: Dict[int, Dict[str, ProfitHistoryWriter]] = {}
+        run_timestamp: str = datetime_now_with_utc_offset().strftime(strftime_minutes)
+        ExchangeStateRefresher.refresh_all(list(self.exchange_state_refreshers_by_id.values()))
+        for exchange_id in traded_exchange_ids:
+            exchange: ExchangeServiceAbc = self.exchanges_by_id[exchange_id]
+            # Only the traded pairs are valued, so the other tickers of the exchange aren't kept.
+            initial_tickers: Dict[str, Ticker] = self.exchange_state_refreshers_by_id[exchange_id].tickers()
+            exchange_pairs: List[Pair] = self.exchange_state_refreshers_by_id[exchange_id].pairs
+            if not initial_tickers:
+                self.logger.warning('no tickers for exchange {0} yet, so profit is measured against the portfolio '
+                                    'value at the first step'.format(exchange_id))
+            # Strategies that trade on the same exchange share its balances, so profit is tracked per exchange. A
+            # ProfitTracker only prices currencies quoted directly against its valuation currency, so each base
+            # currency traded on the exchange has its own, which values the pairs of that base.
+            profit_trackers_by_exchange_id[exchange_id] = {}
+            profit_history_writers_by_exchange_id[exchange_id] = {}
+            for exchange_pair in exchange_pairs:
+                valuation_currency: str = exchange_pair.base
+                if valuation_currency in profit_trackers_by_exchange_id[exchange_id]:
+                    continue
+                profit_tracker: ProfitTracker = ProfitTracker(**{
+                    'valuation_currency': valuation_currency,
+                    'pairs': [pair for pair in exchange_pairs if pair.base == valuation_currency]
+                })
+                if initial_tickers:
+                    profit_tracker.initialize(list(initial_tickers.values())[0].app_create_timestamp, exchange,
+                                              initial_tickers)
+                profit_trackers_by_exchange_id[exchange_id][valuation_currency] = profit_tracker
+                profit_history_writers_by_exchange_id[exchange_id][valuation_currency] = ProfitHistoryWriter(
+                    os.path.join(self.profit_summary_dir, 'multi_strategy_exchange_{0}_{1}_{2}.csv'.format(
+                        exchange_id, valuation_currency, run_timestamp)))
+
+        live_schedulers: List[LiveScheduler] = [LiveScheduler(**{
+            'step_schedule': strategy_run['live_step_schedule'],
+            'max_sleep_sec': self.tick_sec
+        }) for strategy_run in self.strategy_runs]
+        while True:
+            LiveScheduler.sleep_until(min(live_scheduler.next_step_ns for live_scheduler in live_schedulers), None,
+                                      self.tick_sec)
+            now: datetime.datetime = datetime_now_with_utc_offset()
+            now_ns: int = int(now.timestamp() * 10 ** 9)
+
+            due_strategy_runs: List[Dict] = []
+            for strategy_run, live_scheduler in zip(self.strategy_runs, live_schedulers):
+                if live_scheduler.next_step_ns <= now_ns:
+                    due_strategy_runs.append(strategy_run)
+                    live_scheduler.advance(now_ns)
+
+            # Fetch the state of each exchange with a due step once, for all of its strategies.
+            stepped_exchange_ids: Set[int] = {strategy_run['exchange_id'] for strategy_run in due_strategy_runs}
+            ExchangeStateRefresher.refresh_all([self.exchange_state_refreshers_by_id[exchange_id]
+                                                for exchange_id in stepped_exchange_ids])
+
+            for strategy_run in due_strategy_runs:
+                try:
+                    with self.metrics_service.time('step'):
+                        strategy_run['strategy_executer_service'].step(**{
+                            'exchange': self.exchanges_by_id[strategy_run['exchange_id']],
+                            'now_datetime': now,
+                            'check_if_order_filled': True
+                        })
+                except Exception:
+                    self.logger.exception('step of {0} failed'.format(strategy_run['strategy_id']))
+
+            for exchange_id in stepped_exchange_ids:
+                with self.metrics_service.time('profit_summary'):
+                    tickers: Dict[str, Ticker] = self.exchange_state_refreshers_by_id[exchange_id].tickers()
+                    profit_history_writers: Dict[str, ProfitHistoryWriter] = \
+                        profit_history_writers_by_exchange_id[exchange_id]
+                    for valuation_currency, profit_tracker in profit_trackers_by_exchange_id[exchange_id].items():
+                        profit_history_writer: ProfitHistoryWriter = profit_history_writers[valuation_currency]
+                        profit_history_writer.append(profit_tracker.update(now, self.exchanges_by_id[exchange_id],
+                                                                           tickers))
+                        profit_history_writer.checkpoint()
@@ -0,0 +1,469 @@
+import concurrent.futures
+import itertools
+import logging
+import multiprocessing
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy
+import pandas
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.exchange_service_abc import ExchangeServiceAbc
+
+from example_strategies.shared.backtest_result_cache import BacktestResultCache
+from example_strategies.shared.backtest_service import BacktestService
+from example_strategies.shared.persistence import Persistence, PersistenceMode
+from example_strategies.shared.strategy_registry import properties_with_overrides, strategies
+from example_strategies.shared.strategy_runner import build_backtest_service
+from example_strategies.shared.sweep_queue import ShardStatus, SweepQueue, SweepWorker
+from example_strategies.shared.ticker_cache_service import TickerCacheService
+from example_strategies.shared.ticker_rollup import TickerResolution
+from example_strategies.shared.vectorized_backtest import VectorizedBacktest
+
+# Persistence created once per worker process, by PersistenceMode, and VectorizedBacktests with their tickers loaded,
+# reused by every parameter set the worker runs.
+_worker_context: Dict[Any, Any] = {}
+# The columns of the results table besides the parameters, which every successful backtest has.
+result_columns: List[str] = ['strategy_id', 'final_base_balance', 'final_quote_balance']
+
+
+def parameter_grid(values_by_parameter: Dict[str, List]) -> List[Dict]:
+    """
+    Returns:
+        One parameter set per combination of the given values.
+    """
+    parameter_names: List[str] = list(values_by_parameter.keys())
+    return [dict(zip(parameter_names, values))
+            for values in itertools.product(*[values_by_parameter[name] for name in parameter_names])]
+
+
+def cycle_window_grid(window_length_hours: int) -> List[Dict]:
+    """
+    Returns:
+        Every combination of buy and sell windows of the given length. CycleStrategyExecuterService doesn't support
+        windows that wrap around midnight, so windows end at hour 24 at the latest.
+    """
+    window_starts: List[int] = list(range(0, 24 - window_length_hours + 1))
+    return [{
+        'buy_window_utc_hour_start': buy_start,
+        'buy_window_utc_hour_end': buy_start + window_length_hours,
+        'sell_window_utc_hour_start': sell_start,
+        'sell_window_utc_hour_end': sell_start + window_length_hours
+    } for buy_start in window_starts for sell_start in window_starts]
+
+
+def combine_grids(*grids: List[Dict]) -> List[Dict]:
+    combined_grid: List[Dict] = [{}]
+    for grid in grids:
+        combined_grid = [dict(parameter_set, **other_parameter_set)
+                         for parameter_set in combined_grid for other_parameter_set in grid]
+    return combined_grid
+
+
+def time_range_shards(ticker_dir: str, time_shards: int) -> List[Optional[List[str]]]:
+    """
+    Returns:
+        The ticker files of each of time_shards consecutive time ranges of about the same number of files, or [None],
+        which stands for every file, if time_shards is 1. Each time range is backtested from the initial capital.
+    """
+    if time_shards <= 1:
+        return [None]
+    ticker_filenames: List[str] = sorted(os.listdir(ticker_dir))
+    return [list(shard_filenames) for shard_filenames in numpy.array_split(ticker_filenames, time_shards)
+            if len(shard_filenames) > 0]
+
+
+class BacktestEngine:
+    # Steps a BacktestExchangeService through every scheduled minute.
+    event_driven: str = 'event_driven'
+    # Computes the balances with array operations, see VectorizedBacktest.
+    vectorized: str = 'vectorized'
+
+    all: List[str] = [event_driven, vectorized]
+
+
+def run_parameter_set(task: Dict) -> Dict:
+    """
+    Run one backtest in a worker process, with the engine of the task. If the task's cross_check is set, a vectorized
+    backtest is also run event-driven and the event-driven final balances are added to its result. The result of a
+    task with ticker_filenames also has its time range.
+    """
+    if task.get('engine', BacktestEngine.event_driven) == BacktestEngine.event_driven:
+        result: Dict = run_event_driven_parameter_set(task)
+    else:
+        result: Dict = run_vectorized_parameter_set(task)
+        if task.get('cross_check'):
+            event_driven_result: Dict = run_event_driven_parameter_set(task)
+            for name in ['final_base_balance', 'final_quote_balance']:
+                result['event_driven_{0}'.format(name)] = event_driven_result[name]
+
+    if task.get('ticker_filenames') is not None:
+        result['first_ticker_filename'] = task['ticker_filenames'][0]
+        result['last_ticker_filename'] = task['ticker_filenames'][-1]
+    return result
+
+
+def run_vectorized_parameter_set(task: Dict) -> Dict:
+    """
+    Run one vectorized backtest in a worker process. The tickers of the traded pair are loaded once per worker and
+    reused by every parameter set the worker runs.
+
+    Returns:
+        The parameters, the final balances of the traded pair, the order counts and the final portfolio value.
+    """
+    strategy: Dict = strategies[task['strategy_name']]
+    properties: Dict = properties_with_overrides(strategy['properties_class'], task['parameters'])
+    pair: Pair = Pair(base=properties['base_currency'], quote=properties['quote_currency'])
+
+    ticker_filenames: Optional[List[str]] = task.get('ticker_filenames')
+    context_key: Tuple = (BacktestEngine.vectorized, task['ticker_dir'], task['ticker_cache_dir'],
+                          tuple(ticker_filenames) if ticker_filenames is not None else None,
+                          properties['exchange_id_to_trade'], pair.name)
+    if context_key not in _worker_context:
+        vectorized_backtest: VectorizedBacktest = VectorizedBacktest(**{
+            'logger': logging.getLogger(__name__),
+            'ticker_dir': task['ticker_dir'],
+            'ticker_cache_dir': task['ticker_cache_dir'],
+            'ticker_filenames': ticker_filenames,
+            'exchange_id': properties['exchange_id_to_trade'],
+            'pair': pair
+        })
+        vectorized_backtest.load()
+        _worker_context[context_key] = vectorized_backtest
+    vectorized_backtest: VectorizedBacktest = _worker_context[context_key]
+
+    # Only the step schedule of the built strategy is used.
+    built_strategy: Dict = strategy['build'](properties, pair=pair)
+    backtest_result: Dict = vectorized_backtest.run(**{
+        'step_schedule': built_strategy['step_schedule'],
+        'order_sides': lambda hours: strategy['vectorized_order_sides'](properties, hours),
+        'balance_percent_per_trade': properties['balance_percent_per_trade'],
+        'order_padding_percent': properties['order_padding_percent'],
+        'initial_base_capital': properties['initial_base_capital']
+    })
+
+    result: Dict = dict(task['parameters'])
+    result['strategy_id'] = task['strategy_id']
+    for name in ['final_base_balance', 'final_quote_balance', 'buy_order_count', 'sell_order_count']:
+        result[name] = backtest_result[name]
+    portfolio_values: numpy.ndarray = backtest_result['portfolio_values']
+    result['final_portfolio_value'] = float(portfolio_values[-1]) if len(portfolio_values) else float(
+        properties['initial_base_capital'])
+    return result
+
+
+def run_event_driven_parameter_set(task: Dict) -> Dict:
+    """
+    Run one event-driven backtest in a worker process.
+
+    Args:
+        task: Dict
+            strategy_name: str
+            strategy_id: str
+            parameters: Dict
+            ticker_dir: str
+            ticker_cache_dir: str
+            ticker_filenames: Optional[List[str]], the time range to backtest, every ticker file if None
+            profit_summary_dir: str
+            persistence_mode: str
+            resume: bool
+            max_ticker_resolution: str, the coarsest TickerResolution to read
+            result_cache_dir: Optional[str]
+            result_cache_max_size_bytes: int
+
+    Returns:
+        The parameters, the final balances of the traded pair, and the last row of the profit history.
+    """
+    result_cache: Optional[BacktestResultCache] = BacktestResultCache(**{
+        'cache_dir': task['result_cache_dir'],
+        'max_size_bytes': task['result_cache_max_size_bytes']
+    }) if task.get('result_cache_dir') is not None else None
+    if result_cache is not None:
+        properties: Dict = properties_with_overrides(strategies[task['strategy_name']]['properties_class'],
+                                                     task['parameters'])
+        # Backtests of different time ranges of the same files differ.
+        result_cache_options: Dict = {
+            'max_ticker_resolution': task.get('max_ticker_resolution', TickerResolution.minute)
+        }
+        if task.get('ticker_filenames') is not None:
+            result_cache_options['ticker_filenames'] = task['ticker_filenames']
+        result_cache_key: str = result_cache.key(task['strategy_name'], properties, task['ticker_dir'],
+                                                 result_cache_options)
+        cached_result: Optional[Dict] = result_cache.get(result_cache_key)
+        if cached_result is not None:
+            return dict(cached_result, strategy_id=task['strategy_id'])
+
+    persistence_mode: str = task['persistence_mode']
+    if persistence_mode == PersistenceMode.in_memory:
+        # In-memory daos would otherwise accumulate the orders of every parameter set the worker runs.
+        persistence: Persistence = Persistence(persistence_mode)
+    else:
+        if persistence_mode not in _worker_context:
+            _worker_context[persistence_mode] = Persistence(persistence_mode)
+        persistence: Persistence = _worker_context[persistence_mode]
+
+    profit_summary_filepath: str = os.path.join(task['profit_summary_dir'], '{0}.csv'.format(task['strategy_id']))
+    backtest_service: BacktestService = build_backtest_service(**{
+        'logger': logging.getLogger(__name__),
+        'strategy_name': task['strategy_name'],
+        'strategy_id': task['strategy_id'],
+        'parameters': task['parameters'],
+        'ticker_dir': task['ticker_dir'],
+        'ticker_cache_dir': task['ticker_cache_dir'],
+        'ticker_filenames': task.get('ticker_filenames'),
+        'profit_summary_filepath': profit_summary_filepath,
+        'persistence': persistence,
+        'resume': task.get('resume', False),
+        'max_ticker_resolution': task.get('max_ticker_resolution', TickerResolution.minute)
+    })
+    backtest_service.run()
+
+    exchange: ExchangeServiceAbc = backtest_service.exchange
+    pair: Pair = backtest_service.strategy_executer_service.pair
+    result: Dict = dict(task['parameters'])
+    result['strategy_id'] = task['strategy_id']
+    result['final_base_balance'] = float(exchange.get_balance(pair.base).free)
+    result['final_quote_balance'] = float(exchange.get_balance(pair.quote).free)
+    if os.path.isfile(profit_summary_filepath):
+        last_profit_summary: Dict = pandas.read_csv(profit_summary_filepath).iloc[-1].to_dict()
+        for name, value in last_profit_summary.items():
+            result['profit_summary_{0}'.format(name)] = value
+    if result_cache is not None:
+        result_cache.put(result_cache_key, result, profit_summary_filepath)
+    return result
+
+
+def run_sweep_worker(**kwargs):
+    """
+    Claim and run shards of a SweepQueue, in a local worker process of ParameterSweepService.run_distributed or on
+    another node from run_sweep_worker.py.
+
+    Args:
+     kwargs: Dict
+        logger: logging.Logger, optional
+        queue_url: str, the SQLAlchemy database URL of the SweepQueue
+        sweep_id: str, optional, the sweep to run shards of. Any sweep's if None
+        exit_when_finished: bool, whether to return once every shard is finished, rather than wait for more sweeps
+        heartbeat_timeout_sec: float, optional
+        max_attempts: int, optional
+    """
+    sweep_worker: SweepWorker = SweepWorker(**{
+        'logger': kwargs.get('logger') or logging.getLogger(__name__),
+        'sweep_queue': SweepQueue(**{
+            'database_url': kwargs.get('queue_url'),
+            'heartbeat_timeout_sec': kwargs.get('heartbeat_timeout_sec', 120),
+            'max_attempts': kwargs.get('max_attempts', 3)
+        }),
+        'run_task': run_parameter_set,
+        'sweep_id': kwargs.get('sweep_id'),
+        'exit_when_finished': kwargs.get('exit_when_finished', False)
+    })
+    sweep_worker.run()
+    sweep_worker.logger.info('{0} ran {1} shards'.format(sweep_worker.worker_id, sweep_worker.shard_count))
+
+
+class ParameterSweepService:
+    """
+    Runs a backtest for every parameter set of a grid across a pool of worker processes.
+
+    The ticker directory is ingested into the binary ticker cache once before the workers start. Workers memory-map the
+    same cache files, so the ticker data is read from disk once and shared read-only through the page cache.
+
+    run_distributed instead puts the backtests on a SweepQueue in a database, from which workers on this and other
+    nodes claim them. Workers on other nodes need the ticker directory at the same path.
+    """
+
+    def __init__(self, **kwargs):
+        self.logger: logging.Logger = kwargs.get('logger')
+        self.max_workers: int = kwargs.get('max_workers') or os.cpu_count()
+
+    def run(self, **kwargs) -> pandas.DataFrame:
+        """
+        Args:
+         kwargs: Dict
+            strategy_name: str, a key of strategies
+            parameter_sets: List[Dict], property values that override the strategy's properties class
+            sweep_id: str, used to name the strategy executions of the sweep
+            ticker_dir: str
+            ticker_cache_dir: str
+            time_shards: int, optional, the number of time ranges the ticker files are split into, each of which is
+                backtested separately for every parameter set. 1 by default
+            profit_summary_dir: str
+            persistence_mode: str, a PersistenceMode
+            engine: str, a BacktestEngine
+            cross_check: bool, whether to also run vectorized backtests event-driven
+            resume: bool, whether event-driven backtests continue from the checkpoints of an earlier run of the sweep
+            max_ticker_resolution: str, optional, the coarsest TickerResolution event-driven backtests may read, see
+                build_backtest_service. Day by default
+            result_cache_dir: str, optional, where event-driven backtests look up and cache their results
+            result_cache_max_size_bytes: int, optional
+            results_filepath: str, where to write the consolidated results table
+
+        Returns:
+            One row per parameter set and time range.
+        """
+        tasks: List[Dict] = self.tasks(**kwargs)
+
+        results: List[Dict] = []
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            future_to_task: Dict[concurrent.futures.Future, Dict] = {
+                executor.submit(run_parameter_set, task): task for task in tasks}
+            for future in concurrent.futures.as_completed(future_to_task):
+                task: Dict = future_to_task[future]
+                try:
+                    results.append(future.result())
+                except Exception as exception:
+                    self.logger.exception('backtest {0} failed'.format(task['strategy_id']))
+                    results.append(dict(task['parameters'], strategy_id=task['strategy_id'], error=repr(exception)))
+                self.logger.info('{0} of {1} backtests complete'.format(len(results), len(tasks)))
+
+        return self.results_df(results, kwargs.get('results_filepath'), kwargs.get('parameter_sets'))
+
+    def run_distributed(self, **kwargs) -> pandas.DataFrame:
+        """
+        Put every task of the sweep on a SweepQueue as a shard, and wait until workers have run them all. local_workers
+        worker processes are started on this node, and workers on other nodes join with run_sweep_worker.py. A local
+        worker that dies is restarted, and the shard it was running is claimed again once its heartbeats time out.
+
+        A sweep whose sweep_id is already on the queue is resumed: its shards aren't added again, and only those that
+        aren't finished are run.
+
+        Args:
+         kwargs: Dict
+            those of run, and
+            queue_url: str, the SQLAlchemy database URL of the SweepQueue
+            local_workers: int, optional, defaults to max_workers
+            heartbeat_timeout_sec: float, optional
+            max_attempts: int, optional
+            poll_sec: float, optional, how often the progress of the sweep is checked
+
+        Returns:
+            One row per parameter set and time range.
+        """
+        sweep_id: str = kwargs.get('sweep_id')
+        queue_kwargs: Dict = {
+            'queue_url': kwargs.get('queue_url'),
+            'heartbeat_timeout_sec': kwargs.get('heartbeat_timeout_sec', 120),
+            'max_attempts': kwargs.get('max_attempts', 3)
+        }
+        sweep_queue: SweepQueue = SweepQueue(**{
+            'database_url': queue_kwargs['queue_url'],
+            'heartbeat_timeout_sec': queue_kwargs['heartbeat_timeout_sec'],
+            'max_attempts': queue_kwargs['max_attempts']
+        })
+        tasks: List[Dict] = self.tasks(**kwargs)
+        if sweep_queue.add_shards(sweep_id, tasks):
+            self.logger.info('queued {0} shards of sweep {1}'.format(len(tasks), sweep_id))
+        else:
+            self.logger.info('resuming sweep {0}, {1}'.format(sweep_id, sweep_queue.status_counts(sweep_id)))
+        # Forked workers open their own connections rather than share those of this process.
+        sweep_queue.engine.dispose()
+
+        worker_kwargs: Dict = dict(queue_kwargs, sweep_id=sweep_id, exit_when_finished=True)
+        local_workers: int = kwargs.get('local_workers') if kwargs.get('local_workers') is not None else \
+            self.max_workers
+        processes: List[multiprocessing.Process] = [self.start_worker(worker_kwargs) for _ in range(local_workers)]
+        while not sweep_queue.is_finished(sweep_id):
+            time.sleep(kwargs.get('poll_sec', 10))
+            sweep_queue.expire()
+            for process_index, process in enumerate(processes):
+                if process.exitcode is not None and process.exitcode != 0:
+                    self.logger.warning('worker process {0} exited with {1}, restarting it'.format(
+                        process.pid, process.exitcode))
+                    processes[process_index] = self.start_worker(worker_kwargs)
+            status_counts: Dict[str, int] = sweep_queue.status_counts(sweep_id)
+            self.logger.info('{0} of {1} shards finished, {2} running'.format(
+                sum(status_counts[status] for status in ShardStatus.finished), sum(status_counts.values()),
+                status_counts[ShardStatus.running]))
+        for process in processes:
+            process.join()
+
+        return self.results_df(sweep_queue.results(sweep_id), kwargs.get('results_filepath'),
+                               kwargs.get('parameter_sets'))
+
+    @staticmethod
+    def start_worker(worker_kwargs: Dict) -> multiprocessing.Process:
+        process: multiprocessing.Process = multiprocessing.Process(target=run_sweep_worker, kwargs=worker_kwargs,
+                                                                   name='sweep_worker')
+        process.start()
+        return process
+
+    def tasks(self, **kwargs) -> List[Dict]:
+        """
+        Ingest the ticker directory into the ticker cache, and build the task of every parameter set and time range.
+
+        Args:
+         kwargs: Dict
+            those of run
+        """
+        strategy_name: str = kwargs.get('strategy_name')
+        parameter_sets: List[Dict] = kwargs.get('parameter_sets')
+        ticker_cache_dir: str = kwargs.get('ticker_cache_dir')
+
+        ingested_filenames: List[str] = TickerCacheService.ingest(kwargs.get('ticker_dir'), ticker_cache_dir)
+        self.logger.info('ingested {0} ticker files into {1}'.format(len(ingested_filenames), ticker_cache_dir))
+
+        shard_filenames: List[Optional[List[str]]] = time_range_shards(kwargs.get('ticker_dir'),
+                                                                       kwargs.get('time_shards', 1))
+        # The indexes are zero-padded so that sorting the results by strategy_id sorts them by index.
+        parameter_set_index_width: int = len(str(max(len(parameter_sets) - 1, 0)))
+        time_shard_width: int = len(str(max(len(shard_filenames) - 1, 0)))
+        tasks: List[Dict] = []
+        for parameter_set_index, parameter_set in enumerate(parameter_sets):
+            # A parameter set may override the traded pair.
+            properties: Dict = properties_with_overrides(strategies[strategy_name]['properties_class'], parameter_set)
+            pair: Pair = Pair(base=properties['base_currency'], quote=properties['quote_currency'])
+            for time_shard, ticker_filenames in enumerate(shard_filenames):
+                # Example: cycle_strategy_btc_usd_sweep_201806011200_017 of 100 parameter sets, or with time shards
+                # cycle_strategy_btc_usd_sweep_201806011200_017_time_02
+                strategy_id: str = '{0}_{1}_sweep_{2}_{3:0{4}d}'.format(
+                    strategies[strategy_name]['strategy_base_id'], pair.name, kwargs.get('sweep_id'),
+                    parameter_set_index, parameter_set_index_width)
+                if ticker_filenames is not None:
+                    strategy_id = '{0}_time_{1:0{2}d}'.format(strategy_id, time_shard, time_shard_width)
+                tasks.append({
+                    'strategy_name': strategy_name,
+                    'strategy_id': strategy_id,
+                    'parameters': parameter_set,
+                    'ticker_dir': kwargs.get('ticker_dir'),
+                    'ticker_cache_dir': ticker_cache_dir,
+                    'ticker_filenames': ticker_filenames,
+                    'profit_summary_dir': kwargs.get('profit_summary_dir'),
+                    'persistence_mode': kwargs.get('persistence_mode', PersistenceMode.database),
+                    'engine': kwargs.get('engine', BacktestEngine.event_driven),
+                    'cross_check': kwargs.get('cross_check', False),
+                    'resume': kwargs.get('resume', False),
+                    'max_ticker_resolution': kwargs.get('max_ticker_resolution', TickerResolution.day),
+                    'result_cache_dir': kwargs.get('result_cache_dir'),
+                    'result_cache_max_size_bytes': kwargs.get('result_cache_max_size_bytes', 1024 ** 3)
+                })
+        return tasks
+
+    def results_df(self, results: List[Dict], results_filepath: Optional[str] = None,
+                   parameter_sets: Optional[List[Dict]] = None) -> pandas.DataFrame:
+        """
+        Consolidate the results of a sweep into one table, and write it to results_filepath if given.
+
+        Args:
+            parameter_sets: the parameter sets of the sweep, whose names are the leading columns of an empty table
+        """
+        if not results:
+            self.logger.warning('the sweep has no results')
+            parameter_names: List[str] = []
+            for parameter_set in parameter_sets or []:
+                parameter_names.extend(name for name in parameter_set if name not in parameter_names)
+            results_df: pandas.DataFrame = pandas.DataFrame(columns=parameter_names + result_columns)
+        else:
+            results_df: pandas.DataFrame = pandas.DataFrame(results).sort_values('strategy_id')
+        if 'event_driven_final_base_balance' in results_df.columns:
+            mismatches: pandas.Series = ~(
+                numpy.isclose(results_df['final_base_balance'], results_df['event_driven_final_base_balance'],
+                              rtol=1e-6) &
+                numpy.isclose(results_df['final_quote_balance'], results_df['event_driven_final_quote_balance'],
+                              rtol=1e-6))
+            self.logger.info('{0} of {1} vectorized backtests differ from the event-driven ones'.format(
+                int(mismatches.sum()), len(results_df)))
+        if results_filepath is not None:
+            results_df.to_csv(results_filepath, index=False)
+        return results_df
@@ -0,0 +1,169 @@
+import itertools
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class PersistenceMode:
+    # Every write goes to the database and is committed immediately.
+    database: str = 'database'
+    # Writes are buffered in memory and written to the database in one transaction per flush.
+    buffered: str = 'buffered'
+    # Nothing is written to a database. For backtests only.
+    in_memory: str = 'in_memory'
+
+    all = [database, buffered, in_memory]
+
+
+class BufferedDao:
+    """
+    Wraps a dao and defers its writes until flush(). Reads are passed through to the wrapped dao.
+
+    Only the latest update of each row is kept, so a backtest that updates the strategy state on every simulated trade
+    writes it once per flush.
+    """
+
+    def __init__(self, dao, buffer_saves: bool = True):
+        self.dao = dao
+        # If False, saves are written immediately, for popos whose generated id is needed by the caller.
+        self.buffer_saves: bool = buffer_saves
+        self.pending_saves: List[Any] = []
+        self.pending_updates: Dict[Tuple[str, Any], Dict] = {}
+
+    def __getattr__(self, name: str):
+        return getattr(self.dao, name)
+
+    def save(self, session, popo, commit: bool = False, **kwargs):
+        if not self.buffer_saves:
+            return self.dao.save(session, popo=popo, commit=commit, **kwargs)
+        self.pending_saves.append(popo)
+        return popo
+
+    def update_fetch_by_column(self, session, column_name: str, column_value, update_dict: Dict, commit: bool = False,
+                               **kwargs):
+        self.pending_updates.setdefault((column_name, column_value), {}).update(update_dict)
+
+    def flush(self, session):
+        """
+        Write the buffered saves and updates in one transaction.
+        """
+        if not self.pending_saves and not self.pending_updates:
+            return
+        for popo in self.pending_saves:
+            self.dao.save(session, popo=popo, commit=False)
+        for (column_name, column_value), update_dict in self.pending_updates.items():
+            self.dao.update_fetch_by_column(session=session, column_name=column_name, column_value=column_value,
+                                            update_dict=update_dict, commit=False)
+        session.commit()
+        self.pending_saves = []
+        self.pending_updates = {}
+
+
+class InMemoryDao:
+    """
+    Stand-in for a dao that keeps popos in memory, for backtests that run without a database.
+    """
+
+    def __init__(self, id_column_name: str):
+        self.id_column_name: str = id_column_name
+        self.popos_by_id: Dict[int, Any] = {}
+        self.ids: Iterator[int] = itertools.count(1)
+
+    def save(self, session, popo, commit: bool = False, **kwargs):
+        if getattr(popo, self.id_column_name, None) is None:
+            setattr(popo, self.id_column_name, next(self.ids))
+        self.popos_by_id[getattr(popo, self.id_column_name)] = popo
+        return popo
+
+    def fetch_by_column(self, session, column_name: str, column_value, **kwargs) -> Optional[Any]:
+        for popo in self.popos_by_id.values():
+            if getattr(popo, column_name, None) == column_value:
+                return popo
+        return None
+
+    def update_fetch_by_column(self, session, column_name: str, column_value, update_dict: Dict, commit: bool = False,
+                               **kwargs) -> Optional[Any]:
+        popo = self.fetch_by_column(session, column_name, column_value)
+        if popo is not None:
+            for key, value in update_dict.items():
+                setattr(popo, key, value)
+        return popo
+
+    def flush(self, session):
+        pass
+
+
+class InMemorySession:
+    """
+    Session that accepts and discards everything, for use with InMemoryDao.
+    """
+
+    def add(self, instance):
+        pass
+
+    def flush(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class InMemorySessionMaker:
+    """
+    Stand-in for a scoped_session maker that always returns the same InMemorySession.
+    """
+
+    def __init__(self):
+        self.session: InMemorySession = InMemorySession()
+
+    def __call__(self) -> InMemorySession:
+        return self.session
+
+    def remove(self):
+        pass
+
+
+class Persistence:
+    """
+    The session maker and daos used by a strategy run, for the given PersistenceMode.
+    """
+
+    def __init__(self, mode: str = PersistenceMode.database, update_tables: bool = False):
+        if mode not in PersistenceMode.all:
+            raise ValueError('unknown persistence mode {0}'.format(mode))
+        self.mode: str = mode
+
+        if mode == PersistenceMode.in_memory:
+            self.engine = None
+            self.scoped_session_maker = InMemorySessionMaker()
+            self.order_dao = InMemoryDao('order_id')
+            self.strategy_execution_dao = InMemoryDao('strategy_execution_id')
+        else:
+            # Only imported when a database is used, see make_engine.
+            from trading_platform.storage.daos.order_dao import OrderDao
+            from trading_platform.storage.daos.strategy_execution_dao import StrategyExecutionDao
+
+            from example_strategies.shared.database import make_engine
+
+            self.engine = make_engine(update_tables)
+            self.scoped_session_maker = self.engine.scoped_session_maker
+            if mode == PersistenceMode.buffered:
+                self.order_dao = BufferedDao(OrderDao())
+                # The strategy execution is saved once at initialization and its generated id is used for updates.
+                self.strategy_execution_dao = BufferedDao(StrategyExecutionDao(), buffer_saves=False)
+            else:
+                self.order_dao = OrderDao()
+                self.strategy_execution_dao = StrategyExecutionDao()
+
+    def flush(self):
+        """
+        Write any buffered orders and strategy state. A no-op unless the mode is PersistenceMode.buffered.
+        """
+        if self.mode == PersistenceMode.buffered:
+            session = self.scoped_session_maker()
+            self.order_dao.flush(session)
+            self.strategy_execution_dao.flush(session)
@@ -0,0 +1,77 @@
+import csv
+import os
+from typing import Any, Dict, List, Mapping, Optional
+
+
+class ProfitHistoryWriter:
+    """
+    Appends profit summaries to a CSV file.
+
+    ProfitService.save_profit_history rewrites the whole history on every call, so the cost of a checkpoint grows with
+    the length of the run. This writer only appends the rows added since the last checkpoint, and fsyncs them so that a
+    checkpointed row survives a crash.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath: str = filepath
+        self.pending_rows: List[Dict] = []
+        self.columns: Optional[List[str]] = self.read_columns(filepath)
+
+    @staticmethod
+    def read_columns(filepath: str) -> Optional[List[str]]:
+        if not os.path.isfile(filepath) or os.path.getsize(filepath) == 0:
+            return None
+        with open(filepath, newline='') as profit_history_file:
+            return next(csv.reader(profit_history_file))
+
+    @staticmethod
+    def as_row(profit_summary: Any) -> Dict:
+        if isinstance(profit_summary, Mapping):
+            return dict(profit_summary)
+        if hasattr(profit_summary, 'to_dict'):
+            return profit_summary.to_dict()
+        return dict(vars(profit_summary))
+
+    def append(self, profit_summary: Any):
+        """
+        Buffer a profit summary, as returned by ProfitTracker.update, until the next checkpoint.
+        """
+        self.pending_rows.append(self.as_row(profit_summary))
+
+    def checkpoint(self):
+        if not self.pending_rows:
+            return
+
+        write_header: bool = self.columns is None
+        if write_header:
+            self.columns = list(self.pending_rows[0].keys())
+
+        with open(self.filepath, 'a', newline='') as profit_history_file:
+            writer: csv.DictWriter = csv.DictWriter(profit_history_file, fieldnames=self.columns, extrasaction='ignore')
+            if write_header:
+                writer.writeheader()
+            writer.writerows(self.pending_rows)
+            profit_history_file.flush()
+            os.fsync(profit_history_file.fileno())
+
+        self.pending_rows = []
+
+    def size(self) -> int:
+        """
+        Returns:
+            The size in bytes of the checkpointed profit history.
+        """
+        return os.path.getsize(self.filepath) if os.path.isfile(self.filepath) else 0
+
+    def truncate(self, size: int):
+        """
+        Discard the rows written after the profit history was size bytes long, along with any pending rows.
+        """
+        self.pending_rows = []
+        if not os.path.isfile(self.filepath):
+            return
+        with open(self.filepath, 'r+b') as profit_history_file:
+            profit_history_file.truncate(size)
+            profit_history_file.flush()
+            os.fsync(profit_history_file.fileno())
+        self.columns = self.read_columns(self.filepath)
@@ -0,0 +1,184 @@
+import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.ticker import Ticker
+from trading_platform.exchanges.exchange_service_abc import ExchangeServiceAbc
+
+
+class ProfitTracker:
+    """
+    Values a portfolio step by step from the balances of the currencies it holds and the tickers of the traded pairs.
+
+    ProfitService.profit_summary recomputes the valuation of the whole portfolio at each step. This tracker only reads
+    the balances of the valuation currency and of the currencies of the traded pairs, and only revalues a currency
+    whose balance or price changed since the last step, so a step costs O(held currencies). The running profit,
+    drawdown and exposure of each step are appended to preallocated numpy arrays, from which the profit history can be
+    resampled to any interval after the run, see history.
+
+    A currency is priced in the valuation currency by the first traded pair that quotes it against the valuation
+    currency, at the bid if the valuation currency is the pair's base, as VectorizedBacktest values the quote balance,
+    and at 1 / ask if it is the pair's quote. Balances of currencies without such a pair, or without a ticker yet, are
+    valued at 0. Ratios are fractions, like the *_percent properties of the strategies.
+    """
+    # The state of the running aggregates, which BacktestCheckpoint saves to resume a run. The arrays aren't saved.
+    state_names: List[str] = ['initial_datetime', 'initial_value', 'peak_value', 'max_drawdown_percent']
+
+    def __init__(self, **kwargs):
+        self.valuation_currency: str = kwargs.get('valuation_currency')
+        pairs: List[Pair] = kwargs.get('pairs', [])
+        # Steps for which the arrays are allocated up front. They double in size whenever they are full.
+        capacity: int = kwargs.get('capacity', 1024)
+
+        # The pair that prices each held currency, and whether its price is 1 / ask rather than the bid.
+        self.price_sources: Dict[str, Optional[Tuple[str, bool]]] = {self.valuation_currency: None}
+        for pair in pairs:
+            if pair.base == self.valuation_currency:
+                self.price_sources.setdefault(pair.quote, (pair.name, False))
+            elif pair.quote == self.valuation_currency:
+                self.price_sources.setdefault(pair.base, (pair.name, True))
+            else:
+                self.price_sources.setdefault(pair.base, None)
+                self.price_sources.setdefault(pair.quote, None)
+        self.currencies: List[str] = list(self.price_sources.keys())
+
+        self.balances: Dict[str, float] = {currency: 0.0 for currency in self.currencies}
+        self.prices: Dict[str, float] = {currency: 0.0 for currency in self.currencies}
+        self.prices[self.valuation_currency] = 1.0
+        self.holding_values: Dict[str, float] = {currency: 0.0 for currency in self.currencies}
+        self.value: float = 0.0
+
+        self.initial_datetime: Optional[datetime.datetime] = kwargs.get('initial_datetime')
+        self.initial_value: Optional[float] = kwargs.get('initial_value')
+        self.peak_value: float = kwargs.get('peak_value', 0.0)
+        self.max_drawdown_percent: float = kwargs.get('max_drawdown_percent', 0.0)
+
+        self.size: int = 0
+        self.timestamps_ns: numpy.ndarray = numpy.empty(capacity, dtype=numpy.int64)
+        self.values: numpy.ndarray = numpy.empty(capacity)
+        self.profits: numpy.ndarray = numpy.empty(capacity)
+        self.drawdown_percents: numpy.ndarray = numpy.empty(capacity)
+        self.exposure_percents: numpy.ndarray = numpy.empty(capacity)
+
+    def state(self) -> Dict:
+        return {state_name: getattr(self, state_name) for state_name in self.state_names}
+
+    def price(self, currency: str, tickers: Dict[str, Ticker]) -> float:
+        price_source: Optional[Tuple[str, bool]] = self.price_sources[currency]
+        if price_source is None:
+            return self.prices[currency]
+        pair_name, is_inverse = price_source
+        ticker: Optional[Ticker] = tickers.get(pair_name)
+        if ticker is None:
+            return self.prices[currency]
+        price = ticker.ask if is_inverse else ticker.bid
+        if price is None or float(price) <= 0:
+            return self.prices[currency]
+        return 1 / float(price) if is_inverse else float(price)
+
+    def revalue(self, exchange: ExchangeServiceAbc, tickers: Dict[str, Ticker]):
+        for currency in self.currencies:
+            balance: float = float(exchange.get_balance(currency).free)
+            price: float = self.price(currency, tickers)
+            if balance == self.balances[currency] and price == self.prices[currency]:
+                continue
+            self.balances[currency] = balance
+            self.prices[currency] = price
+            holding_value: float = balance * price
+            self.value += holding_value - self.holding_values[currency]
+            self.holding_values[currency] = holding_value
+
+    def initialize(self, initial_datetime: datetime.datetime, exchange: ExchangeServiceAbc,
+                   tickers: Dict[str, Ticker]):
+        """
+        Value the portfolio before the first step, as the value profits are measured against. Otherwise the value at the
+        first update is.
+        """
+        self.revalue(exchange, tickers)
+        self.initial_datetime = initial_datetime
+        self.initial_value = self.value
+        self.peak_value = max(self.peak_value, self.value)
+
+    def update(self, now_datetime: datetime.datetime, exchange: ExchangeServiceAbc,
+               tickers: Dict[str, Ticker]) -> Dict:
+        """
+        Revalue the portfolio with the free balances of the held currencies on the exchange and the latest tickers, and
+        record the step.
+
+        Args:
+            tickers: the latest ticker of each traded pair, by pair name
+
+        Returns:
+            The profit summary of the step, as a row of the profit history.
+        """
+        self.revalue(exchange, tickers)
+        if self.initial_value is None:
+            self.initial_datetime = now_datetime
+            self.initial_value = self.value
+        self.peak_value = max(self.peak_value, self.value)
+        drawdown_percent: float = 1 - self.value / self.peak_value if self.peak_value > 0 else 0.0
+        self.max_drawdown_percent = max(self.max_drawdown_percent, drawdown_percent)
+        exposure_percent: float = 1 - self.holding_values[self.valuation_currency] / self.value \
+            if self.value > 0 else 0.0
+        profit: float = self.value - self.initial_value
+        self.record(now_datetime, profit, drawdown_percent, exposure_percent)
+
+        profit_summary: Dict = {
+            'datetime': now_datetime,
+            'portfolio_value': self.value,
+            'profit': profit,
+            'profit_percent': profit / self.initial_value if self.initial_value > 0 else 0.0,
+            'drawdown_percent': drawdown_percent,
+            'max_drawdown_percent': self.max_drawdown_percent,
+            'exposure_percent': exposure_percent
+        }
+        for currency in self.currencies:
+            profit_summary['{0}_balance'.format(currency)] = self.balances[currency]
+        return profit_summary
+
+    def record(self, now_datetime: datetime.datetime, profit: float, drawdown_percent: float,
+               exposure_percent: float):
+        if self.size == len(self.values):
+            for array_name in ['timestamps_ns', 'values', 'profits', 'drawdown_percents', 'exposure_percents']:
+                array: numpy.ndarray = getattr(self, array_name)
+                grown_array: numpy.ndarray = numpy.empty(2 * max(len(array), 1), dtype=array.dtype)
+                grown_array[:self.size] = array[:self.size]
+                setattr(self, array_name, grown_array)
+        self.timestamps_ns[self.size] = int(now_datetime.timestamp() * 10 ** 9)
+        self.values[self.size] = self.value
+        self.profits[self.size] = profit
+        self.drawdown_percents[self.size] = drawdown_percent
+        self.exposure_percents[self.size] = exposure_percent
+        self.size += 1
+
+    def history(self, interval_ns: Optional[int] = None) -> Dict[str, numpy.ndarray]:
+        """
+        Args:
+            interval_ns: the length of the bars to resample the steps to, e.g. TickerResolution.durations_ns['hour'],
+                or None for every step
+
+        Returns:
+            The UTC timestamps in nanoseconds of the steps tracked by this tracker, or of the start of each bar, and
+            the portfolio value, profit and exposure at the last step of each bar and the deepest drawdown within it.
+        """
+        timestamps_ns: numpy.ndarray = self.timestamps_ns[:self.size]
+        if interval_ns is None or self.size == 0:
+            return {
+                'timestamps_ns': timestamps_ns.copy(),
+                'portfolio_values': self.values[:self.size].copy(),
+                'profits': self.profits[:self.size].copy(),
+                'drawdown_percents': self.drawdown_percents[:self.size].copy(),
+                'exposure_percents': self.exposure_percents[:self.size].copy()
+            }
+
+        bar_starts: numpy.ndarray = timestamps_ns - timestamps_ns % interval_ns
+        first_steps: numpy.ndarray = numpy.concatenate(([0], numpy.flatnonzero(numpy.diff(bar_starts)) + 1))
+        last_steps: numpy.ndarray = numpy.concatenate((first_steps[1:] - 1, [self.size - 1]))
+        return {
+            'timestamps_ns': bar_starts[first_steps],
+            'portfolio_values': self.values[last_steps],
+            'profits': self.profits[last_steps],
+            'drawdown_percents': numpy.maximum.reduceat(self.drawdown_percents[:self.size], first_steps),
+            'exposure_percents': self.exposure_percents[last_steps]
+        }
@@ -0,0 +1,55 @@
+import collections
+import threading
+import time
+from typing import Dict
+
+
+class StageTiming:
+    """
+    Times one pass through a stage, as the context manager returned by StageTimer.time. Stages are timed on every
+    simulated step, so this is a slotted object rather than a generator-based context manager, which allocates a
+    generator and a wrapper per use.
+    """
+    __slots__ = ('stage_timer', 'stage', 'start')
+
+    def __init__(self, stage_timer: 'StageTimer', stage: str):
+        self.stage_timer: StageTimer = stage_timer
+        self.stage: str = stage
+        self.start: float = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stage_timer.observe(self.stage, time.perf_counter() - self.start)
+
+
+class StageTimer:
+    """
+    Accumulates the wall time spent in named stages of a run, e.g. loading ticker files or stepping the strategy.
+
+    Stages may be timed from several threads, e.g. by the reader thread of a TickerStream, so a stage's time is the sum
+    over threads and the stages of a run can add up to more than its wall time.
+    """
+
+    def __init__(self):
+        self.seconds_by_stage: Dict[str, float] = collections.defaultdict(float)
+        self.count_by_stage: Dict[str, int] = collections.defaultdict(int)
+        self.lock: threading.Lock = threading.Lock()
+
+    def time(self, stage: str) -> StageTiming:
+        return StageTiming(self, stage)
+
+    def observe(self, stage: str, seconds: float):
+        with self.lock:
+            self.seconds_by_stage[stage] += seconds
+            self.count_by_stage[stage] += 1
+
+    def summary(self) -> Dict[str, Dict]:
+        """
+        Returns:
+            The total seconds and the number of times timed of each stage, keyed by stage.
+        """
+        with self.lock:
+            return {stage: {'seconds': seconds, 'count': self.count_by_stage[stage]}
+                    for stage, seconds in self.seconds_by_stage.items()}
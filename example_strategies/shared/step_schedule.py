@@ -0,0 +1,105 @@
+import datetime
+from typing import TYPE_CHECKING, Optional, Set, Tuple
+
+import numpy
+
+if TYPE_CHECKING:
+    # Only annotates step_positions, so live runs don't import pandas.
+    import pandas
+
+nanoseconds_per_hour: int = 3600 * 10 ** 9
+
+
+class StepSchedule:
+    """
+    The times at which a strategy is stepped, computed ahead of time instead of drawn at random every minute.
+
+    Steps fire every interval on a grid aligned to the Unix epoch, so the schedule doesn't depend on where a ticker file
+    starts. If jitter is set, each step is delayed by a pseudo random amount less than jitter that is derived from the
+    seed and the step number, so runs with the same seed step at the same times. Steps outside of active_utc_hours are
+    dropped, since the strategy can't trade then.
+    """
+
+    def __init__(self, **kwargs):
+        self.interval: datetime.timedelta = kwargs.get('interval')
+        self.jitter: datetime.timedelta = kwargs.get('jitter', datetime.timedelta(0))
+        self.seed: int = kwargs.get('seed', 0)
+        # If None, steps can fire at any hour.
+        self.active_utc_hours: Optional[Set[int]] = kwargs.get('active_utc_hours')
+
+        self.interval_ns: int = int(self.interval.total_seconds() * 10 ** 9)
+        self.jitter_ns: int = int(self.jitter.total_seconds() * 10 ** 9)
+        if self.interval_ns <= 0:
+            raise ValueError('interval must be positive')
+
+    @staticmethod
+    def window_hours(window: Tuple[float, float]) -> Set[int]:
+        """
+        Returns:
+            The UTC hours h for which window[0] <= h < window[1].
+        """
+        return {hour for hour in range(24) if window[0] <= hour < window[1]}
+
+    def step_times(self, start_ns: int, end_ns: int) -> numpy.ndarray:
+        """
+        Returns:
+            The step times in [start_ns, end_ns], in nanoseconds since the epoch.
+        """
+        first_step: int = (start_ns - self.jitter_ns) // self.interval_ns
+        last_step: int = end_ns // self.interval_ns
+        steps: numpy.ndarray = numpy.arange(first_step, last_step + 1, dtype=numpy.int64)
+        step_times: numpy.ndarray = steps * self.interval_ns
+        if self.jitter_ns > 0:
+            step_times += (self.uniform(steps) * self.jitter_ns).astype(numpy.int64)
+
+        step_times = step_times[(step_times >= start_ns) & (step_times <= end_ns)]
+        if self.active_utc_hours is not None:
+            hours: numpy.ndarray = (step_times // nanoseconds_per_hour) % 24
+            step_times = step_times[numpy.isin(hours, list(self.active_utc_hours))]
+        return step_times
+
+    def next_step_time(self, after_ns: int) -> int:
+        """
+        Returns:
+            The first step time after after_ns, in nanoseconds since the epoch. Hours outside of active_utc_hours are
+            skipped, so outside of them this is the first step in the next active hour.
+        """
+        if self.active_utc_hours is not None and not self.active_utc_hours:
+            raise ValueError('active_utc_hours is empty, so there is no next step')
+        # Long enough to reach the next active hour, and a few steps of long intervals.
+        horizon_ns: int = max(4 * self.interval_ns, 25 * nanoseconds_per_hour)
+        start_ns: int = after_ns + 1
+        while True:
+            step_times: numpy.ndarray = self.step_times(start_ns, start_ns + horizon_ns)
+            if len(step_times) > 0:
+                return int(step_times[0])
+            start_ns += horizon_ns + 1
+
+    def step_positions(self, minutes: 'pandas.DatetimeIndex') -> numpy.ndarray:
+        """
+        Args:
+            minutes: sorted, unique minutes of a ticker file
+
+        Returns:
+            The positions in minutes at which to step. Each step fires at the first minute at or after its step time. A
+            step is skipped if there is no ticker before the step after it is due.
+        """
+        if len(minutes) == 0:
+            return numpy.zeros(0, dtype=numpy.int64)
+        minute_values: numpy.ndarray = minutes.values.astype('datetime64[ns]').view(numpy.int64)
+        step_times: numpy.ndarray = self.step_times(int(minute_values[0]), int(minute_values[-1]))
+        positions: numpy.ndarray = numpy.searchsorted(minute_values, step_times, side='left')
+        is_on_time: numpy.ndarray = minute_values[positions] < step_times + self.interval_ns
+        return numpy.unique(positions[is_on_time])
+
+    def uniform(self, steps: numpy.ndarray) -> numpy.ndarray:
+        """
+        Returns:
+            A number in [0, 1) for each step number, from the SplitMix64 hash of the seed and the step number.
+        """
+        z: numpy.ndarray = steps.astype(numpy.uint64) ^ numpy.uint64(self.seed * 0x9E3779B1 & 0xFFFFFFFFFFFFFFFF)
+        z = z + numpy.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> numpy.uint64(30))) * numpy.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> numpy.uint64(27))) * numpy.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> numpy.uint64(31))
+        return (z >> numpy.uint64(11)).astype(numpy.float64) / float(2 ** 53)
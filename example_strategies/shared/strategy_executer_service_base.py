@@ -0,0 +1,133 @@
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy.orm import scoped_session
+from trading_platform.exchanges.data.financial_data import FinancialData, one
+from trading_platform.exchanges.data.order import Order
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.ticker import Ticker
+from trading_platform.exchanges.exchange_service_abc import ExchangeServiceAbc
+from trading_platform.exchanges.order_execution_service import OrderExecutionService
+from trading_platform.storage.daos.strategy_execution_dao import StrategyExecutionDao
+from trading_platform.strategy.services.strategy_executer_service_abc import StrategyExecuterServiceAbc
+from trading_platform.strategy.strategy_execution import StrategyExecution
+
+from example_strategies.shared.concurrent_order_executor import ConcurrentOrderExecutor
+from example_strategies.shared.exchange_state_refresher import ExchangeStateRefresher
+from example_strategies.shared.stage_timer import StageTimer
+from example_strategies.shared.strategy_state import StrategyState
+
+
+class StrategyExecuterServiceBase(StrategyExecuterServiceAbc):
+    """
+    The state, exchange state and order execution shared by the strategy executers of a single pair. A subclass
+    implements step() and active_utc_hours(), and sets state_class if it keeps more counters than StrategyState.
+    """
+    state_class: type = StrategyState
+
+    def __init__(self, **kwargs):
+        self.logger = kwargs.get('logger')
+        self.order_execution_service: OrderExecutionService = kwargs.get('order_execution_service')
+        self.scoped_session_maker: scoped_session = kwargs.get('scoped_session_maker')
+        self.strategy_execution_dao: StrategyExecutionDao = kwargs.get('strategy_execution_dao')
+        # If set, step() uses the exchange state cached by the refresher instead of fetching it.
+        self.exchange_state_refresher: Optional[ExchangeStateRefresher] = kwargs.get('exchange_state_refresher')
+        # If set, orders are executed on its worker pool and step() returns without waiting for them to fill.
+        self.concurrent_order_executor: Optional[ConcurrentOrderExecutor] = kwargs.get('concurrent_order_executor')
+        # Held while the state is changed or saved. Order completions change it from worker threads.
+        self.state_lock: threading.RLock = threading.RLock()
+        # Times the phases of step(). Pass a MetricsService to export them.
+        self.stage_timer: StageTimer = kwargs.get('stage_timer') or StageTimer()
+
+        self.strategy_execution: Optional[StrategyExecution] = None
+        # The counters of strategy_execution.state, which is rebuilt from them by save_state().
+        self.state: Optional[StrategyState] = None
+        self.pair: Pair = kwargs.get('pair')
+        self.order_padding_percent: FinancialData = kwargs.get('order_padding_percent')
+        # The padded price of a buy order is the ask times this.
+        self.buy_price_factor: FinancialData = one + self.order_padding_percent
+        self.balance_percent_per_trade: FinancialData = kwargs.get('balance_percent_per_trade')
+
+    def refresh_state(self, repeat: bool, refresh_freq_sec: int):
+        """
+        Preload the exchange state for faster trade execution. A no-op if no exchange_state_refresher was given.
+
+        Args:
+            repeat: if True, keep refreshing the state on a background thread. Otherwise refresh it once.
+            refresh_freq_sec: seconds between refreshes
+
+        """
+        if self.exchange_state_refresher is None:
+            return
+        self.exchange_state_refresher.refresh_freq_sec = refresh_freq_sec
+        if repeat:
+            self.exchange_state_refresher.start()
+        else:
+            self.exchange_state_refresher.refresh()
+
+    def fetch_exchange_state(self, exchange: ExchangeServiceAbc):
+        if self.exchange_state_refresher is not None and self.exchange_state_refresher.exchange is exchange:
+            with self.stage_timer.time('ensure_fresh_state'):
+                self.exchange_state_refresher.ensure_fresh()
+        else:
+            with self.stage_timer.time('fetch_balances'):
+                exchange.fetch_balances()
+            with self.stage_timer.time('fetch_latest_tickers'):
+                exchange.fetch_latest_tickers()
+
+    def latest_ticker(self, exchange: ExchangeServiceAbc) -> Ticker:
+        if self.exchange_state_refresher is not None and self.exchange_state_refresher.exchange is exchange:
+            # The refresher may fetch only the traded pairs' tickers, which the exchange service doesn't cache.
+            return self.exchange_state_refresher.ticker(self.pair)
+        return exchange.get_ticker(self.pair.name)
+
+    def initialize(self, strategy_id: str, state: Optional[Dict] = None):
+        """
+        Save a new strategy execution, with the given state if the run continues an earlier one, e.g. a resumed
+        backtest.
+        """
+        self.state = self.state_class(state)
+        strategy_execution: StrategyExecution = StrategyExecution(**{
+            'strategy_id': strategy_id,
+            'state': self.state.as_dict()
+        })
+        self.strategy_execution = self.strategy_execution_dao.save(self.scoped_session_maker(),
+                                                                   popo=strategy_execution, commit=True)
+
+    def execute_order(self, order: Order, check_if_order_filled: bool):
+        if self.concurrent_order_executor is not None:
+            with self.state_lock:
+                self.state.pending_order_count += 1
+            self.concurrent_order_executor.submit(order, check_if_order_filled, self.on_order_complete)
+        else:
+            with self.stage_timer.time('execute_order'):
+                self.order_execution_service.execute_order(order, session=self.scoped_session_maker(),
+                                                           write_pending_order=True,
+                                                           check_if_order_filled=check_if_order_filled)
+            self.save_state()
+        if self.exchange_state_refresher is not None:
+            # The order changed the balances, so the next step on this exchange must not reuse them.
+            self.exchange_state_refresher.invalidate()
+
+    def on_order_complete(self, order: Order, exception: Optional[Exception]):
+        """
+        Called by the concurrent_order_executor on a worker thread once an order was executed or failed.
+        """
+        with self.state_lock:
+            self.state.pending_order_count -= 1
+            if exception is not None:
+                self.state.failed_order_count += 1
+            self.save_state()
+        if self.exchange_state_refresher is not None:
+            self.exchange_state_refresher.invalidate()
+
+    def save_state(self):
+        with self.state_lock, self.stage_timer.time('save_state'):
+            self.strategy_execution.state = self.state.as_dict()
+            self.strategy_execution_dao.update_fetch_by_column(
+                session=self.scoped_session_maker(), column_name='strategy_execution_id',
+                column_value=self.strategy_execution.strategy_execution_id,
+                update_dict={
+                    'state': self.strategy_execution.state
+                },
+                commit=True)
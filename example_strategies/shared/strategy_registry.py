@@ -0,0 +1,146 @@
+import datetime
+import hashlib
+import json
+from typing import Dict
+
+import numpy
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.pair import Pair
+
+from example_strategies.cycle.cycle_properties import CycleProperties
+from example_strategies.cycle.cycle_strategy_executer_service import CycleStrategyExecuterService
+from example_strategies.dca.dca_properties import DcaProperties
+from example_strategies.dca.dca_strategy_executer_service import DcaStrategyExecuterService
+from example_strategies.shared.step_schedule import StepSchedule
+
+
+def properties_with_overrides(properties_class: type, parameters: Dict) -> Dict:
+    """
+    Returns:
+        The values of all the properties of properties_class, with the values in parameters taking precedence. Parameter
+        values are coerced to the type of the property they override.
+    """
+    properties: Dict = {name: getattr(properties_class, name) for name in properties_class.__annotations__}
+    for name, value in parameters.items():
+        if name not in properties:
+            raise ValueError('{0} is not a property of {1}'.format(name, properties_class.__name__))
+        if isinstance(properties[name], FinancialData):
+            properties[name] = FinancialData(str(value))
+        else:
+            properties[name] = type(properties[name])(value)
+    return properties
+
+
+def properties_hash(properties: Dict) -> str:
+    """
+    Returns:
+        A short hash of every property value, e.g. from properties_with_overrides, which tells runs of different
+        properties apart in their strategy ids.
+    """
+    return hashlib.sha256(json.dumps({name: str(value) for name, value in properties.items()},
+                                     sort_keys=True).encode()).hexdigest()[:8]
+
+
+def _cycle_strategy(properties: Dict, **kwargs) -> Dict:
+    strategy_executer_service: CycleStrategyExecuterService = CycleStrategyExecuterService(**dict(kwargs, **{
+        'buy_window': (properties['buy_window_utc_hour_start'], properties['buy_window_utc_hour_end']),
+        'sell_window': (properties['sell_window_utc_hour_start'], properties['sell_window_utc_hour_end']),
+        'balance_percent_per_trade': properties['balance_percent_per_trade'],
+        'order_padding_percent': properties['order_padding_percent'],
+    }))
+    return {
+        'strategy_executer_service': strategy_executer_service,
+        'step_schedule': StepSchedule(**{
+            'interval': datetime.timedelta(minutes=60 / properties['executions_per_hour']),
+            'jitter': datetime.timedelta(minutes=properties['step_jitter_minutes']),
+            'seed': properties['random_seed'],
+            'active_utc_hours': strategy_executer_service.active_utc_hours()
+        }),
+        # Live trading places orders_per_hour orders within the windows, where a backtest steps executions_per_hour
+        # times per hour.
+        'live_step_schedule': StepSchedule(**{
+            'interval': datetime.timedelta(minutes=60 / properties['orders_per_hour']),
+            'jitter': datetime.timedelta(minutes=properties['step_jitter_minutes']),
+            'seed': properties['random_seed'],
+            'active_utc_hours': strategy_executer_service.active_utc_hours()
+        })
+    }
+
+
+def _cycle_strategy_id_prefix(properties: Dict, pair: Pair) -> str:
+    # Example: cycle_strategy_btc_usd_buy_7_9_sell_20_22_3f2a9c1e_
+    return '{0}_{1}_buy_{2}_{3}_sell_{4}_{5}_{6}_'.format(
+        CycleStrategyExecuterService.strategy_base_id, pair.name, properties['buy_window_utc_hour_start'],
+        properties['buy_window_utc_hour_end'], properties['sell_window_utc_hour_start'],
+        properties['sell_window_utc_hour_end'], properties_hash(properties))
+
+
+def _cycle_order_sides(properties: Dict, hours: numpy.ndarray) -> numpy.ndarray:
+    """
+    Returns:
+        The side of the order CycleStrategyExecuterService.step places at each UTC hour.
+    """
+    # Imported here, as vectorized_backtest imports pandas, which live runs that use the registry don't need.
+    from example_strategies.shared.vectorized_backtest import buy_order, no_order, sell_order
+
+    is_buy_hour: numpy.ndarray = (properties['buy_window_utc_hour_start'] <= hours) & (
+            hours < properties['buy_window_utc_hour_end'])
+    is_sell_hour: numpy.ndarray = (properties['sell_window_utc_hour_start'] <= hours) & (
+            hours < properties['sell_window_utc_hour_end'])
+    return numpy.where(is_buy_hour, buy_order, numpy.where(is_sell_hour, sell_order, no_order))
+
+
+def _dca_strategy(properties: Dict, **kwargs) -> Dict:
+    strategy_executer_service: DcaStrategyExecuterService = DcaStrategyExecuterService(**dict(kwargs, **{
+        'balance_percent_per_trade': properties['balance_percent_per_trade'],
+        'order_padding_percent': properties['order_padding_percent'],
+    }))
+    step_schedule: StepSchedule = StepSchedule(**{
+        'interval': datetime.timedelta(days=30 / properties['executions_per_month']),
+        'jitter': datetime.timedelta(minutes=properties['step_jitter_minutes']),
+        'seed': properties['random_seed'],
+        'active_utc_hours': strategy_executer_service.active_utc_hours()
+    })
+    return {
+        'strategy_executer_service': strategy_executer_service,
+        'step_schedule': step_schedule,
+        'live_step_schedule': step_schedule
+    }
+
+
+def _dca_strategy_id_prefix(properties: Dict, pair: Pair) -> str:
+    # Example: dca_strategy_btc_usd_executions_per_month_4_3f2a9c1e_
+    return '{0}_{1}_executions_per_month_{2}_{3}_'.format(DcaStrategyExecuterService.strategy_base_id, pair.name,
+                                                          properties['executions_per_month'],
+                                                          properties_hash(properties))
+
+
+def _dca_order_sides(properties: Dict, hours: numpy.ndarray) -> numpy.ndarray:
+    """
+    Returns:
+        The side of the order DcaStrategyExecuterService.step places at each UTC hour.
+    """
+    from example_strategies.shared.vectorized_backtest import buy_order
+
+    return numpy.full(len(hours), buy_order)
+
+
+# Everything StrategyRunner, MultiStrategyRunner and the parameter sweep need to run a strategy: its properties class,
+# a build function returning its executer service and step schedules, the prefix of the ids of its executions, which
+# ends with the properties_hash of all its properties, and the order sides of its vectorized backtest.
+strategies: Dict[str, Dict] = {
+    'cycle': {
+        'properties_class': CycleProperties,
+        'strategy_base_id': CycleStrategyExecuterService.strategy_base_id,
+        'build': _cycle_strategy,
+        'strategy_id_prefix': _cycle_strategy_id_prefix,
+        'vectorized_order_sides': _cycle_order_sides
+    },
+    'dca': {
+        'properties_class': DcaProperties,
+        'strategy_base_id': DcaStrategyExecuterService.strategy_base_id,
+        'build': _dca_strategy,
+        'strategy_id_prefix': _dca_strategy_id_prefix,
+        'vectorized_order_sides': _dca_order_sides
+    }
+}
@@ -0,0 +1,326 @@
+import logging
+import os
+import random
+import shutil
+from typing import TYPE_CHECKING, Dict, Optional
+
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.ticker import Ticker
+from trading_platform.exchanges.exchange_service_abc import ExchangeServiceAbc
+from trading_platform.exchanges.order_execution_service import OrderExecutionService
+from trading_platform.properties.env_properties import OrderExecutionProperties
+from trading_platform.strategy.services.strategy_executer_service_abc import StrategyExecuterServiceAbc
+from trading_platform.utils.datetime_operations import datetime_now_with_utc_offset
+
+from example_strategies.shared.backtest_checkpoint import BacktestCheckpoint
+from example_strategies.shared.concurrent_order_executor import ConcurrentOrderExecutor
+from example_strategies.shared.exchange_state_refresher import ExchangeStateRefresher
+from example_strategies.shared.exchanges import instantiate_exchanges
+from example_strategies.shared.live_scheduler import LiveScheduler
+from example_strategies.shared.metrics_service import MetricsService
+from example_strategies.shared.persistence import Persistence, PersistenceMode
+from example_strategies.shared.profit_history_writer import ProfitHistoryWriter
+from example_strategies.shared.profit_tracker import ProfitTracker
+from example_strategies.shared.strategy_registry import properties_with_overrides, strategies
+from example_strategies.shared.ticker_rollup import TickerResolution, coarsest_resolution
+
+if TYPE_CHECKING:
+    from example_strategies.shared.backtest_result_cache import BacktestResultCache
+    from example_strategies.shared.backtest_service import BacktestService
+
+
+def build_order_execution_service(logger: logging.Logger, exchanges_by_id: Dict[int, ExchangeServiceAbc],
+                                  persistence: Persistence) -> OrderExecutionService:
+    return OrderExecutionService(**{
+        'logger': logger,
+        'exchanges_by_id': exchanges_by_id,
+        'order_dao': persistence.order_dao,
+        'multithreaded': False,
+        'num_order_status_checks': OrderExecutionProperties.num_order_status_checks,
+        'sleep_time_sec_between_order_checks': OrderExecutionProperties.sleep_time_sec_between_order_checks,
+        'scoped_session_maker': persistence.scoped_session_maker
+    })
+
+
+def build_backtest_service(**kwargs) -> 'BacktestService':
+    """
+    Build a backtest of a strategy of the registry on fresh backtest exchanges.
+
+    Args:
+     kwargs: Dict
+        logger: logging.Logger
+        strategy_name: str, a key of strategies
+        strategy_id: str
+        parameters: Dict, property values that override the strategy's properties class
+        ticker_dir: str
+        ticker_cache_dir: str
+        ticker_filenames: List[str], optional, the ticker files to replay, all of them by default
+        profit_summary_filepath: str
+        persistence: Persistence
+        stage_timer: StageTimer, optional
+        resume: bool, optional, whether to continue from the checkpoint of the strategy_id, if it has one. Raises a
+            ValueError if the checkpoint was written with other properties.
+        max_ticker_resolution: str, optional, the coarsest TickerResolution to read, minute by default. The coarsest
+            one at which the strategy steps at the same minutes is used, if there is a ticker_cache_dir.
+    """
+    # Imports pandas, which live runs don't need.
+    from example_strategies.shared.backtest_service import BacktestService
+
+    logger: logging.Logger = kwargs.get('logger')
+    persistence: Persistence = kwargs.get('persistence')
+    strategy: Dict = strategies[kwargs.get('strategy_name')]
+    properties: Dict = properties_with_overrides(strategy['properties_class'], kwargs.get('parameters', {}))
+    pair: Pair = Pair(base=properties['base_currency'], quote=properties['quote_currency'])
+
+    # Backtest exchanges hold the simulated balances, so every backtest gets its own.
+    exchanges_by_id: Dict[int, ExchangeServiceAbc] = instantiate_exchanges([properties['exchange_id_to_trade']],
+                                                                           live=False)
+    built_strategy: Dict = strategy['build'](properties, **{
+        'logger': logger,
+        'order_execution_service': build_order_execution_service(logger, exchanges_by_id, persistence),
+        'strategy_execution_dao': persistence.strategy_execution_dao,
+        'scoped_session_maker': persistence.scoped_session_maker,
+        'stage_timer': kwargs.get('stage_timer'),
+        'pair': pair
+    })
+    strategy_executer_service: StrategyExecuterServiceAbc = built_strategy['strategy_executer_service']
+    checkpoint_filepath: str = BacktestCheckpoint.filepath(kwargs.get('profit_summary_filepath'))
+    resume_checkpoint: Optional[BacktestCheckpoint] = BacktestCheckpoint.load(checkpoint_filepath) \
+        if kwargs.get('resume') else None
+    if resume_checkpoint is not None:
+        resume_checkpoint.check_properties(properties)
+        strategy_executer_service.initialize(kwargs.get('strategy_id'), state=resume_checkpoint.strategy_state)
+    else:
+        strategy_executer_service.initialize(kwargs.get('strategy_id'))
+
+    ticker_resolution: str = coarsest_resolution(
+        built_strategy['step_schedule'], kwargs.get('max_ticker_resolution', TickerResolution.minute)) \
+        if kwargs.get('ticker_cache_dir') is not None else TickerResolution.minute
+    if ticker_resolution != TickerResolution.minute:
+        logger.info('reading {0} ticker rollups'.format(ticker_resolution))
+
+    return BacktestService(**{
+        'logger': logger,
+        'strategy_executer_service': strategy_executer_service,
+        'exchange': exchanges_by_id.get(properties['exchange_id_to_trade']),
+        'ticker_dir': kwargs.get('ticker_dir'),
+        'ticker_cache_dir': kwargs.get('ticker_cache_dir'),
+        'ticker_filenames': kwargs.get('ticker_filenames'),
+        'ticker_resolution': ticker_resolution,
+        # The strategy only trades and values its own pair.
+        'pairs': [pair],
+        'step_schedule': built_strategy['step_schedule'],
+        'initial_base_currency': properties['base_currency'],
+        'initial_base_capital': properties['initial_base_capital'],
+        'persistence': persistence,
+        'profit_summary_filepath': kwargs.get('profit_summary_filepath'),
+        'stage_timer': kwargs.get('stage_timer'),
+        'checkpoint_filepath': checkpoint_filepath,
+        'checkpoint_properties': BacktestCheckpoint.saved_properties(properties),
+        'resume_checkpoint': resume_checkpoint
+    })
+
+
+class StrategyRunner:
+    """
+    Runs one strategy of the registry live or in a backtest.
+
+    The registry supplies the strategy's executer service, properties class and step schedules, and the runner owns
+    everything around them: the exchanges, persistence, the ticker cache and checkpoints of backtests, and the state
+    refresher, order executor, scheduler and metrics of live runs. A new strategy only needs a registry entry.
+    """
+
+    def __init__(self, **kwargs):
+        self.logger: logging.Logger = kwargs.get('logger')
+        # A key of strategy_registry.strategies.
+        self.strategy_name: str = kwargs.get('strategy_name')
+        # Property values that override the strategy's properties class.
+        self.parameters: Dict = kwargs.get('parameters', {})
+        self.live: bool = kwargs.get('live', False)
+        self.ticker_dir: Optional[str] = kwargs.get('ticker_dir')
+        self.ticker_cache_dir: Optional[str] = kwargs.get('ticker_cache_dir')
+        self.profit_summary_dir: str = kwargs.get('profit_summary_dir')
+        # Live trading always writes through to the database.
+        self.persistence_mode: str = kwargs.get('persistence_mode', PersistenceMode.database)
+        self.metrics_port: Optional[int] = kwargs.get('metrics_port')
+        # Whether a backtest continues the latest run of the strategy from its last checkpoint.
+        self.resume: bool = kwargs.get('resume', False)
+        self.update_tables: bool = kwargs.get('update_tables', False)
+        # The coarsest TickerResolution a backtest may read, see build_backtest_service.
+        self.max_ticker_resolution: str = kwargs.get('max_ticker_resolution', TickerResolution.day)
+        # If set, a backtest whose strategy, properties and ticker files are unchanged is looked up here instead of run.
+        self.result_cache: Optional['BacktestResultCache'] = kwargs.get('result_cache')
+        # Times the phases of each step, and in backtests the loading and converting of ticker files.
+        self.metrics_service: MetricsService = kwargs.get('metrics_service') or MetricsService()
+
+        self.strategy: Dict = strategies[self.strategy_name]
+        self.properties: Dict = properties_with_overrides(self.strategy['properties_class'], self.parameters)
+        self.pair: Pair = Pair(base=self.properties['base_currency'], quote=self.properties['quote_currency'])
+
+    def run(self):
+        mode_name: str = 'live' if self.live else 'backtest_results'
+        self.logger.info('running {0} strategy in {1} mode'.format(self.strategy_name, mode_name))
+        if self.live:
+            self.run_live()
+        else:
+            self.run_backtest()
+
+    def new_strategy_id(self, result_cache_key: Optional[str] = None) -> str:
+        """
+        Args:
+            result_cache_key: the key of the backtest in the result cache, if there is one. Backtests with the same key
+                produce the same result, so their strategy_ids start with the same part of it.
+
+        Returns:
+            A strategy_id whose profit summary this run creates, empty, in the profit summary dir. A rerun or a
+            concurrent run of the same backtest gets another strategy_id, so it never appends to the profit summary or
+            overwrites the checkpoint of this run.
+        """
+        strategy_id_prefix: str = self.strategy['strategy_id_prefix'](self.properties, self.pair)
+        if result_cache_key is not None:
+            strategy_id_prefix = '{0}{1}_'.format(strategy_id_prefix, result_cache_key[:8])
+        os.makedirs(self.profit_summary_dir, exist_ok=True)
+        while True:
+            # Include a random int in case a strategy with the same properties is run multiple times.
+            strategy_id: str = '{0}{1}'.format(strategy_id_prefix, random.randint(0, 100000))
+            profit_summary_filepath: str = os.path.join(self.profit_summary_dir, '{0}.csv'.format(strategy_id))
+            if os.path.exists(BacktestCheckpoint.filepath(profit_summary_filepath)):
+                continue
+            try:
+                # Creating the file exclusively claims the strategy_id against concurrent runs.
+                open(profit_summary_filepath, 'x').close()
+                return strategy_id
+            except FileExistsError:
+                continue
+
+    def run_backtest(self):
+        result_cache_key: Optional[str] = None
+        if self.result_cache is not None:
+            result_cache_key = self.result_cache.key(self.strategy_name, self.properties, self.ticker_dir, {
+                'max_ticker_resolution': self.max_ticker_resolution if self.ticker_cache_dir is not None
+                else TickerResolution.minute
+            })
+            cached_result: Optional[Dict] = self.result_cache.get(result_cache_key)
+            if cached_result is not None:
+                self.use_cached_result(result_cache_key, cached_result)
+                return
+
+        # A resumed backtest continues the latest run of the strategy, under its strategy_id.
+        checkpoint_filepath: Optional[str] = BacktestCheckpoint.latest_filepath(
+            self.profit_summary_dir, self.strategy['strategy_id_prefix'](self.properties, self.pair)) \
+            if self.resume else None
+        resume_checkpoint: Optional[BacktestCheckpoint] = BacktestCheckpoint.load(checkpoint_filepath) \
+            if checkpoint_filepath is not None else None
+        if resume_checkpoint is not None:
+            strategy_id: str = resume_checkpoint.strategy_id
+        else:
+            if self.resume:
+                self.logger.info('no checkpoint to resume, starting a new backtest')
+            strategy_id: str = self.new_strategy_id(result_cache_key)
+
+        profit_summary_filepath: str = os.path.join(self.profit_summary_dir, '{0}.csv'.format(strategy_id))
+        self.logger.info('writing profit summary to {0}'.format(profit_summary_filepath))
+        backtest_service: 'BacktestService' = build_backtest_service(**{
+            'logger': self.logger,
+            'strategy_name': self.strategy_name,
+            'strategy_id': strategy_id,
+            'parameters': self.parameters,
+            'ticker_dir': self.ticker_dir,
+            'ticker_cache_dir': self.ticker_cache_dir,
+            'profit_summary_filepath': profit_summary_filepath,
+            'persistence': Persistence(self.persistence_mode, self.update_tables),
+            'stage_timer': self.metrics_service,
+            'resume': resume_checkpoint is not None,
+            'max_ticker_resolution': self.max_ticker_resolution
+        })
+        backtest_service.run()
+        self.metrics_service.log_summary(self.logger)
+        if self.result_cache is not None:
+            self.result_cache.put(result_cache_key, {
+                'strategy_id': strategy_id,
+                'final_base_balance': float(backtest_service.exchange.get_balance(self.pair.base).free),
+                'final_quote_balance': float(backtest_service.exchange.get_balance(self.pair.quote).free)
+            }, profit_summary_filepath)
+
+    def use_cached_result(self, result_cache_key: str, cached_result: Dict):
+        # Identical backtests share the strategy_id and profit summary of the run that was cached.
+        profit_summary_filepath: str = os.path.join(self.profit_summary_dir,
+                                                    '{0}.csv'.format(cached_result['strategy_id']))
+        cached_profit_summary_filepath: str = self.result_cache.profit_summary_filepath(result_cache_key)
+        if not os.path.isfile(profit_summary_filepath) and os.path.isfile(cached_profit_summary_filepath):
+            os.makedirs(self.profit_summary_dir, exist_ok=True)
+            shutil.copyfile(cached_profit_summary_filepath, profit_summary_filepath)
+        self.logger.info('found cached backtest {0} with final balances {1} {2} and {3} {4}, profit summary at '
+                         '{5}'.format(cached_result['strategy_id'], cached_result['final_base_balance'],
+                                      self.pair.base, cached_result['final_quote_balance'], self.pair.quote,
+                                      profit_summary_filepath))
+
+    def run_live(self):
+        persistence: Persistence = Persistence(PersistenceMode.database, self.update_tables)
+        exchange_id: int = self.properties['exchange_id_to_trade']
+        exchanges_by_id: Dict[int, ExchangeServiceAbc] = instantiate_exchanges([exchange_id], live=True)
+        order_execution_service: OrderExecutionService = build_order_execution_service(self.logger, exchanges_by_id,
+                                                                                       persistence)
+        exchange: ExchangeServiceAbc = exchanges_by_id.get(exchange_id)
+        exchange_state_refresher: ExchangeStateRefresher = ExchangeStateRefresher(**{
+            'logger': self.logger,
+            'exchange': exchange,
+            'refresh_freq_sec': self.properties['state_refresh_freq_sec'],
+            'max_staleness_sec': self.properties['max_state_staleness_sec'],
+            'stage_timer': self.metrics_service,
+            'pairs': [self.pair]
+        })
+        concurrent_order_executor: Optional[ConcurrentOrderExecutor] = ConcurrentOrderExecutor(**{
+            'logger': self.logger,
+            'order_execution_service': order_execution_service,
+            'scoped_session_maker': persistence.scoped_session_maker,
+            'max_workers': self.properties['order_execution_workers'],
+            'stage_timer': self.metrics_service
+        }) if self.properties['order_execution_workers'] > 0 else None
+
+        built_strategy: Dict = self.strategy['build'](self.properties, **{
+            'logger': self.logger,
+            'order_execution_service': order_execution_service,
+            'strategy_execution_dao': persistence.strategy_execution_dao,
+            'scoped_session_maker': persistence.scoped_session_maker,
+            'exchange_state_refresher': exchange_state_refresher,
+            'concurrent_order_executor': concurrent_order_executor,
+            'stage_timer': self.metrics_service,
+            'pair': self.pair
+        })
+        strategy_executer_service: StrategyExecuterServiceAbc = built_strategy['strategy_executer_service']
+        strategy_id: str = self.new_strategy_id()
+        strategy_executer_service.initialize(strategy_id)
+
+        profit_summary_filepath: str = os.path.join(self.profit_summary_dir, '{0}.csv'.format(strategy_id))
+        self.logger.info('writing profit summary to {0}'.format(profit_summary_filepath))
+        # Only the traded pair is valued, so the other tickers of the exchange aren't kept.
+        exchange_state_refresher.refresh()
+        initial_tickers: Dict[str, Ticker] = exchange_state_refresher.tickers()
+        profit_tracker: ProfitTracker = ProfitTracker(**{
+            'valuation_currency': self.pair.base,
+            'pairs': [self.pair]
+        })
+        if initial_tickers:
+            profit_tracker.initialize(list(initial_tickers.values())[0].app_create_timestamp, exchange, initial_tickers)
+        else:
+            self.logger.warning('no ticker for {0} yet, so profit is measured against the portfolio value at the '
+                                'first step'.format(self.pair.name))
+        strategy_executer_service.refresh_state(repeat=True, refresh_freq_sec=self.properties['state_refresh_freq_sec'])
+        profit_history_writer: ProfitHistoryWriter = ProfitHistoryWriter(profit_summary_filepath)
+        live_scheduler: LiveScheduler = LiveScheduler(step_schedule=built_strategy['live_step_schedule'])
+        self.metrics_service.start_logging(self.logger, self.properties['metrics_log_interval_sec'])
+        if self.metrics_port is not None:
+            self.metrics_service.serve(self.metrics_port)
+        while live_scheduler.wait():
+            with self.metrics_service.time('step'):
+                strategy_executer_service.step(**{
+                    'exchange': exchange,
+                    'now_datetime': datetime_now_with_utc_offset(),
+                    'check_if_order_filled': True
+                })
+            # Exchange tickers and balances are updated in the background and by side effect during step()
+            with self.metrics_service.time('profit_summary'):
+                profit_history_writer.append(profit_tracker.update(datetime_now_with_utc_offset(), exchange,
+                                                                   exchange_state_refresher.tickers()))
+                profit_history_writer.checkpoint()
@@ -0,0 +1,28 @@
+from typing import Dict, Optional, Tuple
+
+
+class StrategyState:
+    """
+    The order counters of a strategy execution, kept in slots rather than in the StrategyExecution.state dict, which is
+    only rebuilt from them when the state is saved.
+    """
+    __slots__ = ('buy_order_count', 'pending_order_count', 'failed_order_count')
+    # The slots of the class and its bases, in the order they are saved.
+    fields: Tuple[str, ...] = __slots__
+
+    def __init__(self, state: Optional[Dict] = None):
+        """
+        Args:
+            state: a StrategyExecution.state saved by an earlier run, whose counters to continue from
+        """
+        state = state or {}
+        for name in self.fields:
+            setattr(self, name, int(state.get(name, 0)))
+
+    def as_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.fields}
+
+
+class CycleStrategyState(StrategyState):
+    __slots__ = ('sell_order_count',)
+    fields: Tuple[str, ...] = StrategyState.fields + __slots__
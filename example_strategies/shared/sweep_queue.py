@@ -0,0 +1,271 @@
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import sqlalchemy
+
+
+class ShardStatus:
+    # Waiting for a worker.
+    pending: str = 'pending'
+    # Claimed by a worker, which sends heartbeats while it runs the shard.
+    running: str = 'running'
+    # The result was written back.
+    done: str = 'done'
+    # The backtest raised, or the shard's workers stopped sending heartbeats max_attempts times.
+    failed: str = 'failed'
+
+    all: List[str] = [pending, running, done, failed]
+    finished: List[str] = [done, failed]
+
+
+class SweepQueue:
+    """
+    The shards of parameter sweeps in a database table, which workers on any node claim, run and write results back to.
+
+    A shard is a task of ParameterSweepService: one parameter set over one time range of the ticker files. Shards are
+    claimed with a conditional update, so any database that SQLAlchemy supports works, e.g. a SQLite file for workers
+    on one box or Postgres for workers on several nodes. A worker sends a heartbeat while it runs a shard. A running
+    shard without a heartbeat for heartbeat_timeout_sec is presumed to have lost its worker and is claimed again, until
+    it was claimed max_attempts times.
+    """
+    table_name: str = 'sweep_shards'
+
+    def __init__(self, **kwargs):
+        # A SQLAlchemy database URL, e.g. sqlite:////tmp/sweep_queue.db or postgresql://user@localhost/sweeps
+        self.database_url: str = kwargs.get('database_url')
+        self.heartbeat_timeout_sec: float = kwargs.get('heartbeat_timeout_sec', 120)
+        self.max_attempts: int = kwargs.get('max_attempts', 3)
+        # Workers try to claim a random one of this many claimable shards, so that they rarely race for the same one.
+        self.claim_candidates: int = kwargs.get('claim_candidates', 16)
+
+        self.engine: sqlalchemy.engine.Engine = sqlalchemy.create_engine(self.database_url)
+        metadata: sqlalchemy.MetaData = sqlalchemy.MetaData()
+        self.table: sqlalchemy.Table = sqlalchemy.Table(
+            self.table_name, metadata,
+            sqlalchemy.Column('shard_id', sqlalchemy.Integer, primary_key=True, autoincrement=True),
+            sqlalchemy.Column('sweep_id', sqlalchemy.String(128), nullable=False, index=True),
+            sqlalchemy.Column('status', sqlalchemy.String(16), nullable=False, index=True),
+            # The task of run_parameter_set, as JSON.
+            sqlalchemy.Column('task', sqlalchemy.Text, nullable=False),
+            sqlalchemy.Column('worker_id', sqlalchemy.String(256)),
+            sqlalchemy.Column('attempts', sqlalchemy.Integer, nullable=False, default=0),
+            # Seconds since the epoch.
+            sqlalchemy.Column('heartbeat_at', sqlalchemy.Float),
+            # The result of run_parameter_set, as JSON.
+            sqlalchemy.Column('result', sqlalchemy.Text),
+            sqlalchemy.Column('error', sqlalchemy.Text)
+        )
+        metadata.create_all(self.engine)
+
+    @staticmethod
+    def default_worker_id() -> str:
+        return '{0}_{1}'.format(socket.gethostname(), os.getpid())
+
+    def add_shards(self, sweep_id: str, tasks: List[Dict]) -> bool:
+        """
+        Returns:
+            Whether the tasks were added, which they aren't if the sweep already has shards, e.g. when it is resumed.
+        """
+        with self.engine.begin() as connection:
+            existing_shard = connection.execute(
+                self.table.select().where(self.table.c.sweep_id == sweep_id).limit(1)).first()
+            if existing_shard is not None:
+                return False
+            connection.execute(self.table.insert(), [{
+                'sweep_id': sweep_id,
+                'status': ShardStatus.pending,
+                'task': json.dumps(task),
+                'attempts': 0
+            } for task in tasks])
+        return True
+
+    def expire(self) -> int:
+        """
+        Fail the running shards whose worker stopped sending heartbeats and that were already claimed max_attempts
+        times. Shards with attempts left stay running until they are claimed again.
+
+        Returns:
+            How many shards failed.
+        """
+        with self.engine.begin() as connection:
+            return connection.execute(self.table.update().where(sqlalchemy.and_(
+                self.table.c.status == ShardStatus.running,
+                self.table.c.heartbeat_at < time.time() - self.heartbeat_timeout_sec,
+                self.table.c.attempts >= self.max_attempts
+            )).values(status=ShardStatus.failed, error='no heartbeat from the worker of any of {0} attempts'.format(
+                self.max_attempts))).rowcount
+
+    def claim(self, worker_id: str, sweep_id: Optional[str] = None) -> Optional[Dict]:
+        """
+        Claim a pending shard, or a running one whose worker stopped sending heartbeats.
+
+        Args:
+            sweep_id: the sweep to claim a shard of, or None for any sweep
+
+        Returns:
+            The shard_id and task of the claimed shard, or None if there is nothing to claim.
+        """
+        self.expire()
+        claimable = sqlalchemy.or_(
+            self.table.c.status == ShardStatus.pending,
+            sqlalchemy.and_(self.table.c.status == ShardStatus.running,
+                            self.table.c.heartbeat_at < time.time() - self.heartbeat_timeout_sec,
+                            self.table.c.attempts < self.max_attempts))
+        if sweep_id is not None:
+            claimable = sqlalchemy.and_(self.table.c.sweep_id == sweep_id, claimable)
+        while True:
+            with self.engine.begin() as connection:
+                candidates: List = connection.execute(self.table.select().where(claimable).order_by(
+                    self.table.c.shard_id).limit(self.claim_candidates)).fetchall()
+            if not candidates:
+                return None
+            candidate = random.choice(candidates)
+            with self.engine.begin() as connection:
+                # Only one worker's update matches the status and attempts it read.
+                claimed: bool = connection.execute(self.table.update().where(sqlalchemy.and_(
+                    self.table.c.shard_id == candidate.shard_id,
+                    self.table.c.status == candidate.status,
+                    self.table.c.attempts == candidate.attempts
+                )).values(status=ShardStatus.running, worker_id=worker_id, attempts=candidate.attempts + 1,
+                          heartbeat_at=time.time())).rowcount == 1
+            if claimed:
+                return {'shard_id': candidate.shard_id, 'task': json.loads(candidate.task)}
+
+    def heartbeat(self, shard_id: int, worker_id: str) -> bool:
+        """
+        Returns:
+            Whether the worker still holds the shard. It doesn't if the shard was claimed by another worker after its
+            heartbeats stopped for too long.
+        """
+        with self.engine.begin() as connection:
+            return connection.execute(self.table.update().where(self._held(shard_id, worker_id)).values(
+                heartbeat_at=time.time())).rowcount == 1
+
+    def complete(self, shard_id: int, worker_id: str, result: Dict) -> bool:
+        """
+        Returns:
+            Whether the result was written, which it isn't if the worker no longer holds the shard.
+        """
+        with self.engine.begin() as connection:
+            return connection.execute(self.table.update().where(self._held(shard_id, worker_id)).values(
+                status=ShardStatus.done, heartbeat_at=time.time(),
+                # Values read from a profit summary may be numpy scalars.
+                result=json.dumps(result, default=lambda value: value.item()))).rowcount == 1
+
+    def fail(self, shard_id: int, worker_id: str, error: str) -> bool:
+        with self.engine.begin() as connection:
+            return connection.execute(self.table.update().where(self._held(shard_id, worker_id)).values(
+                status=ShardStatus.failed, heartbeat_at=time.time(), error=error)).rowcount == 1
+
+    def _held(self, shard_id: int, worker_id: str):
+        return sqlalchemy.and_(self.table.c.shard_id == shard_id, self.table.c.worker_id == worker_id,
+                               self.table.c.status == ShardStatus.running)
+
+    def status_counts(self, sweep_id: Optional[str] = None) -> Dict[str, int]:
+        """
+        Returns:
+            The number of shards of the sweep, or of every sweep, in each ShardStatus.
+        """
+        status_counts: Dict[str, int] = {status: 0 for status in ShardStatus.all}
+        query: str = 'SELECT status, COUNT(*) FROM {0}'.format(self.table_name)
+        if sweep_id is not None:
+            query += ' WHERE sweep_id = :sweep_id'
+        with self.engine.begin() as connection:
+            for status, count in connection.execute(sqlalchemy.text(query + ' GROUP BY status'),
+                                                    {'sweep_id': sweep_id}):
+                status_counts[status] = count
+        return status_counts
+
+    def is_finished(self, sweep_id: Optional[str] = None) -> bool:
+        status_counts: Dict[str, int] = self.status_counts(sweep_id)
+        return status_counts[ShardStatus.pending] == 0 and status_counts[ShardStatus.running] == 0
+
+    def results(self, sweep_id: str) -> List[Dict]:
+        """
+        Returns:
+            The result of every finished shard of the sweep. A failed shard's is its parameters, strategy_id and error,
+            as ParameterSweepService reports a failed backtest.
+        """
+        results: List[Dict] = []
+        with self.engine.begin() as connection:
+            shards: List = connection.execute(self.table.select().where(sqlalchemy.and_(
+                self.table.c.sweep_id == sweep_id, self.table.c.status.in_(ShardStatus.finished))).order_by(
+                self.table.c.shard_id)).fetchall()
+        for shard in shards:
+            if shard.status == ShardStatus.done:
+                results.append(json.loads(shard.result))
+            else:
+                task: Dict = json.loads(shard.task)
+                results.append(dict(task['parameters'], strategy_id=task['strategy_id'], error=shard.error))
+        return results
+
+
+class SweepWorker:
+    """
+    Claims shards of a SweepQueue and runs them one at a time, sending heartbeats from a background thread while a
+    shard runs.
+    """
+
+    def __init__(self, **kwargs):
+        self.logger: logging.Logger = kwargs.get('logger')
+        self.sweep_queue: SweepQueue = kwargs.get('sweep_queue')
+        # Runs the task of a shard and returns its result, e.g. run_parameter_set.
+        self.run_task: Callable[[Dict], Dict] = kwargs.get('run_task')
+        self.worker_id: str = kwargs.get('worker_id') or SweepQueue.default_worker_id()
+        # If set, only shards of this sweep are claimed.
+        self.sweep_id: Optional[str] = kwargs.get('sweep_id')
+        # Whether to return once every shard is finished, rather than wait for more sweeps.
+        self.exit_when_finished: bool = kwargs.get('exit_when_finished', False)
+        self.poll_sec: float = kwargs.get('poll_sec', 5)
+        self.heartbeat_sec: float = kwargs.get('heartbeat_sec', self.sweep_queue.heartbeat_timeout_sec / 4)
+
+        # Counters of the last run.
+        self.shard_count: int = 0
+
+    def run(self):
+        while True:
+            shard: Optional[Dict] = self.sweep_queue.claim(self.worker_id, self.sweep_id)
+            if shard is None:
+                # Shards still running elsewhere are claimed again if their worker dies, so wait until they finish.
+                if self.exit_when_finished and self.sweep_queue.is_finished(self.sweep_id):
+                    return
+                time.sleep(self.poll_sec)
+                continue
+            self.run_shard(shard['shard_id'], shard['task'])
+            self.shard_count += 1
+
+    def run_shard(self, shard_id: int, task: Dict):
+        self.logger.info('{0} running shard {1}, {2}'.format(self.worker_id, shard_id, task['strategy_id']))
+        stop_event: threading.Event = threading.Event()
+        heartbeat_thread: threading.Thread = threading.Thread(target=self._send_heartbeats,
+                                                              args=(shard_id, stop_event), name='sweep_heartbeat',
+                                                              daemon=True)
+        heartbeat_thread.start()
+        try:
+            result: Dict = self.run_task(task)
+        except Exception as exception:
+            self.logger.exception('shard {0} failed'.format(shard_id))
+            stop_event.set()
+            heartbeat_thread.join()
+            self.sweep_queue.fail(shard_id, self.worker_id, repr(exception))
+            return
+        stop_event.set()
+        heartbeat_thread.join()
+        if not self.sweep_queue.complete(shard_id, self.worker_id, result):
+            self.logger.warning('shard {0} was claimed by another worker, dropping its result'.format(shard_id))
+
+    def _send_heartbeats(self, shard_id: int, stop_event: threading.Event):
+        while not stop_event.wait(self.heartbeat_sec):
+            try:
+                if not self.sweep_queue.heartbeat(shard_id, self.worker_id):
+                    self.logger.warning('lost shard {0} to another worker'.format(shard_id))
+                    return
+            except Exception:
+                # A transient database error. The shard is only lost if heartbeats fail for heartbeat_timeout_sec.
+                self.logger.exception('heartbeat of shard {0} failed'.format(shard_id))
@@ -0,0 +1,315 @@
+import sys
+
+import argparse
+import json
+import os
+import shutil
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple, Union
+
+import numpy
+import pandas
+
+sys.path.append(os.getcwd())
+from example_strategies.shared.ticker_rollup import TickerResolution, pair_columns, rollup_ticker_df
+
+if TYPE_CHECKING:
+    from trading_platform.exchanges.data.pair import Pair
+
+
+class TickerCacheService:
+    """
+    Binary columnar cache of minute-level ticker files for backtest mode.
+
+    Each ticker CSV in the ticker directory is parsed once and written to its own cache directory as one memory-mappable
+    .npy file per column, plus a manifest.json that records the source file's size and mtime. String columns are stored
+    as integer codes with their categories in the manifest, and the minute key is precomputed and stored as a column.
+
+    Hourly and daily rollups of each file, see rollup_ticker_df, are stored in the same layout in subdirectories of its
+    cache directory, so that backtests that step at most once per hour or day don't read every minute.
+
+    Rows are stored grouped by pair, in minute order within each pair, and the manifest records the row range of each
+    pair. A backtest that only trades a few pairs of an exchange reads and converts just their ranges.
+    """
+    # Bump whenever the on-disk layout changes so that stale caches are rebuilt instead of misread.
+    format_version: int = 3
+    manifest_filename: str = 'manifest.json'
+
+    timestamp_column: str = 'app_create_timestamp'
+    minute_column: str = 'app_create_timestamp_min'
+
+    @staticmethod
+    def read_ticker_csv(ticker_filepath: str) -> pandas.DataFrame:
+        """
+        Parse a ticker CSV and add the minute key column. Rows are sorted by minute so that all the tickers for a minute
+        are contiguous.
+        """
+        ticker_df: pandas.DataFrame = pandas.read_csv(ticker_filepath,
+                                                      parse_dates=[TickerCacheService.timestamp_column])
+        ticker_df[TickerCacheService.minute_column] = ticker_df[TickerCacheService.timestamp_column].dt.round('min')
+        ticker_df.sort_values(TickerCacheService.minute_column, kind='mergesort', inplace=True)
+        ticker_df.reset_index(drop=True, inplace=True)
+        return ticker_df
+
+    @staticmethod
+    def cache_path(ticker_cache_dir: str, ticker_filename: str) -> str:
+        return os.path.join(ticker_cache_dir, ticker_filename)
+
+    @staticmethod
+    def rollup_cache_path(cache_path: str, resolution: str) -> str:
+        return os.path.join(cache_path, 'rollup_{0}'.format(resolution))
+
+    @staticmethod
+    def is_fresh(ticker_filepath: str, cache_path: str) -> bool:
+        manifest: Optional[Dict] = TickerCacheService.read_manifest(cache_path)
+        if manifest is None:
+            return False
+        stat: os.stat_result = os.stat(ticker_filepath)
+        return (manifest.get('format_version') == TickerCacheService.format_version and
+                manifest.get('source_mtime_ns') == stat.st_mtime_ns and
+                manifest.get('source_size') == stat.st_size)
+
+    @staticmethod
+    def read_manifest(cache_path: str) -> Optional[Dict]:
+        manifest_filepath: str = os.path.join(cache_path, TickerCacheService.manifest_filename)
+        if not os.path.isfile(manifest_filepath):
+            return None
+        with open(manifest_filepath) as manifest_file:
+            return json.load(manifest_file)
+
+    @staticmethod
+    def ingest(ticker_dir: str, ticker_cache_dir: str) -> List[str]:
+        """
+        Build the cache for every file in ticker_dir whose cache is missing or older than the source file.
+
+        Returns:
+            The filenames that were (re)ingested.
+        """
+        os.makedirs(ticker_cache_dir, exist_ok=True)
+        ticker_filenames: List[str] = sorted(os.listdir(ticker_dir))
+        ingested_filenames: List[str] = []
+        for ticker_filename in ticker_filenames:
+            ticker_filepath: str = os.path.join(ticker_dir, ticker_filename)
+            cache_path: str = TickerCacheService.cache_path(ticker_cache_dir, ticker_filename)
+            if not TickerCacheService.is_fresh(ticker_filepath, cache_path):
+                TickerCacheService.ingest_file(ticker_filepath, cache_path)
+                ingested_filenames.append(ticker_filename)
+        return ingested_filenames
+
+    @staticmethod
+    def ingest_file(ticker_filepath: str, cache_path: str):
+        # Stat before parsing so that a source file modified during ingest is treated as stale on the next run.
+        stat: os.stat_result = os.stat(ticker_filepath)
+        ticker_df: pandas.DataFrame = TickerCacheService.read_ticker_csv(ticker_filepath)
+
+        # Write to a temporary directory and swap it in so that an interrupted ingest never leaves a partial cache. The
+        # directory is per process, as workers sharing a cold cache may ingest the same file at the same time.
+        tmp_cache_path: str = '{0}.{1}.tmp'.format(cache_path, os.getpid())
+        shutil.rmtree(tmp_cache_path, ignore_errors=True)
+        os.makedirs(tmp_cache_path)
+
+        for resolution in TickerResolution.rollups:
+            rollup_cache_path: str = TickerCacheService.rollup_cache_path(tmp_cache_path, resolution)
+            os.makedirs(rollup_cache_path)
+            TickerCacheService._write_columns(rollup_cache_path, rollup_ticker_df(
+                ticker_df, resolution, TickerCacheService.minute_column), {
+                'resolution': resolution,
+                'ticker_columns': ticker_df.columns.tolist()
+            })
+        TickerCacheService._write_columns(tmp_cache_path, ticker_df, {
+            'source_filename': os.path.basename(ticker_filepath),
+            'source_mtime_ns': stat.st_mtime_ns,
+            'source_size': stat.st_size
+        })
+
+        try:
+            os.rename(tmp_cache_path, cache_path)
+        except OSError:
+            # The cache exists, either stale or just ingested by another worker. A stale one is moved aside under a
+            # per-process name before the new one takes its place, so no worker removes a cache another one renamed in.
+            if not TickerCacheService.is_fresh(ticker_filepath, cache_path):
+                stale_cache_path: str = '{0}.{1}.stale'.format(cache_path, os.getpid())
+                try:
+                    os.rename(cache_path, stale_cache_path)
+                    os.rename(tmp_cache_path, cache_path)
+                except OSError:
+                    # Another worker replaced the stale cache first.
+                    pass
+                shutil.rmtree(stale_cache_path, ignore_errors=True)
+            shutil.rmtree(tmp_cache_path, ignore_errors=True)
+
+    @staticmethod
+    def _write_columns(cache_path: str, ticker_df: pandas.DataFrame, manifest: Dict):
+        """
+        Write every column of ticker_df with its rows grouped by pair, then a manifest with the format version, the row
+        count, the column specs, the row range of each pair and the entries of manifest.
+        """
+        pair_column_names: List[str] = [column_name for column_name in pair_columns
+                                        if column_name in ticker_df.columns]
+        # A stable sort, so the rows of each pair stay in minute order.
+        ticker_df = ticker_df.sort_values(pair_column_names, kind='mergesort') if pair_column_names else ticker_df
+        is_pair_start: numpy.ndarray = numpy.zeros(len(ticker_df), dtype=bool)
+        is_pair_start[:1] = True
+        for column_name in pair_column_names:
+            column_values: numpy.ndarray = ticker_df[column_name].values
+            is_pair_start[1:] |= column_values[1:] != column_values[:-1]
+        pair_starts: numpy.ndarray = numpy.flatnonzero(is_pair_start)
+        pair_row_ranges: List[Dict] = [dict({
+            column_name: TickerCacheService._json_value(ticker_df[column_name].values[start])
+            for column_name in pair_column_names
+        }, start=int(start), end=int(end)) for start, end in zip(pair_starts, numpy.append(pair_starts[1:],
+                                                                                           len(ticker_df)))]
+
+        columns: List[Dict] = []
+        for column_name in ticker_df.columns:
+            columns.append(TickerCacheService._write_column(cache_path, column_name, ticker_df[column_name]))
+        manifest = dict(manifest, **{
+            'format_version': TickerCacheService.format_version,
+            'num_rows': len(ticker_df),
+            'columns': columns,
+            'pair_row_ranges': pair_row_ranges
+        })
+        with open(os.path.join(cache_path, TickerCacheService.manifest_filename), 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+
+    @staticmethod
+    def _json_value(value):
+        return value.item() if isinstance(value, numpy.generic) else value
+
+    @staticmethod
+    def _write_column(cache_path: str, column_name: str, column: pandas.Series) -> Dict:
+        column_spec: Dict = {'name': column_name}
+        if pandas.api.types.is_datetime64_any_dtype(column.dtype):
+            column_spec['kind'] = 'datetime'
+            column_spec['tz'] = str(column.dt.tz) if column.dt.tz is not None else None
+            if column.dt.tz is not None:
+                column = column.dt.tz_convert('UTC').dt.tz_localize(None)
+            values: numpy.ndarray = column.values.astype('datetime64[ns]')
+        elif pandas.api.types.is_numeric_dtype(column.dtype) or pandas.api.types.is_bool_dtype(column.dtype):
+            column_spec['kind'] = 'numeric'
+            values: numpy.ndarray = column.values
+        else:
+            codes, categories = pandas.factorize(column)
+            column_spec['kind'] = 'category'
+            column_spec['categories'] = categories.tolist()
+            values: numpy.ndarray = codes.astype(numpy.int32)
+
+        numpy.save(os.path.join(cache_path, '{0}.npy'.format(column_name)), values, allow_pickle=False)
+        return column_spec
+
+    @staticmethod
+    def load_cached_file(cache_path: str, column_names: Optional[List[str]] = None,
+                         pairs: Optional[List['Pair']] = None, exchange_id: Optional[int] = None) -> pandas.DataFrame:
+        """
+        Memory-map a cached ticker file. The returned DataFrame has the same columns and index as the CSV code path,
+        with its rows sorted by minute.
+
+        Args:
+            column_names: if given, only these columns are loaded
+            pairs: if given, only the rows of these pairs are loaded
+            exchange_id: if given, only the rows of this exchange are loaded
+        """
+        manifest: Dict = TickerCacheService.read_manifest(cache_path)
+        rows: Union[slice, numpy.ndarray] = TickerCacheService._pair_rows(cache_path, manifest, pairs, exchange_id)
+        column_specs: List[Dict] = [column_spec for column_spec in manifest['columns']
+                                    if column_names is None or column_spec['name'] in column_names]
+        data: Dict = {}
+        for column_spec in column_specs:
+            # A slice of a memory-mapped column is still memory-mapped.
+            values: numpy.ndarray = numpy.load(os.path.join(cache_path, '{0}.npy'.format(column_spec['name'])),
+                                               mmap_mode='r', allow_pickle=False)[rows]
+            if column_spec['kind'] == 'datetime':
+                column = pandas.DatetimeIndex(values)
+                if column_spec['tz'] is not None:
+                    column = column.tz_localize('UTC').tz_convert(column_spec['tz'])
+            elif column_spec['kind'] == 'category':
+                column = pandas.Categorical.from_codes(values, categories=column_spec['categories'])
+            else:
+                column = values
+            data[column_spec['name']] = column
+        return pandas.DataFrame(data, columns=[column_spec['name'] for column_spec in column_specs])
+
+    @staticmethod
+    def _pair_rows(cache_path: str, manifest: Dict, pairs: Optional[List['Pair']],
+                   exchange_id: Optional[int]) -> Union[slice, numpy.ndarray]:
+        """
+        Returns:
+            The rows of the given pairs and exchange in minute order: a slice if they are one pair's range, else the
+            positions of the rows.
+        """
+        pair_keys: Optional[Set[Tuple[str, str]]] = {(pair.base, pair.quote) for pair in pairs} \
+            if pairs is not None else None
+        pair_row_ranges: List[Dict] = [
+            pair_row_range for pair_row_range in manifest['pair_row_ranges']
+            if (exchange_id is None or pair_row_range.get('exchange_id', exchange_id) == exchange_id) and
+               (pair_keys is None or (pair_row_range.get('base'), pair_row_range.get('quote')) in pair_keys)]
+        if not pair_row_ranges:
+            return slice(0, 0)
+        if len(pair_row_ranges) == 1:
+            return slice(pair_row_ranges[0]['start'], pair_row_ranges[0]['end'])
+
+        rows: numpy.ndarray = numpy.concatenate([numpy.arange(pair_row_range['start'], pair_row_range['end'])
+                                                 for pair_row_range in pair_row_ranges])
+        minute_values: numpy.ndarray = numpy.load(
+            os.path.join(cache_path, '{0}.npy'.format(TickerCacheService.minute_column)), mmap_mode='r',
+            allow_pickle=False)
+        # A stable sort keeps the tickers of a minute in file order within each pair.
+        return rows[numpy.argsort(minute_values[rows], kind='mergesort')]
+
+    @staticmethod
+    def load_ticker_df(ticker_dir: str, ticker_filename: str, ticker_cache_dir: Optional[str] = None,
+                       resolution: str = TickerResolution.minute, pairs: Optional[List['Pair']] = None,
+                       exchange_id: Optional[int] = None) -> pandas.DataFrame:
+        """
+        Load a ticker file indexed by the minute key. If a cache directory is given, the file is read from the cache and
+        only parsed from CSV if its cache is missing or stale.
+
+        Args:
+            resolution: a TickerResolution. Rollups are only stored in the cache, so a ticker_cache_dir is required for
+                any other resolution than minute. The tickers of a rollup are indexed by the start of their bar.
+            pairs: if given, only the tickers of these pairs are loaded. Only their rows are read from the cache.
+            exchange_id: if given, only the tickers of this exchange are loaded
+        """
+        ticker_filepath: str = os.path.join(ticker_dir, ticker_filename)
+        if ticker_cache_dir is None:
+            if resolution != TickerResolution.minute:
+                raise ValueError('{0} rollups are only built in the ticker cache'.format(resolution))
+            ticker_df: pandas.DataFrame = TickerCacheService.read_ticker_csv(ticker_filepath)
+            is_loaded: numpy.ndarray = numpy.ones(len(ticker_df), dtype=bool)
+            if exchange_id is not None and 'exchange_id' in ticker_df.columns:
+                is_loaded &= ticker_df['exchange_id'].values == exchange_id
+            if pairs is not None:
+                is_pair: numpy.ndarray = numpy.zeros(len(ticker_df), dtype=bool)
+                for pair in pairs:
+                    is_pair |= (ticker_df['base'].values == pair.base) & (ticker_df['quote'].values == pair.quote)
+                is_loaded &= is_pair
+            ticker_df = ticker_df[is_loaded]
+        else:
+            cache_path: str = TickerCacheService.cache_path(ticker_cache_dir, ticker_filename)
+            if not TickerCacheService.is_fresh(ticker_filepath, cache_path):
+                os.makedirs(ticker_cache_dir, exist_ok=True)
+                TickerCacheService.ingest_file(ticker_filepath, cache_path)
+            if resolution == TickerResolution.minute:
+                ticker_df: pandas.DataFrame = TickerCacheService.load_cached_file(cache_path, pairs=pairs,
+                                                                                  exchange_id=exchange_id)
+            else:
+                rollup_cache_path: str = TickerCacheService.rollup_cache_path(cache_path, resolution)
+                # The high, low and close columns aren't fields of a Ticker.
+                ticker_df: pandas.DataFrame = TickerCacheService.load_cached_file(
+                    rollup_cache_path, TickerCacheService.read_manifest(rollup_cache_path)['ticker_columns'], pairs,
+                    exchange_id)
+
+        ticker_df.set_index(TickerCacheService.minute_column, inplace=True)
+        return ticker_df
+
+
+def get_cli_args() -> Dict:
+    parser = argparse.ArgumentParser(description='Build the binary ticker cache used by backtests.')
+    parser.add_argument('--ticker_dir', required=True, help='Absolute path of the ticker directory.')
+    parser.add_argument('--ticker_cache_dir', required=True, help='Absolute path of the ticker cache directory.')
+    return vars(parser.parse_args())
+
+
+if __name__ == '__main__':
+    arg_dict = get_cli_args()
+    for ingested_filename in TickerCacheService.ingest(arg_dict.get('ticker_dir'), arg_dict.get('ticker_cache_dir')):
+        print('ingested {0}'.format(ingested_filename))
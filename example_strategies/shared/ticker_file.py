@@ -0,0 +1,93 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy
+import pandas
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.ticker import Ticker
+from trading_platform.exchanges.exchange_service_abc import ExchangeServiceAbc
+
+from example_strategies.shared.minute_index import MinuteIndex
+
+
+class TickerFile:
+    """
+    The tickers of one ticker file for one exchange, with the numerical fields converted to FinancialData up front.
+
+    The dtype of numerical fields in a ticker DataFrame is float, and the application code expects FinancialData.
+    Instead of converting each field of each Ticker in the backtest loop, every float column is converted once when the
+    file is loaded. Prices repeat heavily across minutes, so only the distinct values of a column are converted and the
+    results are broadcast back to the rows.
+    """
+
+    def __init__(self, columns: Dict[str, numpy.ndarray], minute_index: MinuteIndex):
+        self.columns: Dict[str, numpy.ndarray] = columns
+        self.minute_index: MinuteIndex = minute_index
+        self.pair_names: Dict[Tuple[str, str], str] = {}
+
+    @staticmethod
+    def from_ticker_df(ticker_df: pandas.DataFrame, exchange_id: Optional[int] = None) -> 'TickerFile':
+        """
+        Args:
+            ticker_df: tickers sorted and indexed by minute, as returned by TickerCacheService.load_ticker_df
+            exchange_id: if given, only the tickers of this exchange are kept
+        """
+        if exchange_id is not None and 'exchange_id' in ticker_df.columns:
+            ticker_df = ticker_df[ticker_df['exchange_id'].values == exchange_id]
+
+        columns: Dict[str, numpy.ndarray] = {}
+        for column_name in ticker_df.columns:
+            column: pandas.Series = ticker_df[column_name]
+            if pandas.api.types.is_float_dtype(column.dtype):
+                columns[column_name] = TickerFile.to_financial_data(column.values)
+            else:
+                # Timestamps stay pandas.Timestamp and categorical codes become their values.
+                columns[column_name] = column.astype(object).values
+
+        return TickerFile(columns, MinuteIndex.from_ticker_df(ticker_df))
+
+    @staticmethod
+    def to_financial_data(values: numpy.ndarray) -> numpy.ndarray:
+        """
+        Convert an array of floats to an object array of FinancialData. NaN becomes None.
+        """
+        unique_values, inverse = numpy.unique(values, return_inverse=True)
+        converted_values: numpy.ndarray = numpy.empty(len(unique_values), dtype=object)
+        for i, value in enumerate(unique_values.tolist()):
+            converted_values[i] = None if value != value else FinancialData(value)
+        return converted_values[inverse.reshape(-1)]
+
+    def __len__(self) -> int:
+        return len(self.minute_index)
+
+    def minute(self, position: int) -> pandas.Timestamp:
+        return self.minute_index.minute(position)
+
+    def tickers(self, position: int) -> Dict[str, Ticker]:
+        """
+        Returns:
+            The tickers of the minute at position, keyed by pair name.
+        """
+        rows: slice = self.minute_index.rows(position)
+        column_names: List[str] = list(self.columns.keys())
+        tickers: Dict[str, Ticker] = {}
+        for row in zip(*[self.columns[column_name][rows] for column_name in column_names]):
+            ticker: Ticker = Ticker(**dict(zip(column_names, row)))
+            tickers[self.pair_name(ticker.base, ticker.quote)] = ticker
+        return tickers
+
+    def set_latest_tickers(self, exchange: ExchangeServiceAbc, position: int):
+        """
+        Update the exchange with the tickers of the minute at position. Pairs without a ticker in that minute keep their
+        previous ticker.
+        """
+        latest_tickers: Dict[str, Ticker] = dict(exchange.get_tickers())
+        latest_tickers.update(self.tickers(position))
+        exchange.set_tickers(latest_tickers)
+
+    def pair_name(self, base: str, quote: str) -> str:
+        pair_name: Optional[str] = self.pair_names.get((base, quote))
+        if pair_name is None:
+            pair_name = Pair(base=base, quote=quote).name
+            self.pair_names[(base, quote)] = pair_name
+        return pair_name
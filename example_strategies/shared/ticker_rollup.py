@@ -0,0 +1,91 @@
+from typing import TYPE_CHECKING, Dict, List
+
+from example_strategies.shared.step_schedule import StepSchedule, nanoseconds_per_hour
+
+if TYPE_CHECKING:
+    import pandas
+
+
+class TickerResolution:
+    # The ticker files as recorded.
+    minute: str = 'minute'
+    # One ticker per pair per hour or day, built by TickerCacheService at ingest.
+    hour: str = 'hour'
+    day: str = 'day'
+
+    all: List[str] = [minute, hour, day]
+    rollups: List[str] = [hour, day]
+
+    durations_ns: Dict[str, int] = {
+        minute: 60 * 10 ** 9,
+        hour: nanoseconds_per_hour,
+        day: 24 * nanoseconds_per_hour
+    }
+
+
+# Columns whose high, low and close within each bar are stored next to the rollup tickers.
+ohlc_columns: List[str] = ['bid', 'ask', 'last']
+# Columns that identify the pair of a ticker.
+pair_columns: List[str] = ['exchange_id', 'base', 'quote']
+
+
+def coarsest_resolution(step_schedule: StepSchedule, max_resolution: str = TickerResolution.day) -> str:
+    """
+    Returns:
+        The coarsest resolution no coarser than max_resolution at which a backtest steps at the same minutes as on the
+        minute-level tickers. Every step time must fall on the start of a bar. Steps are on a grid aligned to the
+        epoch, so the step interval must be a multiple of the bar, and there must be no jitter. An interval that isn't
+        a whole number of days falls back to a finer resolution: e.g. DCA's default of 4 executions per month steps
+        every 7.5 days, every other step at noon, so it reads the hourly rollup.
+    """
+    for resolution in reversed(TickerResolution.all[:TickerResolution.all.index(max_resolution) + 1]):
+        duration_ns: int = TickerResolution.durations_ns[resolution]
+        if resolution == TickerResolution.minute or (
+                step_schedule.jitter_ns == 0 and step_schedule.interval_ns % duration_ns == 0):
+            return resolution
+    return TickerResolution.minute
+
+
+def rollup_ticker_df(ticker_df: 'pandas.DataFrame', resolution: str, minute_column: str) -> 'pandas.DataFrame':
+    """
+    Aggregate minute-level tickers into one ticker per pair per bar of the resolution.
+
+    A bar's ticker is the one a backtest stepping at the start of the bar would see: the last ticker of the pair in the
+    first minute of the bar in which the pair has one. Its minute is replaced by the start of the bar, or by the first
+    minute of the file for a bar that starts before the file, so that no step is scheduled twice across files. The high,
+    low and close of the ohlc_columns within the bar are added as <column>_high, <column>_low and <column>_close.
+
+    Args:
+        ticker_df: tickers sorted by minute_column, as returned by TickerCacheService.read_ticker_csv
+    """
+    # Imported here, as only ingest builds rollups and live runs don't import pandas.
+    import pandas
+
+    if len(ticker_df) == 0:
+        return ticker_df.copy()
+    bar_starts: pandas.Series = ticker_df[minute_column].dt.floor(
+        pandas.Timedelta(TickerResolution.durations_ns[resolution]))
+    bar_starts = bar_starts.where(bar_starts >= ticker_df[minute_column].iloc[0], ticker_df[minute_column].iloc[0])
+    group_keys: List = [bar_starts.rename('bar_start')] + [ticker_df[column_name] for column_name in pair_columns
+                                                           if column_name in ticker_df.columns]
+
+    # The rows of the first minute of each pair in each bar, of which the last is the bar's ticker.
+    first_minutes: pandas.Series = ticker_df[minute_column].groupby(group_keys, sort=False).transform('min')
+    is_first_minute: pandas.Series = ticker_df[minute_column] == first_minutes
+    first_minute_groups: pandas.core.groupby.DataFrameGroupBy = ticker_df[is_first_minute].groupby(
+        [group_key[is_first_minute] for group_key in group_keys], sort=False)
+    # tail keeps the rows in their order, which is sorted by minute.
+    rollup_df: pandas.DataFrame = first_minute_groups.tail(1).copy()
+    rollup_df[minute_column] = bar_starts[rollup_df.index]
+
+    column_groups: pandas.core.groupby.DataFrameGroupBy = ticker_df.groupby(group_keys, sort=False)
+    for column_name in ohlc_columns:
+        if column_name not in ticker_df.columns:
+            continue
+        for aggregation, function_name in [('high', 'max'), ('low', 'min'), ('close', 'last')]:
+            aggregated: pandas.Series = column_groups[column_name].transform(function_name)
+            rollup_df['{0}_{1}'.format(column_name, aggregation)] = aggregated[rollup_df.index].values
+
+    rollup_df.sort_values(minute_column, kind='mergesort', inplace=True)
+    rollup_df.reset_index(drop=True, inplace=True)
+    return rollup_df
@@ -0,0 +1,146 @@
+import logging
+import os
+import queue
+import threading
+from typing import TYPE_CHECKING, Iterator, List, Optional, Set
+
+import numpy
+import pandas
+
+from example_strategies.shared.minute_index import MinuteIndex
+from example_strategies.shared.stage_timer import StageTimer
+from example_strategies.shared.step_schedule import StepSchedule
+from example_strategies.shared.ticker_cache_service import TickerCacheService
+from example_strategies.shared.ticker_file import TickerFile
+from example_strategies.shared.ticker_rollup import TickerResolution
+
+if TYPE_CHECKING:
+    from trading_platform.exchanges.data.pair import Pair
+
+_end_of_stream: object = object()
+
+
+class TickerBatch:
+    """
+    The tickers of up to batch_minutes consecutive minutes of one ticker file.
+    """
+
+    def __init__(self, **kwargs):
+        self.ticker_filename: str = kwargs.get('ticker_filename')
+        self.ticker_file: TickerFile = kwargs.get('ticker_file')
+        # Positions in ticker_file at which the strategy is scheduled to step.
+        self.step_positions: numpy.ndarray = kwargs.get('step_positions')
+        self.is_start_of_file: bool = kwargs.get('is_start_of_file')
+        self.is_end_of_file: bool = kwargs.get('is_end_of_file')
+
+
+class TickerStream:
+    """
+    Streams the ticker files of a directory in batches of minutes, read on a background thread.
+
+    While the backtest simulates one batch, the reader thread loads and converts the next ones, so reading and
+    simulating overlap. The queue between them holds at most max_queued_batches batches, and only the rows of a batch
+    are converted to FinancialData. Files in the ticker cache are memory-mapped, so the rows of a batch are only read
+    from disk when it is converted, and memory use depends on batch_minutes rather than on the size of the files.
+    Without a ticker cache, each CSV file is parsed whole, so memory use also grows with the size of the largest file.
+    """
+
+    def __init__(self, **kwargs):
+        self.logger: logging.Logger = kwargs.get('logger')
+        self.ticker_dir: str = kwargs.get('ticker_dir')
+        self.ticker_cache_dir: Optional[str] = kwargs.get('ticker_cache_dir')
+        # A TickerResolution. Hourly and daily rollups are read from the ticker cache, and each of their bars is
+        # streamed as a minute.
+        self.resolution: str = kwargs.get('resolution', TickerResolution.minute)
+        # If set, only the tickers of this exchange are streamed.
+        self.exchange_id: Optional[int] = kwargs.get('exchange_id')
+        # If set, only the tickers of these pairs are read and converted.
+        self.pairs: Optional[List['Pair']] = kwargs.get('pairs')
+        self.step_schedule: StepSchedule = kwargs.get('step_schedule')
+        self.batch_minutes: int = kwargs.get('batch_minutes', 24 * 60)
+        self.max_queued_batches: int = kwargs.get('max_queued_batches', 2)
+        self.stage_timer: StageTimer = kwargs.get('stage_timer') or StageTimer()
+        # If set, only these files are streamed, e.g. the time range of a shard of a parameter sweep.
+        self.ticker_filenames: Optional[List[str]] = kwargs.get('ticker_filenames')
+        # Files that aren't streamed, e.g. those already simulated by a resumed backtest.
+        self.skip_ticker_filenames: Set[str] = set(kwargs.get('skip_ticker_filenames', []))
+
+    def __iter__(self) -> Iterator[TickerBatch]:
+        batch_queue: queue.Queue = queue.Queue(maxsize=self.max_queued_batches)
+        stop_event: threading.Event = threading.Event()
+        reader: threading.Thread = threading.Thread(target=self._read, args=(batch_queue, stop_event),
+                                                    name='ticker_stream_reader', daemon=True)
+        reader.start()
+        try:
+            while True:
+                item = batch_queue.get()
+                if item is _end_of_stream:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Also reached if the consumer stops early, in which case the reader must not block on a full queue.
+            stop_event.set()
+            reader.join()
+
+    def batches(self) -> Iterator[TickerBatch]:
+        """
+        Read the batches on the calling thread.
+        """
+        all_ticker_filenames: List[str] = self.ticker_filenames if self.ticker_filenames is not None else os.listdir(
+            self.ticker_dir)
+        ticker_filenames: List[str] = [ticker_filename for ticker_filename in sorted(all_ticker_filenames)
+                                       if ticker_filename not in self.skip_ticker_filenames]
+        for ticker_filename in ticker_filenames:
+            with self.stage_timer.time('load'):
+                ticker_df: pandas.DataFrame = TickerCacheService.load_ticker_df(**{
+                    'ticker_dir': self.ticker_dir,
+                    'ticker_filename': ticker_filename,
+                    'ticker_cache_dir': self.ticker_cache_dir,
+                    'resolution': self.resolution,
+                    'pairs': self.pairs,
+                    'exchange_id': self.exchange_id
+                })
+
+                # Step positions are computed over the whole file, so that steps due between batches aren't dropped.
+                minute_index: MinuteIndex = MinuteIndex.from_ticker_df(ticker_df)
+                step_positions: numpy.ndarray = self.step_schedule.step_positions(minute_index.minutes)
+
+            batch_starts: List[int] = list(range(0, len(minute_index), self.batch_minutes)) or [0]
+            for batch_start in batch_starts:
+                batch_end: int = min(batch_start + self.batch_minutes, len(minute_index))
+                batch_rows: slice = slice(int(minute_index.offsets[batch_start]),
+                                          int(minute_index.offsets[batch_end]))
+                batch_step_positions: numpy.ndarray = step_positions[
+                    (step_positions >= batch_start) & (step_positions < batch_end)]
+                with self.stage_timer.time('convert'):
+                    ticker_file: TickerFile = TickerFile.from_ticker_df(ticker_df.iloc[batch_rows])
+                yield TickerBatch(**{
+                    'ticker_filename': ticker_filename,
+                    'ticker_file': ticker_file,
+                    'step_positions': batch_step_positions - batch_start,
+                    'is_start_of_file': batch_start == 0,
+                    'is_end_of_file': batch_end == len(minute_index)
+                })
+
+    def _read(self, batch_queue: queue.Queue, stop_event: threading.Event):
+        try:
+            for batch in self.batches():
+                if not self._put(batch_queue, batch, stop_event):
+                    return
+            item = _end_of_stream
+        except Exception as exception:
+            # Raised on the consumer's thread.
+            item = exception
+        self._put(batch_queue, item, stop_event)
+
+    @staticmethod
+    def _put(batch_queue: queue.Queue, item, stop_event: threading.Event) -> bool:
+        while not stop_event.is_set():
+            try:
+                batch_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
@@ -0,0 +1,186 @@
+import logging
+import os
+from typing import Callable, Dict, List, Optional
+
+import numpy
+import pandas
+from trading_platform.exchanges.data.pair import Pair
+
+from example_strategies.shared.minute_index import MinuteIndex
+from example_strategies.shared.step_schedule import StepSchedule, nanoseconds_per_hour
+from example_strategies.shared.ticker_cache_service import TickerCacheService
+
+no_order: int = 0
+buy_order: int = 1
+sell_order: int = -1
+
+
+class VectorizedBacktest:
+    """
+    Backtests a strategy whose orders depend only on the step time and the prices of the traded pair, with array
+    operations over the whole series instead of stepping a BacktestExchangeService.
+
+    The ticker files are loaded once, after which each run computes the step times, the side of each order and the
+    balances after each step. A run of consecutive orders of the same side scales the spent balance by the same factor
+    at every order, so the balances of a whole run are a cumulative product, and only the alternations between buy and
+    sell runs are looped over.
+
+    Like BacktestService, steps are scheduled within each ticker file, the exchange only sees the tickers of the
+    minutes at which the strategy steps, and orders fill immediately at the padded price. Balances are float64 rather
+    than FinancialData, so results match the event-driven backtest up to float rounding.
+    """
+
+    def __init__(self, **kwargs):
+        self.logger: logging.Logger = kwargs.get('logger')
+        self.ticker_dir: str = kwargs.get('ticker_dir')
+        self.ticker_cache_dir: Optional[str] = kwargs.get('ticker_cache_dir')
+        # If set, only these ticker files are loaded, as in BacktestService.
+        self.ticker_filenames: Optional[List[str]] = kwargs.get('ticker_filenames')
+        self.exchange_id: int = kwargs.get('exchange_id')
+        self.pair: Pair = kwargs.get('pair')
+
+        # The minutes of each ticker file, for computing step schedules.
+        self.file_minutes: List[pandas.DatetimeIndex] = []
+        # The last ticker of the pair in each minute in which it has one.
+        self.pair_minute_values: numpy.ndarray = numpy.zeros(0, dtype=numpy.int64)
+        self.pair_asks: numpy.ndarray = numpy.zeros(0)
+        self.pair_bids: numpy.ndarray = numpy.zeros(0)
+
+    def load(self):
+        pair_minute_values: List[numpy.ndarray] = []
+        pair_asks: List[numpy.ndarray] = []
+        pair_bids: List[numpy.ndarray] = []
+        for ticker_filename in sorted(self.ticker_filenames if self.ticker_filenames is not None else
+                                      os.listdir(self.ticker_dir)):
+            self.logger.info(ticker_filename)
+            # Like BacktestService, only the pair's tickers are loaded, so steps fire in the minutes in which it has
+            # one.
+            pair_df: pandas.DataFrame = TickerCacheService.load_ticker_df(**{
+                'ticker_dir': self.ticker_dir,
+                'ticker_filename': ticker_filename,
+                'ticker_cache_dir': self.ticker_cache_dir,
+                'pairs': [self.pair],
+                'exchange_id': self.exchange_id
+            })
+            self.file_minutes.append(MinuteIndex.from_ticker_df(pair_df).minutes)
+            minute_values: numpy.ndarray = pair_df.index.values.astype('datetime64[ns]').view(numpy.int64)
+            # Later tickers of a minute replace earlier ones, as in TickerFile.tickers.
+            is_last_of_minute: numpy.ndarray = numpy.append(minute_values[1:] != minute_values[:-1], True)[
+                :len(minute_values)]
+            pair_minute_values.append(minute_values[is_last_of_minute])
+            pair_asks.append(pair_df['ask'].values.astype(numpy.float64)[is_last_of_minute])
+            pair_bids.append(pair_df['bid'].values.astype(numpy.float64)[is_last_of_minute])
+
+        if pair_minute_values:
+            self.pair_minute_values = numpy.concatenate(pair_minute_values)
+            self.pair_asks = numpy.concatenate(pair_asks)
+            self.pair_bids = numpy.concatenate(pair_bids)
+
+    def step_minute_values(self, step_schedule: StepSchedule) -> numpy.ndarray:
+        """
+        Returns:
+            The minutes at which BacktestService would step, in nanoseconds since the epoch.
+        """
+        step_minute_values: List[numpy.ndarray] = [numpy.zeros(0, dtype=numpy.int64)]
+        for minutes in self.file_minutes:
+            minute_values: numpy.ndarray = minutes.values.astype('datetime64[ns]').view(numpy.int64)
+            step_minute_values.append(minute_values[step_schedule.step_positions(minutes)])
+        return numpy.concatenate(step_minute_values)
+
+    def step_prices(self, step_minute_values: numpy.ndarray) -> Dict[str, numpy.ndarray]:
+        """
+        Returns:
+            The ask and bid of the pair as seen by the exchange at each step: the pair's ticker of the step's minute, or
+            else of the last step or initial minute that had one. NaN before the pair's first ticker.
+        """
+        step_asks: numpy.ndarray = numpy.full(len(step_minute_values), numpy.nan)
+        step_bids: numpy.ndarray = numpy.full(len(step_minute_values), numpy.nan)
+        if len(self.pair_minute_values) == 0:
+            return {'ask': step_asks, 'bid': step_bids}
+
+        # The exchange is initialised with the tickers of the first minute of the backtest.
+        first_minute_values: List[int] = [int(minutes.values.astype('datetime64[ns]').view(numpy.int64)[0])
+                                          for minutes in self.file_minutes if len(minutes) > 0][:1]
+        seen_minute_values: numpy.ndarray = numpy.concatenate(
+            (numpy.array(first_minute_values, dtype=numpy.int64), step_minute_values))
+
+        ticker_positions: numpy.ndarray = numpy.minimum(numpy.searchsorted(self.pair_minute_values, seen_minute_values),
+                                                        len(self.pair_minute_values) - 1)
+        has_ticker: numpy.ndarray = self.pair_minute_values[ticker_positions] == seen_minute_values
+        # Forward fill the last seen ticker of the pair.
+        last_seen: numpy.ndarray = numpy.maximum.accumulate(
+            numpy.where(has_ticker, numpy.arange(len(seen_minute_values)), -1))[len(first_minute_values):]
+        is_known: numpy.ndarray = last_seen >= 0
+        known_positions: numpy.ndarray = ticker_positions[last_seen[is_known]]
+        step_asks[is_known] = self.pair_asks[known_positions]
+        step_bids[is_known] = self.pair_bids[known_positions]
+        return {'ask': step_asks, 'bid': step_bids}
+
+    def run(self, **kwargs) -> Dict:
+        """
+        Args:
+         kwargs: Dict
+            step_schedule: StepSchedule
+            order_sides: Callable[[numpy.ndarray], numpy.ndarray], the side of the order placed at each UTC hour
+            balance_percent_per_trade: float
+            order_padding_percent: float
+            initial_base_capital: float
+
+        Returns:
+            The step times, order sides and balances after each step, and the final balances and order counts.
+        """
+        order_sides_of_hours: Callable[[numpy.ndarray], numpy.ndarray] = kwargs.get('order_sides')
+        fraction: float = float(kwargs.get('balance_percent_per_trade'))
+        padding: float = float(kwargs.get('order_padding_percent'))
+
+        step_minute_values: numpy.ndarray = self.step_minute_values(kwargs.get('step_schedule'))
+        prices: Dict[str, numpy.ndarray] = self.step_prices(step_minute_values)
+        order_sides: numpy.ndarray = order_sides_of_hours((step_minute_values // nanoseconds_per_hour) % 24)
+        # Steps before the pair's first ticker can't place an order.
+        order_sides = numpy.where(numpy.isnan(prices['ask']) | numpy.isnan(prices['bid']), no_order, order_sides)
+
+        buy_prices: numpy.ndarray = prices['ask'] * (1 + padding)
+        sell_prices: numpy.ndarray = prices['bid'] * (1 - padding)
+        step_count: int = len(step_minute_values)
+        base_balances: numpy.ndarray = numpy.empty(step_count)
+        quote_balances: numpy.ndarray = numpy.empty(step_count)
+        base_balance: float = float(kwargs.get('initial_base_capital'))
+        quote_balance: float = 0.0
+        buy_order_count: int = 0
+        sell_order_count: int = 0
+
+        run_starts: numpy.ndarray = numpy.flatnonzero(numpy.diff(order_sides)) + 1
+        for start, end in zip(numpy.concatenate(([0], run_starts)), numpy.concatenate((run_starts, [step_count]))):
+            if start == end:
+                continue
+            order_side: int = order_sides[start]
+            # The share of the spent balance left before each order of the run.
+            remaining: numpy.ndarray = (1 - fraction) ** numpy.arange(end - start)
+            if order_side == buy_order:
+                spent: numpy.ndarray = base_balance * remaining * fraction
+                base_balances[start:end] = base_balance * remaining * (1 - fraction)
+                quote_balances[start:end] = quote_balance + numpy.cumsum(spent / buy_prices[start:end])
+                buy_order_count += int(numpy.count_nonzero(spent > 0))
+            elif order_side == sell_order:
+                spent: numpy.ndarray = quote_balance * remaining * fraction
+                quote_balances[start:end] = quote_balance * remaining * (1 - fraction)
+                base_balances[start:end] = base_balance + numpy.cumsum(spent * sell_prices[start:end])
+                sell_order_count += int(numpy.count_nonzero(spent > 0))
+            else:
+                base_balances[start:end] = base_balance
+                quote_balances[start:end] = quote_balance
+            base_balance = float(base_balances[end - 1])
+            quote_balance = float(quote_balances[end - 1])
+
+        return {
+            'step_times': step_minute_values,
+            'order_sides': order_sides,
+            'base_balances': base_balances,
+            'quote_balances': quote_balances,
+            # Valued at the bid, what the quote balance would sell for without padding.
+            'portfolio_values': base_balances + quote_balances * numpy.nan_to_num(prices['bid']),
+            'final_base_balance': base_balance,
+            'final_quote_balance': quote_balance,
+            'buy_order_count': buy_order_count,
+            'sell_order_count': sell_order_count
+        }
@@ -0,0 +1,56 @@
+import os
+from typing import List, Tuple
+
+import numpy
+import pandas
+import pytest
+
+# The (base, quote) of the pairs in the generated ticker files.
+ticker_pairs: List[Tuple[str, str]] = [('USDT', 'BTC'), ('USDT', 'ETH'), ('BTC', 'ETH')]
+
+
+def write_ticker_csv(ticker_filepath: str, start: str, minutes: int, seed: int = 0) -> pandas.DataFrame:
+    """
+    Write a ticker file in the format of the recorded ones: a few pairs with a random walk of prices, pairs missing
+    from some minutes, and some minutes with several tickers of a pair at different seconds.
+
+    Returns:
+        The rows written.
+    """
+    random_state: numpy.random.RandomState = numpy.random.RandomState(seed)
+    rows: List[dict] = []
+    start_timestamp: pandas.Timestamp = pandas.Timestamp(start, tz='UTC')
+    for pair_index, (base, quote) in enumerate(ticker_pairs):
+        price: float = 100.0 * (pair_index + 1)
+        for minute in range(minutes):
+            # Each pair has no ticker in about a tenth of the minutes.
+            if random_state.rand() < 0.1:
+                continue
+            for second in sorted(random_state.choice(60, random_state.randint(1, 3), replace=False)):
+                price *= numpy.exp(random_state.normal(0, 0.001))
+                rows.append({
+                    'exchange_id': 1,
+                    'base': base,
+                    'quote': quote,
+                    'bid': price * 0.999,
+                    'ask': price * 1.001,
+                    'last': price,
+                    # Rounded to the nearest minute by the cache, so seconds stay in the first half of the minute.
+                    'app_create_timestamp': start_timestamp + pandas.Timedelta(minutes=minute,
+                                                                               seconds=int(second) // 2)
+                })
+    ticker_df: pandas.DataFrame = pandas.DataFrame(rows).sort_values('app_create_timestamp', kind='mergesort')
+    ticker_df.to_csv(ticker_filepath, index=False)
+    return ticker_df
+
+
+@pytest.fixture
+def ticker_dir(tmp_path) -> str:
+    """
+    A ticker directory with two consecutive files of two days each.
+    """
+    ticker_dir: str = str(tmp_path / 'tickers')
+    os.makedirs(ticker_dir)
+    write_ticker_csv(os.path.join(ticker_dir, 'tickers_20180101.csv'), '2018-01-01 00:00', 2 * 24 * 60, seed=1)
+    write_ticker_csv(os.path.join(ticker_dir, 'tickers_20180103.csv'), '2018-01-03 00:00', 2 * 24 * 60, seed=2)
+    return ticker_dir
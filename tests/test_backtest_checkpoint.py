@@ -0,0 +1,105 @@
+import csv
+import os
+import pickle
+import time
+from typing import Dict, List
+
+import pytest
+
+from example_strategies.shared.backtest_checkpoint import BacktestCheckpoint
+from example_strategies.shared.profit_history_writer import ProfitHistoryWriter
+
+properties: Dict = {'executions_per_month': 4, 'order_padding_percent': '0.01', 'balance_percent_per_trade': '0.1'}
+
+
+def profit_row(step: int) -> Dict:
+    return {'datetime': '2018-01-01 00:{0:02d}:00'.format(step), 'portfolio_value': 1000.0 + step, 'profit': step}
+
+
+def read_rows(filepath: str) -> List[Dict]:
+    with open(filepath, newline='') as profit_history_file:
+        return list(csv.DictReader(profit_history_file))
+
+
+def test_checkpoint_round_trip(tmp_path):
+    filepath: str = BacktestCheckpoint.filepath(str(tmp_path / 'dca_strategy_1.csv'))
+    BacktestCheckpoint(**{
+        'strategy_id': 'dca_strategy_1',
+        'properties': BacktestCheckpoint.saved_properties(properties),
+        'completed_ticker_filenames': ['tickers_20180101.csv'],
+        'balances': {'USDT': 900.0, 'BTC': 0.01},
+        'strategy_state': {'buy_order_count': 3},
+        'profit_tracker_state': {'initial_value': 1000.0, 'peak_value': 1010.0},
+        'profit_history_size': 123,
+        'minutes_simulated': 1440,
+        'step_count': 3
+    }).save(filepath)
+
+    checkpoint: BacktestCheckpoint = BacktestCheckpoint.load(filepath)
+    assert filepath == str(tmp_path / 'dca_strategy_1.checkpoint')
+    assert checkpoint.strategy_id == 'dca_strategy_1'
+    assert checkpoint.completed_ticker_filenames == ['tickers_20180101.csv']
+    assert checkpoint.balances == {'USDT': 900.0, 'BTC': 0.01}
+    assert checkpoint.strategy_state == {'buy_order_count': 3}
+    assert checkpoint.profit_tracker_state == {'initial_value': 1000.0, 'peak_value': 1010.0}
+    assert (checkpoint.profit_history_size, checkpoint.minutes_simulated, checkpoint.step_count) == (123, 1440, 3)
+    assert not os.path.exists('{0}.tmp'.format(filepath))
+
+
+def test_checkpoints_of_other_format_versions_are_ignored(tmp_path):
+    filepath: str = str(tmp_path / 'old.checkpoint')
+    with open(filepath, 'wb') as checkpoint_file:
+        pickle.dump({'format_version': BacktestCheckpoint.format_version - 1, 'checkpoint': {}}, checkpoint_file)
+
+    assert BacktestCheckpoint.load(filepath) is None
+    assert BacktestCheckpoint.load(str(tmp_path / 'missing.checkpoint')) is None
+
+
+def test_checkpoints_of_other_properties_are_refused():
+    checkpoint: BacktestCheckpoint = BacktestCheckpoint(strategy_id='dca_strategy_1',
+                                                        properties=BacktestCheckpoint.saved_properties(properties))
+    checkpoint.check_properties(dict(properties))
+
+    with pytest.raises(ValueError, match='order_padding_percent'):
+        checkpoint.check_properties(dict(properties, order_padding_percent='0.02'))
+    with pytest.raises(ValueError, match='random_seed'):
+        checkpoint.check_properties(dict(properties, random_seed=1))
+
+
+def test_latest_filepath_picks_the_newest_checkpoint_with_the_prefix(tmp_path):
+    for strategy_id, age_sec in [('dca_strategy_a_1', 20), ('dca_strategy_a_2', 10), ('dca_strategy_b_3', 0)]:
+        filepath: str = str(tmp_path / '{0}.checkpoint'.format(strategy_id))
+        BacktestCheckpoint(strategy_id=strategy_id).save(filepath)
+        os.utime(filepath, (time.time() - age_sec, time.time() - age_sec))
+
+    assert BacktestCheckpoint.latest_filepath(str(tmp_path), 'dca_strategy_a_') == str(
+        tmp_path / 'dca_strategy_a_2.checkpoint')
+    assert BacktestCheckpoint.latest_filepath(str(tmp_path), 'cycle_strategy_') is None
+
+
+def test_resumed_profit_history_equals_an_uninterrupted_one(tmp_path):
+    uninterrupted_filepath: str = str(tmp_path / 'uninterrupted.csv')
+    uninterrupted_writer: ProfitHistoryWriter = ProfitHistoryWriter(uninterrupted_filepath)
+    for step in range(10):
+        uninterrupted_writer.append(profit_row(step))
+        uninterrupted_writer.checkpoint()
+
+    # Rows 0 to 4 make up the completed ticker files. The run is interrupted after writing rows 5 to 7 of the next one.
+    filepath: str = str(tmp_path / 'interrupted.csv')
+    writer: ProfitHistoryWriter = ProfitHistoryWriter(filepath)
+    for step in range(8):
+        writer.append(profit_row(step))
+        writer.checkpoint()
+        if step == 4:
+            BacktestCheckpoint(strategy_id='interrupted', profit_history_size=writer.size()).save(
+                BacktestCheckpoint.filepath(filepath))
+
+    checkpoint: BacktestCheckpoint = BacktestCheckpoint.load(BacktestCheckpoint.filepath(filepath))
+    resumed_writer: ProfitHistoryWriter = ProfitHistoryWriter(filepath)
+    resumed_writer.truncate(checkpoint.profit_history_size)
+    assert len(read_rows(filepath)) == 5
+    for step in range(5, 10):
+        resumed_writer.append(profit_row(step))
+        resumed_writer.checkpoint()
+
+    assert read_rows(filepath) == read_rows(uninterrupted_filepath)
@@ -0,0 +1,96 @@
+import os
+import time
+from typing import Dict
+
+from example_strategies.shared.backtest_result_cache import BacktestResultCache
+
+properties: Dict = {'executions_per_month': 4, 'order_padding_percent': '0.01', 'balance_percent_per_trade': '0.1'}
+
+
+def result(index: int) -> Dict:
+    return {'strategy_id': 'dca_strategy_{0}'.format(index), 'final_base_balance': 1000.0 + index,
+            'final_quote_balance': 0.5}
+
+
+def set_last_used(result_cache: BacktestResultCache, key: str, age_sec: float):
+    entry_path: str = result_cache.entry_path(key)
+    os.utime(entry_path, (time.time() - age_sec, time.time() - age_sec))
+
+
+def test_key_is_stable_and_changes_with_every_input(ticker_dir):
+    key: str = BacktestResultCache.key('dca', properties, ticker_dir, {'max_ticker_resolution': 'day'})
+
+    assert key == BacktestResultCache.key('dca', dict(properties), ticker_dir, {'max_ticker_resolution': 'day'})
+    assert key != BacktestResultCache.key('dca', dict(properties, order_padding_percent='0.02'), ticker_dir,
+                                          {'max_ticker_resolution': 'day'})
+    assert key != BacktestResultCache.key('cycle', properties, ticker_dir, {'max_ticker_resolution': 'day'})
+    assert key != BacktestResultCache.key('dca', properties, ticker_dir, {'max_ticker_resolution': 'minute'})
+
+
+def test_changed_ticker_file_misses(ticker_dir, tmp_path):
+    result_cache: BacktestResultCache = BacktestResultCache(cache_dir=str(tmp_path / 'result_cache'))
+    key: str = BacktestResultCache.key('dca', properties, ticker_dir)
+    assert result_cache.get(key) is None
+
+    result_cache.put(key, result(1))
+    assert result_cache.get(BacktestResultCache.key('dca', properties, ticker_dir)) == result(1)
+
+    ticker_filepath: str = os.path.join(ticker_dir, 'tickers_20180103.csv')
+    os.utime(ticker_filepath, (os.path.getatime(ticker_filepath), os.path.getmtime(ticker_filepath) + 10))
+    changed_key: str = BacktestResultCache.key('dca', properties, ticker_dir)
+    assert changed_key != key
+    assert result_cache.get(changed_key) is None
+
+
+def test_hit_copies_the_cached_profit_summary(tmp_path):
+    result_cache: BacktestResultCache = BacktestResultCache(cache_dir=str(tmp_path / 'result_cache'))
+    profit_summary_filepath: str = str(tmp_path / 'dca_strategy_1.csv')
+    with open(profit_summary_filepath, 'w') as profit_summary_file:
+        profit_summary_file.write('datetime,portfolio_value\n2018-01-01 00:00:00,1000.0\n')
+
+    result_cache.put('key_1', result(1), profit_summary_filepath)
+
+    with open(result_cache.profit_summary_filepath('key_1')) as profit_summary_file:
+        assert profit_summary_file.read() == 'datetime,portfolio_value\n2018-01-01 00:00:00,1000.0\n'
+    assert not [entry_name for entry_name in os.listdir(result_cache.cache_dir) if entry_name.endswith('.tmp')]
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path):
+    result_cache: BacktestResultCache = BacktestResultCache(cache_dir=str(tmp_path / 'result_cache'))
+    for index in range(3):
+        result_cache.put('key_{0}'.format(index), result(index))
+    entry_size: int = BacktestResultCache.entry_size(result_cache.entry_path('key_0'))
+    # key_0 was written first but used last.
+    set_last_used(result_cache, 'key_0', 10)
+    set_last_used(result_cache, 'key_1', 30)
+    set_last_used(result_cache, 'key_2', 20)
+    assert result_cache.get('key_0') == result(0)
+
+    # Room for three entries of about the same size, so writing a fourth evicts one.
+    result_cache.max_size_bytes = 3 * entry_size + entry_size // 2
+    result_cache.put('key_3', result(3))
+    assert sorted(os.listdir(result_cache.cache_dir)) == ['key_0', 'key_2', 'key_3']
+
+    result_cache.put('key_4', result(4))
+    assert sorted(os.listdir(result_cache.cache_dir)) == ['key_0', 'key_3', 'key_4']
+
+
+def test_the_entry_just_written_is_never_evicted(tmp_path):
+    result_cache: BacktestResultCache = BacktestResultCache(cache_dir=str(tmp_path / 'result_cache'))
+    result_cache.put('key_0', result(0))
+    entry_size: int = BacktestResultCache.entry_size(result_cache.entry_path('key_0'))
+    # The entry just written is older than the others, e.g. because another process cached it first.
+    result_cache.put('key_1', result(1))
+    set_last_used(result_cache, 'key_0', 10)
+    set_last_used(result_cache, 'key_1', 20)
+
+    # Room for one entry only.
+    result_cache.max_size_bytes = entry_size + entry_size // 2
+    result_cache.put('key_1', result(1))
+    assert os.listdir(result_cache.cache_dir) == ['key_1']
+    assert result_cache.get('key_1') == result(1)
+
+    # An entry larger than the whole cache isn't cached, and evicts nothing.
+    result_cache.max_size_bytes = entry_size // 2
+    result_cache.put('key_2', result(2))
+    assert os.listdir(result_cache.cache_dir) == ['key_1']
@@ -0,0 +1,122 @@
+import logging
+import threading
+from types import SimpleNamespace
+from typing import List, Optional, Set
+
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.order import Order
+from trading_platform.exchanges.data.pair import Pair
+
+from example_strategies.shared.concurrent_order_executor import ConcurrentOrderExecutor
+from example_strategies.shared.persistence import Persistence, PersistenceMode
+
+pair: Pair = Pair(base='USDT', quote='BTC')
+
+
+class FakeOrderExecutionService:
+    """
+    Executes orders once release is set, and fails the orders whose price is in failing_prices.
+    """
+
+    def __init__(self, failing_prices: Set[float]):
+        self.failing_prices: Set[float] = failing_prices
+        self.release: threading.Event = threading.Event()
+        self.executed_orders: List[Order] = []
+        self.executed_orders_lock: threading.Lock = threading.Lock()
+
+    def execute_order(self, order: Order, session, write_pending_order: bool, check_if_order_filled: bool) -> Order:
+        self.release.wait(10)
+        if float(order.price) in self.failing_prices:
+            raise ValueError('order rejected')
+        with self.executed_orders_lock:
+            self.executed_orders.append(order)
+        return order
+
+
+class FakeExchange:
+    """
+    An exchange with a fixed ticker and balances, which the orders don't change.
+    """
+    exchange_id: int = 1
+
+    def __init__(self):
+        self.ask: float = 100.0
+
+    def fetch_balances(self):
+        pass
+
+    def fetch_latest_tickers(self):
+        pass
+
+    def get_balance(self, currency: str) -> SimpleNamespace:
+        return SimpleNamespace(free=FinancialData(1000 if currency == pair.base else 0))
+
+    def get_ticker(self, pair_name: str) -> SimpleNamespace:
+        return SimpleNamespace(ask=self.ask, bid=self.ask)
+
+
+def build_executor(order_execution_service: FakeOrderExecutionService, **kwargs) -> ConcurrentOrderExecutor:
+    return ConcurrentOrderExecutor(**dict({
+        'logger': logging.getLogger(__name__),
+        'order_execution_service': order_execution_service,
+        'scoped_session_maker': Persistence(PersistenceMode.in_memory).scoped_session_maker,
+        'max_workers': 2
+    }, **kwargs))
+
+
+def test_submit_blocks_once_max_pending_orders_are_queued():
+    order_execution_service: FakeOrderExecutionService = FakeOrderExecutionService(failing_prices={2.0})
+    executor: ConcurrentOrderExecutor = build_executor(order_execution_service, max_pending_orders=3)
+    completions: List[Optional[Exception]] = []
+
+    for price in [1.0, 2.0, 3.0]:
+        executor.submit(Order(price=price), True, lambda order, exception: completions.append(exception))
+    blocked_submit: threading.Thread = threading.Thread(target=executor.submit, args=(
+        Order(price=4.0), True, lambda order, exception: completions.append(exception)))
+    blocked_submit.start()
+    blocked_submit.join(0.2)
+    assert blocked_submit.is_alive()
+
+    order_execution_service.release.set()
+    blocked_submit.join(10)
+    executor.shutdown()
+    assert not blocked_submit.is_alive()
+    assert len(completions) == 4
+    assert [str(exception) for exception in completions if exception is not None] == ['order rejected']
+    assert sorted(float(order.price) for order in order_execution_service.executed_orders) == [1.0, 3.0, 4.0]
+
+
+def test_executer_counts_pending_and_failed_orders():
+    # Imported here, as the executers need the strategy execution storage of trading_platform.
+    from example_strategies.dca.dca_strategy_executer_service import DcaStrategyExecuterService
+
+    exchange: FakeExchange = FakeExchange()
+    # The buy price of every other order, padded by 1%.
+    order_execution_service: FakeOrderExecutionService = FakeOrderExecutionService(failing_prices={101.0, 303.0})
+    executor: ConcurrentOrderExecutor = build_executor(order_execution_service)
+    persistence: Persistence = Persistence(PersistenceMode.in_memory)
+    executer_service: DcaStrategyExecuterService = DcaStrategyExecuterService(**{
+        'logger': logging.getLogger(__name__),
+        'order_execution_service': order_execution_service,
+        'scoped_session_maker': persistence.scoped_session_maker,
+        'strategy_execution_dao': persistence.strategy_execution_dao,
+        'concurrent_order_executor': executor,
+        'pair': pair,
+        'order_padding_percent': FinancialData('0.01'),
+        'balance_percent_per_trade': FinancialData('0.1')
+    })
+    executer_service.initialize('dca_strategy_concurrent_check')
+
+    for ask in [100.0, 200.0, 300.0, 400.0]:
+        exchange.ask = ask
+        executer_service.step(exchange=exchange, check_if_order_filled=True)
+    # No order has completed yet.
+    assert executer_service.state.as_dict() == {'buy_order_count': 4, 'pending_order_count': 4,
+                                                'failed_order_count': 0}
+
+    order_execution_service.release.set()
+    executor.shutdown()
+    assert executer_service.state.as_dict() == {'buy_order_count': 4, 'pending_order_count': 0,
+                                                'failed_order_count': 2}
+    # The last completion saved the final counters.
+    assert executer_service.strategy_execution.state == executer_service.state.as_dict()
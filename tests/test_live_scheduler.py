@@ -0,0 +1,121 @@
+import datetime
+from typing import List, Optional
+
+import pandas
+import pytest
+
+from example_strategies.shared import live_scheduler
+from example_strategies.shared.live_scheduler import LiveScheduler
+from example_strategies.shared.step_schedule import StepSchedule
+
+seconds_ns: int = 10 ** 9
+
+
+def timestamp_ns(timestamp: str) -> int:
+    return int(pandas.Timestamp(timestamp, tz='UTC').value)
+
+
+class FakeClock:
+    """
+    A wall clock that only moves when the scheduler sleeps on its stop event, or when a test advances it.
+    """
+
+    def __init__(self, now_ns: int):
+        self.now_ns: int = now_ns
+        self.sleeps_sec: List[float] = []
+        # If set, the wall clock is set back by this many seconds during the first sleep, like an NTP adjustment.
+        self.adjustment_sec: Optional[float] = None
+        self.is_stopped: bool = False
+
+    def wall_clock_ns(self) -> int:
+        return self.now_ns
+
+    def wait(self, timeout: float) -> bool:
+        """
+        The stop event's wait, which sleeps for timeout seconds of the fake clock.
+        """
+        if self.is_stopped:
+            return True
+        self.sleeps_sec.append(timeout)
+        self.now_ns += int(timeout * seconds_ns)
+        if self.adjustment_sec is not None:
+            self.now_ns -= int(self.adjustment_sec * seconds_ns)
+            self.adjustment_sec = None
+        return False
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock: FakeClock = FakeClock(timestamp_ns('2018-01-01 10:00:30'))
+    monkeypatch.setattr(live_scheduler, 'wall_clock_ns', clock.wall_clock_ns)
+    return clock
+
+
+def hourly_scheduler(clock: FakeClock, **kwargs) -> LiveScheduler:
+    return LiveScheduler(**dict({
+        'step_schedule': StepSchedule(interval=datetime.timedelta(hours=1)),
+        'max_sleep_sec': 600,
+        'stop_event': clock
+    }, **kwargs))
+
+
+def test_wait_sleeps_until_each_step_in_capped_sleeps(clock):
+    scheduler: LiveScheduler = hourly_scheduler(clock)
+    assert scheduler.next_step_ns == timestamp_ns('2018-01-01 11:00')
+
+    assert scheduler.wait()
+    assert clock.now_ns == timestamp_ns('2018-01-01 11:00')
+    assert clock.sleeps_sec == [600] * 5 + [570]
+    assert scheduler.next_step_ns == timestamp_ns('2018-01-01 12:00')
+
+    # The time spent in the step doesn't delay the next one.
+    clock.now_ns += 90 * seconds_ns
+    clock.sleeps_sec = []
+    assert scheduler.wait()
+    assert clock.now_ns == timestamp_ns('2018-01-01 12:00')
+    assert sum(clock.sleeps_sec) == 3600 - 90
+
+
+def test_steps_missed_by_a_long_step_are_skipped(clock):
+    scheduler: LiveScheduler = hourly_scheduler(clock)
+    assert scheduler.wait()
+
+    # The step at 11:00 took until 13:30, so the steps at 12:00 and 13:00 are skipped.
+    clock.now_ns = timestamp_ns('2018-01-01 13:30')
+    clock.sleeps_sec = []
+    assert scheduler.wait()
+    assert clock.sleeps_sec == []
+    assert scheduler.next_step_ns == timestamp_ns('2018-01-01 14:00')
+
+
+def test_wall_clock_adjustments_are_caught_up_after_one_sleep(clock):
+    scheduler: LiveScheduler = hourly_scheduler(clock, max_sleep_sec=60)
+    clock.adjustment_sec = 300
+
+    assert scheduler.wait()
+    assert clock.now_ns == timestamp_ns('2018-01-01 11:00')
+    # The sleeps last until 11:00 by the adjusted wall clock, 300 seconds more than before the adjustment.
+    assert sum(clock.sleeps_sec) == 3570 + 300
+    assert max(clock.sleeps_sec) == 60
+
+
+def test_inactive_hours_are_slept_through(clock):
+    scheduler: LiveScheduler = hourly_scheduler(clock, step_schedule=StepSchedule(**{
+        'interval': datetime.timedelta(minutes=30),
+        'active_utc_hours': {3}
+    }))
+    assert scheduler.next_step_ns == timestamp_ns('2018-01-02 03:00')
+
+    assert scheduler.wait()
+    assert scheduler.next_step_ns == timestamp_ns('2018-01-02 03:30')
+    assert scheduler.wait()
+    assert scheduler.next_step_ns == timestamp_ns('2018-01-03 03:00')
+
+
+def test_wait_returns_false_once_stopped(clock):
+    scheduler: LiveScheduler = hourly_scheduler(clock)
+    clock.is_stopped = True
+
+    assert not scheduler.wait()
+    assert clock.now_ns == timestamp_ns('2018-01-01 10:00:30')
+    assert scheduler.next_step_ns == timestamp_ns('2018-01-01 11:00')
@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+
+import pytest
+
+from example_strategies.shared.persistence import BufferedDao, InMemoryDao, InMemorySessionMaker, Persistence, \
+    PersistenceMode
+
+
+class RecordingSession:
+    def __init__(self):
+        self.commit_count: int = 0
+
+    def commit(self):
+        self.commit_count += 1
+
+
+class RecordingDao:
+    """
+    A dao that records its writes instead of sending them to a database.
+    """
+
+    def __init__(self):
+        self.saves: List[Tuple[object, bool]] = []
+        self.updates: List[Tuple[str, object, Dict, bool]] = []
+
+    def save(self, session, popo, commit: bool = False, **kwargs):
+        self.saves.append((popo, commit))
+        return popo
+
+    def update_fetch_by_column(self, session, column_name: str, column_value, update_dict: Dict, commit: bool = False,
+                               **kwargs):
+        self.updates.append((column_name, column_value, dict(update_dict), commit))
+
+    def fetch_by_column(self, session, column_name: str, column_value, **kwargs):
+        return 'fetched {0}'.format(column_value)
+
+
+def test_buffered_writes_reach_the_dao_in_one_transaction_per_flush():
+    dao: RecordingDao = RecordingDao()
+    buffered_dao: BufferedDao = BufferedDao(dao)
+    session: RecordingSession = RecordingSession()
+    orders: List[SimpleNamespace] = [SimpleNamespace(order_id=None, price=index) for index in range(3)]
+
+    # The trades of the first ticker file.
+    for order in orders[:2]:
+        assert buffered_dao.save(session, popo=order, commit=True) is order
+    buffered_dao.update_fetch_by_column(session, 'strategy_execution_id', 1, {'state': {'buy_order_count': 1}},
+                                        commit=True)
+    buffered_dao.update_fetch_by_column(session, 'strategy_execution_id', 1, {'state': {'buy_order_count': 2}},
+                                        commit=True)
+    assert (dao.saves, dao.updates, session.commit_count) == ([], [], 0)
+    # Reads are passed through.
+    assert buffered_dao.fetch_by_column(session, 'order_id', 5) == 'fetched 5'
+
+    buffered_dao.flush(session)
+    assert dao.saves == [(orders[0], False), (orders[1], False)]
+    # Only the latest update of the row is written.
+    assert dao.updates == [('strategy_execution_id', 1, {'state': {'buy_order_count': 2}}, False)]
+    assert session.commit_count == 1
+
+    # A flush without writes since the last one commits nothing.
+    buffered_dao.flush(session)
+    assert session.commit_count == 1
+
+    # The trades of the second ticker file are written by its own flush.
+    buffered_dao.save(session, popo=orders[2])
+    buffered_dao.flush(session)
+    assert dao.saves[2:] == [(orders[2], False)]
+    assert session.commit_count == 2
+
+
+def test_unbuffered_saves_are_written_immediately():
+    dao: RecordingDao = RecordingDao()
+    buffered_dao: BufferedDao = BufferedDao(dao, buffer_saves=False)
+    session: RecordingSession = RecordingSession()
+    strategy_execution: SimpleNamespace = SimpleNamespace(strategy_execution_id=None)
+
+    buffered_dao.save(session, popo=strategy_execution, commit=True)
+    assert dao.saves == [(strategy_execution, True)]
+    buffered_dao.update_fetch_by_column(session, 'strategy_execution_id', 1, {'state': {}})
+    assert dao.updates == []
+
+
+def test_in_memory_dao_assigns_ids_and_applies_updates():
+    dao: InMemoryDao = InMemoryDao('order_id')
+    session = InMemorySessionMaker()()
+    first_order: SimpleNamespace = dao.save(session, popo=SimpleNamespace(order_id=None, order_status=1))
+    second_order: SimpleNamespace = dao.save(session, popo=SimpleNamespace(order_id=None, order_status=1))
+    assert (first_order.order_id, second_order.order_id) == (1, 2)
+
+    # Saving a popo again keeps its id.
+    assert dao.save(session, popo=first_order).order_id == 1
+    assert len(dao.popos_by_id) == 2
+
+    assert dao.update_fetch_by_column(session, 'order_id', 2, {'order_status': 3}) is second_order
+    assert second_order.order_status == 3
+    assert dao.fetch_by_column(session, 'order_status', 3) is second_order
+    assert dao.update_fetch_by_column(session, 'order_id', 3, {'order_status': 3}) is None
+
+
+def test_in_memory_persistence_needs_no_database():
+    persistence: Persistence = Persistence(PersistenceMode.in_memory)
+    assert persistence.engine is None
+    assert persistence.scoped_session_maker() is persistence.scoped_session_maker()
+    persistence.flush()
+
+    with pytest.raises(ValueError, match='unknown persistence mode'):
+        Persistence('csv')
@@ -0,0 +1,126 @@
+import datetime
+from types import SimpleNamespace
+from typing import Dict, List
+
+import numpy
+import pandas
+
+from trading_platform.exchanges.data.pair import Pair
+
+from example_strategies.shared.profit_tracker import ProfitTracker
+
+pairs: List[Pair] = [Pair(base='USDT', quote='BTC'), Pair(base='ETH', quote='USDT'), Pair(base='BTC', quote='ETH')]
+
+
+class BalanceExchange:
+    """
+    The free balances of an exchange, which is all ProfitTracker reads from it.
+    """
+
+    def __init__(self, balances: Dict[str, float]):
+        self.balances: Dict[str, float] = dict(balances)
+
+    def get_balance(self, currency: str) -> SimpleNamespace:
+        return SimpleNamespace(free=self.balances.get(currency, 0.0))
+
+
+def random_steps(step_count: int, seed: int = 0) -> List[Dict]:
+    """
+    Returns:
+        The datetime, balances and tickers of each step of a random walk, in which the balances only change at some
+        steps and a pair sometimes has no new ticker.
+    """
+    random_state: numpy.random.RandomState = numpy.random.RandomState(seed)
+    balances: Dict[str, float] = {'USDT': 1000.0, 'BTC': 0.0, 'ETH': 0.0, 'XRP': 50.0}
+    prices: Dict[str, float] = {pairs[0].name: 10000.0, pairs[1].name: 1 / 500.0, pairs[2].name: 0.05}
+    tickers: Dict[str, SimpleNamespace] = {}
+    steps: List[Dict] = []
+    start_datetime: datetime.datetime = datetime.datetime(2018, 1, 1, tzinfo=datetime.timezone.utc)
+    for step in range(step_count):
+        for pair_name in prices:
+            if random_state.rand() < 0.8:
+                prices[pair_name] *= numpy.exp(random_state.normal(0, 0.01))
+                tickers[pair_name] = SimpleNamespace(bid=prices[pair_name] * 0.999, ask=prices[pair_name] * 1.001)
+        if random_state.rand() < 0.3:
+            currency: str = random_state.choice(['USDT', 'BTC', 'ETH'])
+            balances[currency] = max(0.0, balances[currency] + random_state.normal(0, 1))
+        steps.append({
+            'datetime': start_datetime + datetime.timedelta(minutes=7 * step),
+            'balances': dict(balances),
+            'tickers': dict(tickers)
+        })
+    return steps
+
+
+def portfolio_value(balances: Dict[str, float], tickers: Dict[str, SimpleNamespace]) -> float:
+    """
+    The value in USDT recomputed from scratch: BTC at the bid of the first pair, ETH at 1 / ask of the second, and no
+    other currency.
+    """
+    value: float = balances['USDT']
+    if pairs[0].name in tickers:
+        value += balances['BTC'] * tickers[pairs[0].name].bid
+    if pairs[1].name in tickers:
+        value += balances['ETH'] / tickers[pairs[1].name].ask
+    return value
+
+
+def test_incremental_valuation_equals_a_full_recomputation():
+    profit_tracker: ProfitTracker = ProfitTracker(valuation_currency='USDT', pairs=pairs, capacity=4)
+    steps: List[Dict] = random_steps(500)
+
+    peak_value: float = 0.0
+    max_drawdown_percent: float = 0.0
+    initial_value: float = portfolio_value(steps[0]['balances'], steps[0]['tickers'])
+    for step in steps:
+        row: Dict = profit_tracker.update(step['datetime'], BalanceExchange(step['balances']), step['tickers'])
+        value: float = portfolio_value(step['balances'], step['tickers'])
+        peak_value = max(peak_value, value)
+        drawdown_percent: float = 1 - value / peak_value
+        max_drawdown_percent = max(max_drawdown_percent, drawdown_percent)
+
+        assert numpy.isclose(row['portfolio_value'], value)
+        assert numpy.isclose(row['profit'], value - initial_value)
+        assert numpy.isclose(row['profit_percent'], (value - initial_value) / initial_value)
+        assert numpy.isclose(row['drawdown_percent'], drawdown_percent)
+        assert numpy.isclose(row['max_drawdown_percent'], max_drawdown_percent)
+        assert numpy.isclose(row['exposure_percent'], 1 - step['balances']['USDT'] / value)
+        assert row['BTC_balance'] == step['balances']['BTC']
+        # Only the valuation currency and the currencies of the traded pairs are read.
+        assert 'XRP_balance' not in row
+
+    assert profit_tracker.size == len(steps)
+
+
+def test_history_resamples_to_the_last_step_and_deepest_drawdown_of_each_bar():
+    profit_tracker: ProfitTracker = ProfitTracker(valuation_currency='USDT', pairs=pairs)
+    rows: List[Dict] = [profit_tracker.update(step['datetime'], BalanceExchange(step['balances']), step['tickers'])
+                        for step in random_steps(300, seed=1)]
+    rows_df: pandas.DataFrame = pandas.DataFrame(rows).set_index('datetime')
+    hourly_df: pandas.DataFrame = rows_df.resample('h').agg({'portfolio_value': 'last', 'profit': 'last',
+                                                             'drawdown_percent': 'max', 'exposure_percent': 'last'})
+
+    history: Dict[str, numpy.ndarray] = profit_tracker.history(3600 * 10 ** 9)
+    assert list(pandas.to_datetime(history['timestamps_ns'], utc=True)) == list(hourly_df.index)
+    assert numpy.allclose(history['portfolio_values'], hourly_df['portfolio_value'])
+    assert numpy.allclose(history['profits'], hourly_df['profit'])
+    assert numpy.allclose(history['drawdown_percents'], hourly_df['drawdown_percent'])
+    assert numpy.allclose(history['exposure_percents'], hourly_df['exposure_percent'])
+    assert len(profit_tracker.history()['portfolio_values']) == len(rows)
+
+
+def test_a_tracker_rebuilt_from_its_state_continues_like_the_original():
+    steps: List[Dict] = random_steps(200, seed=2)
+    profit_tracker: ProfitTracker = ProfitTracker(valuation_currency='USDT', pairs=pairs)
+    for step in steps[:120]:
+        profit_tracker.update(step['datetime'], BalanceExchange(step['balances']), step['tickers'])
+
+    resumed_profit_tracker: ProfitTracker = ProfitTracker(**dict(profit_tracker.state(), valuation_currency='USDT',
+                                                                 pairs=pairs))
+    for step in steps[120:]:
+        row: Dict = profit_tracker.update(step['datetime'], BalanceExchange(step['balances']), step['tickers'])
+        resumed_row: Dict = resumed_profit_tracker.update(step['datetime'], BalanceExchange(step['balances']),
+                                                          step['tickers'])
+        assert row.keys() == resumed_row.keys()
+        for name in row:
+            assert row[name] == resumed_row[name] or numpy.isclose(row[name], resumed_row[name]), name
@@ -0,0 +1,93 @@
+import datetime
+
+import numpy
+import pandas
+import pytest
+
+from example_strategies.shared.step_schedule import StepSchedule, nanoseconds_per_hour
+
+day_ns: int = 24 * nanoseconds_per_hour
+
+
+def to_ns(timestamp: str) -> int:
+    return pandas.Timestamp(timestamp, tz='UTC').value
+
+
+def test_steps_are_aligned_to_the_epoch():
+    step_schedule: StepSchedule = StepSchedule(interval=datetime.timedelta(hours=6))
+    step_times: numpy.ndarray = step_schedule.step_times(to_ns('2018-01-01 01:00'), to_ns('2018-01-02 00:00'))
+
+    assert list(step_times) == [to_ns('2018-01-01 06:00'), to_ns('2018-01-01 12:00'), to_ns('2018-01-01 18:00'),
+                                to_ns('2018-01-02 00:00')]
+    # The grid doesn't depend on where the range starts.
+    assert list(step_schedule.step_times(to_ns('2018-01-01 11:59'), to_ns('2018-01-02 00:00'))) == list(step_times[1:])
+
+
+def test_steps_of_adjacent_ranges_add_up_to_the_steps_of_the_whole_range():
+    step_schedule: StepSchedule = StepSchedule(interval=datetime.timedelta(minutes=45),
+                                               jitter=datetime.timedelta(minutes=30), seed=7)
+    start_ns: int = to_ns('2018-01-01')
+    middle_ns: int = to_ns('2018-01-02 13:17')
+    end_ns: int = to_ns('2018-01-04')
+
+    whole: numpy.ndarray = step_schedule.step_times(start_ns, end_ns)
+    split: numpy.ndarray = numpy.concatenate((step_schedule.step_times(start_ns, middle_ns),
+                                              step_schedule.step_times(middle_ns + 1, end_ns)))
+    assert numpy.array_equal(whole, split)
+
+
+def test_jitter_delays_each_step_by_less_than_the_jitter():
+    interval_ns: int = nanoseconds_per_hour
+    step_schedule: StepSchedule = StepSchedule(interval=datetime.timedelta(hours=1),
+                                               jitter=datetime.timedelta(minutes=20), seed=3)
+    step_times: numpy.ndarray = step_schedule.step_times(to_ns('2018-01-01'), to_ns('2018-02-01'))
+    delays_ns: numpy.ndarray = step_times % interval_ns
+
+    assert len(step_times) == 31 * 24
+    assert delays_ns.min() >= 0
+    assert delays_ns.max() < 20 * 60 * 10 ** 9
+    # The delays are spread over the jitter rather than constant.
+    assert len(numpy.unique(delays_ns)) > 24 * 30
+
+
+def test_jitter_is_reproducible_from_the_seed():
+    def step_times(seed: int) -> numpy.ndarray:
+        return StepSchedule(interval=datetime.timedelta(hours=1), jitter=datetime.timedelta(minutes=20),
+                            seed=seed).step_times(to_ns('2018-01-01'), to_ns('2018-01-08'))
+
+    assert numpy.array_equal(step_times(3), step_times(3))
+    assert not numpy.array_equal(step_times(3), step_times(4))
+
+
+def test_steps_outside_of_the_active_hours_are_dropped():
+    step_schedule: StepSchedule = StepSchedule(interval=datetime.timedelta(minutes=30),
+                                               active_utc_hours=StepSchedule.window_hours((7, 9)))
+    step_times: numpy.ndarray = step_schedule.step_times(to_ns('2018-01-01'), to_ns('2018-01-03'))
+
+    assert set((step_times // nanoseconds_per_hour) % 24) == {7, 8}
+    assert len(step_times) == 2 * 4
+    assert step_schedule.next_step_time(to_ns('2018-01-01 09:00')) == to_ns('2018-01-02 07:00')
+
+
+def test_next_step_time_of_a_long_interval():
+    step_schedule: StepSchedule = StepSchedule(interval=datetime.timedelta(days=7.5))
+    next_step_ns: int = step_schedule.next_step_time(to_ns('2018-01-01'))
+
+    assert next_step_ns % int(7.5 * day_ns) == 0
+    assert 0 < next_step_ns - to_ns('2018-01-01') <= 7.5 * day_ns
+
+
+def test_step_positions_fire_at_the_first_minute_at_or_after_each_step():
+    step_schedule: StepSchedule = StepSchedule(interval=datetime.timedelta(hours=1))
+    # No tickers from 01:00 to 01:04, and none at all in the 03:00 hour.
+    minutes: pandas.DatetimeIndex = pandas.date_range('2018-01-01 00:00', '2018-01-01 04:30', freq='min', tz='UTC')
+    minutes = minutes[~(((minutes.hour == 1) & (minutes.minute < 5)) | (minutes.hour == 3))]
+
+    assert [minutes[position] for position in step_schedule.step_positions(minutes)] == [
+        pandas.Timestamp('2018-01-01 00:00', tz='UTC'), pandas.Timestamp('2018-01-01 01:05', tz='UTC'),
+        pandas.Timestamp('2018-01-01 02:00', tz='UTC'), pandas.Timestamp('2018-01-01 04:00', tz='UTC')]
+
+
+def test_interval_must_be_positive():
+    with pytest.raises(ValueError):
+        StepSchedule(interval=datetime.timedelta(0))
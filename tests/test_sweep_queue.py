@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from example_strategies.shared.sweep_queue import ShardStatus, SweepQueue, SweepWorker
+
+
+def build_sweep_queue(tmp_path, **kwargs) -> SweepQueue:
+    return SweepQueue(**dict({'database_url': 'sqlite:///{0}'.format(tmp_path / 'sweep_queue.db')}, **kwargs))
+
+
+def sweep_tasks(count: int) -> List[Dict]:
+    return [{'strategy_id': 'dca_strategy_sweep_{0}'.format(index), 'parameters': {'executions_per_month': index}}
+            for index in range(count)]
+
+
+def test_shards_are_added_once_per_sweep(tmp_path):
+    sweep_queue: SweepQueue = build_sweep_queue(tmp_path)
+
+    assert sweep_queue.add_shards('sweep_1', sweep_tasks(3))
+    assert not sweep_queue.add_shards('sweep_1', sweep_tasks(3))
+    assert sweep_queue.add_shards('sweep_2', sweep_tasks(2))
+    assert sweep_queue.status_counts('sweep_1') == {ShardStatus.pending: 3, ShardStatus.running: 0,
+                                                    ShardStatus.done: 0, ShardStatus.failed: 0}
+    assert sum(sweep_queue.status_counts().values()) == 5
+
+
+def test_concurrent_workers_claim_every_shard_exactly_once(tmp_path):
+    build_sweep_queue(tmp_path).add_shards('sweep_1', sweep_tasks(40))
+    claimed_shard_ids: List[int] = []
+    claimed_shard_ids_lock: threading.Lock = threading.Lock()
+
+    def claim_all(worker_id: str):
+        # Each worker has its own engine, like worker processes do.
+        sweep_queue: SweepQueue = build_sweep_queue(tmp_path)
+        while True:
+            shard: Optional[Dict] = sweep_queue.claim(worker_id, 'sweep_1')
+            if shard is None:
+                return
+            with claimed_shard_ids_lock:
+                claimed_shard_ids.append(shard['shard_id'])
+
+    threads: List[threading.Thread] = [threading.Thread(target=claim_all, args=('worker_{0}'.format(index),))
+                                       for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed_shard_ids) == sorted(set(claimed_shard_ids))
+    assert len(claimed_shard_ids) == 40
+
+
+def test_a_shard_without_heartbeats_is_claimed_again(tmp_path):
+    sweep_queue: SweepQueue = build_sweep_queue(tmp_path, heartbeat_timeout_sec=0.2)
+    sweep_queue.add_shards('sweep_1', sweep_tasks(1))
+
+    shard: Dict = sweep_queue.claim('worker_1', 'sweep_1')
+    assert sweep_queue.claim('worker_2', 'sweep_1') is None
+    # Heartbeats keep the shard with its worker.
+    for _ in range(3):
+        time.sleep(0.1)
+        assert sweep_queue.heartbeat(shard['shard_id'], 'worker_1')
+    assert sweep_queue.claim('worker_2', 'sweep_1') is None
+
+    time.sleep(0.3)
+    reclaimed_shard: Dict = sweep_queue.claim('worker_2', 'sweep_1')
+    assert reclaimed_shard == shard
+    # The first worker lost the shard, so its heartbeats and result are rejected.
+    assert not sweep_queue.heartbeat(shard['shard_id'], 'worker_1')
+    assert not sweep_queue.complete(shard['shard_id'], 'worker_1', {'strategy_id': 'stale'})
+    assert sweep_queue.complete(shard['shard_id'], 'worker_2', {'strategy_id': 'dca_strategy_sweep_0'})
+
+    assert sweep_queue.is_finished('sweep_1')
+    assert sweep_queue.results('sweep_1') == [{'strategy_id': 'dca_strategy_sweep_0'}]
+
+
+def test_a_shard_fails_after_max_attempts_without_heartbeats(tmp_path):
+    sweep_queue: SweepQueue = build_sweep_queue(tmp_path, heartbeat_timeout_sec=0.1, max_attempts=2)
+    sweep_queue.add_shards('sweep_1', sweep_tasks(1))
+
+    assert sweep_queue.claim('worker_1', 'sweep_1') is not None
+    time.sleep(0.2)
+    assert sweep_queue.claim('worker_2', 'sweep_1') is not None
+    time.sleep(0.2)
+    assert sweep_queue.claim('worker_3', 'sweep_1') is None
+
+    assert sweep_queue.status_counts('sweep_1')[ShardStatus.failed] == 1
+    result: Dict = sweep_queue.results('sweep_1')[0]
+    assert result['strategy_id'] == 'dca_strategy_sweep_0'
+    assert result['executions_per_month'] == 0
+    assert 'heartbeat' in result['error']
+
+
+def test_worker_runs_every_shard_and_records_failures(tmp_path):
+    sweep_queue: SweepQueue = build_sweep_queue(tmp_path)
+    sweep_queue.add_shards('sweep_1', sweep_tasks(5))
+
+    def run_task(task: Dict) -> Dict:
+        if task['parameters']['executions_per_month'] == 3:
+            raise ValueError('no tickers')
+        return dict(task['parameters'], strategy_id=task['strategy_id'], final_base_balance=1.0)
+
+    sweep_worker: SweepWorker = SweepWorker(**{
+        'logger': logging.getLogger(__name__),
+        'sweep_queue': sweep_queue,
+        'run_task': run_task,
+        'sweep_id': 'sweep_1',
+        'exit_when_finished': True,
+        'poll_sec': 0.01,
+        'heartbeat_sec': 0.01
+    })
+    sweep_worker.run()
+
+    assert sweep_worker.shard_count == 5
+    assert sweep_queue.status_counts('sweep_1') == {ShardStatus.pending: 0, ShardStatus.running: 0,
+                                                    ShardStatus.done: 4, ShardStatus.failed: 1}
+    results: List[Dict] = sweep_queue.results('sweep_1')
+    assert [result['strategy_id'] for result in results] == [task['strategy_id'] for task in sweep_tasks(5)]
+    assert "ValueError('no tickers')" == results[3]['error']
@@ -0,0 +1,98 @@
+import os
+from typing import List
+
+import numpy
+import pandas
+
+from trading_platform.exchanges.data.pair import Pair
+
+from example_strategies.shared.ticker_cache_service import TickerCacheService
+
+compared_columns: List[str] = ['exchange_id', 'base', 'quote', 'bid', 'ask', 'last', 'app_create_timestamp']
+
+
+def assert_same_tickers(cached_df: pandas.DataFrame, csv_df: pandas.DataFrame):
+    assert len(cached_df) == len(csv_df)
+    assert (cached_df.index == csv_df.index).all()
+    for column_name in compared_columns:
+        assert numpy.array_equal(numpy.asarray(cached_df[column_name], dtype=object),
+                                 numpy.asarray(csv_df[column_name], dtype=object)), column_name
+
+
+def in_pair_order(ticker_df: pandas.DataFrame) -> pandas.DataFrame:
+    """
+    Returns:
+        The tickers sorted by minute and pair, keeping the file order of the tickers of a pair within a minute.
+    """
+    return ticker_df.assign(base=ticker_df['base'].astype(str), quote=ticker_df['quote'].astype(str)).sort_values(
+        ['app_create_timestamp_min', 'base', 'quote'], kind='mergesort')
+
+
+def test_ingest_only_rebuilds_stale_files(ticker_dir, tmp_path):
+    ticker_cache_dir: str = str(tmp_path / 'cache')
+
+    assert TickerCacheService.ingest(ticker_dir, ticker_cache_dir) == ['tickers_20180101.csv', 'tickers_20180103.csv']
+    assert TickerCacheService.ingest(ticker_dir, ticker_cache_dir) == []
+
+    ticker_filepath: str = os.path.join(ticker_dir, 'tickers_20180103.csv')
+    os.utime(ticker_filepath, (os.path.getatime(ticker_filepath), os.path.getmtime(ticker_filepath) + 10))
+    assert TickerCacheService.ingest(ticker_dir, ticker_cache_dir) == ['tickers_20180103.csv']
+
+
+def test_cached_tickers_equal_the_parsed_csv(ticker_dir, tmp_path):
+    ticker_cache_dir: str = str(tmp_path / 'cache')
+    TickerCacheService.ingest(ticker_dir, ticker_cache_dir)
+
+    for ticker_filename in sorted(os.listdir(ticker_dir)):
+        cached_df: pandas.DataFrame = TickerCacheService.load_ticker_df(ticker_dir, ticker_filename, ticker_cache_dir)
+        csv_df: pandas.DataFrame = TickerCacheService.load_ticker_df(ticker_dir, ticker_filename)
+        # The cache groups rows by pair, and loading every pair restores minute order, but not the order of the pairs
+        # within a minute.
+        assert_same_tickers(in_pair_order(cached_df), in_pair_order(csv_df))
+        assert cached_df.index.is_monotonic_increasing
+
+
+def test_pair_filter_loads_only_the_pairs_rows_in_minute_order(ticker_dir, tmp_path):
+    ticker_cache_dir: str = str(tmp_path / 'cache')
+    TickerCacheService.ingest(ticker_dir, ticker_cache_dir)
+
+    for pairs in [[Pair(base='USDT', quote='ETH')], [Pair(base='USDT', quote='BTC'), Pair(base='BTC', quote='ETH')]]:
+        cached_df: pandas.DataFrame = TickerCacheService.load_ticker_df(
+            ticker_dir, 'tickers_20180101.csv', ticker_cache_dir, pairs=pairs, exchange_id=1)
+        csv_df: pandas.DataFrame = TickerCacheService.load_ticker_df(ticker_dir, 'tickers_20180101.csv', pairs=pairs,
+                                                                     exchange_id=1)
+
+        assert set(zip(cached_df['base'], cached_df['quote'])) == {(pair.base, pair.quote) for pair in pairs}
+        if len(pairs) == 1:
+            # The tickers of a pair within a minute keep their file order.
+            assert_same_tickers(cached_df, csv_df)
+        else:
+            assert_same_tickers(in_pair_order(cached_df), in_pair_order(csv_df))
+        assert cached_df.index.is_monotonic_increasing
+
+
+def test_pair_and_exchange_without_tickers_load_nothing(ticker_dir, tmp_path):
+    ticker_cache_dir: str = str(tmp_path / 'cache')
+
+    assert len(TickerCacheService.load_ticker_df(ticker_dir, 'tickers_20180101.csv', ticker_cache_dir,
+                                                 pairs=[Pair(base='USDT', quote='XRP')])) == 0
+    assert len(TickerCacheService.load_ticker_df(ticker_dir, 'tickers_20180101.csv', ticker_cache_dir,
+                                                 exchange_id=2)) == 0
+
+
+def test_ingest_over_an_existing_cache_leaves_no_temporary_directories(ticker_dir, tmp_path):
+    ticker_cache_dir: str = str(tmp_path / 'cache')
+    ticker_filepath: str = os.path.join(ticker_dir, 'tickers_20180101.csv')
+    cache_path: str = TickerCacheService.cache_path(ticker_cache_dir, 'tickers_20180101.csv')
+    TickerCacheService.ingest(ticker_dir, ticker_cache_dir)
+
+    # Another worker ingested the file first.
+    TickerCacheService.ingest_file(ticker_filepath, cache_path)
+    assert TickerCacheService.is_fresh(ticker_filepath, cache_path)
+
+    # The cache is stale.
+    os.utime(ticker_filepath, (os.path.getatime(ticker_filepath), os.path.getmtime(ticker_filepath) + 10))
+    TickerCacheService.ingest_file(ticker_filepath, cache_path)
+    assert TickerCacheService.is_fresh(ticker_filepath, cache_path)
+    assert sorted(os.listdir(ticker_cache_dir)) == sorted(os.path.basename(TickerCacheService.cache_path(
+        ticker_cache_dir, ticker_filename)) for ticker_filename in os.listdir(ticker_dir))
@@ -0,0 +1,90 @@
+import datetime
+import os
+
+import numpy
+import pandas
+import pytest
+
+from example_strategies.shared.step_schedule import StepSchedule
+from example_strategies.shared.ticker_cache_service import TickerCacheService
+from example_strategies.shared.ticker_rollup import TickerResolution, coarsest_resolution, rollup_ticker_df
+
+minute_column: str = TickerCacheService.minute_column
+
+
+def tickers_seen_by_steps(minute_df: pandas.DataFrame, step_schedule: StepSchedule) -> pandas.DataFrame:
+    """
+    Returns:
+        The latest ticker of each pair at each step of a backtest on the minute-level tickers, for the pairs with a
+        ticker in the step's minute, with the step's minute.
+    """
+    minutes: pandas.DatetimeIndex = pandas.DatetimeIndex(minute_df[minute_column].unique())
+    step_minutes: pandas.DatetimeIndex = minutes[step_schedule.step_positions(minutes)]
+    step_df: pandas.DataFrame = minute_df[minute_df[minute_column].isin(step_minutes)]
+    return step_df.groupby([minute_column, 'base', 'quote'], sort=True).tail(1)
+
+
+@pytest.mark.parametrize('resolution', TickerResolution.rollups)
+def test_rollup_tickers_are_the_tickers_a_minute_level_step_sees(ticker_dir, resolution):
+    minute_df: pandas.DataFrame = TickerCacheService.read_ticker_csv(os.path.join(ticker_dir, 'tickers_20180101.csv'))
+    rollup_df: pandas.DataFrame = rollup_ticker_df(minute_df, resolution, minute_column)
+    step_schedule: StepSchedule = StepSchedule(
+        interval=datetime.timedelta(hours=1 if resolution == TickerResolution.hour else 24))
+
+    for (base, quote), pair_rollup_df in rollup_df.groupby(['base', 'quote']):
+        # Stepping on the pair's own minutes, a step fires at the pair's first minute of each bar.
+        pair_minute_df: pandas.DataFrame = minute_df[(minute_df['base'] == base) & (minute_df['quote'] == quote)]
+        seen_df: pandas.DataFrame = tickers_seen_by_steps(pair_minute_df, step_schedule)
+        bar_starts: pandas.Series = seen_df[minute_column].dt.floor(
+            pandas.Timedelta(TickerResolution.durations_ns[resolution]))
+
+        assert list(pair_rollup_df[minute_column]) == list(bar_starts)
+        for column_name in ['bid', 'ask', 'last', TickerCacheService.timestamp_column]:
+            assert numpy.array_equal(pair_rollup_df[column_name].values, seen_df[column_name].values), column_name
+
+
+@pytest.mark.parametrize('resolution', TickerResolution.rollups)
+def test_rollup_high_low_and_close_aggregate_the_bar(ticker_dir, resolution):
+    minute_df: pandas.DataFrame = TickerCacheService.read_ticker_csv(os.path.join(ticker_dir, 'tickers_20180101.csv'))
+    rollup_df: pandas.DataFrame = rollup_ticker_df(minute_df, resolution, minute_column)
+
+    bar_df: pandas.DataFrame = minute_df.assign(bar_start=minute_df[minute_column].dt.floor(
+        pandas.Timedelta(TickerResolution.durations_ns[resolution])))
+    expected_df: pandas.DataFrame = bar_df.groupby(['bar_start', 'base', 'quote'])['bid'].agg(
+        ['max', 'min', 'last']).add_prefix('expected_').reset_index()
+    actual_df: pandas.DataFrame = rollup_df.rename(columns={minute_column: 'bar_start'}).merge(
+        expected_df, on=['bar_start', 'base', 'quote'], validate='one_to_one')
+
+    assert len(actual_df) == len(rollup_df) == len(expected_df)
+    assert numpy.allclose(actual_df['bid_high'], actual_df['expected_max'])
+    assert numpy.allclose(actual_df['bid_low'], actual_df['expected_min'])
+    assert numpy.allclose(actual_df['bid_close'], actual_df['expected_last'])
+
+
+def test_cached_rollups_equal_rollups_of_the_csv(ticker_dir, tmp_path):
+    ticker_cache_dir: str = str(tmp_path / 'cache')
+    minute_df: pandas.DataFrame = TickerCacheService.read_ticker_csv(os.path.join(ticker_dir, 'tickers_20180103.csv'))
+
+    for resolution in TickerResolution.rollups:
+        cached_df: pandas.DataFrame = TickerCacheService.load_ticker_df(ticker_dir, 'tickers_20180103.csv',
+                                                                        ticker_cache_dir, resolution=resolution)
+        rollup_df: pandas.DataFrame = rollup_ticker_df(minute_df, resolution, minute_column)
+
+        assert len(cached_df) == len(rollup_df)
+        assert set(zip(cached_df.index, cached_df['base'].astype(str), cached_df['quote'].astype(str),
+                       cached_df['bid'])) == set(zip(rollup_df[minute_column], rollup_df['base'], rollup_df['quote'],
+                                                     rollup_df['bid']))
+
+
+def test_coarsest_resolution_needs_steps_on_bar_starts():
+    def resolution(interval: datetime.timedelta, jitter: datetime.timedelta = datetime.timedelta(0),
+                   max_resolution: str = TickerResolution.day) -> str:
+        return coarsest_resolution(StepSchedule(interval=interval, jitter=jitter), max_resolution)
+
+    assert resolution(datetime.timedelta(days=1)) == TickerResolution.day
+    assert resolution(datetime.timedelta(days=2)) == TickerResolution.day
+    assert resolution(datetime.timedelta(days=1), max_resolution=TickerResolution.hour) == TickerResolution.hour
+    # Every other step of 7.5 days is at noon.
+    assert resolution(datetime.timedelta(days=7.5)) == TickerResolution.hour
+    assert resolution(datetime.timedelta(minutes=90)) == TickerResolution.minute
+    assert resolution(datetime.timedelta(days=1), jitter=datetime.timedelta(minutes=5)) == TickerResolution.minute
@@ -0,0 +1,102 @@
+import datetime
+import logging
+import os
+import threading
+import time
+from typing import Iterator, List, Optional
+
+import numpy
+import pandas
+import pytest
+
+from example_strategies.shared.minute_index import MinuteIndex
+from example_strategies.shared.step_schedule import StepSchedule
+from example_strategies.shared.ticker_cache_service import TickerCacheService
+from example_strategies.shared.ticker_stream import TickerBatch, TickerStream
+
+step_schedule: StepSchedule = StepSchedule(interval=datetime.timedelta(minutes=7))
+
+
+class CountingTickerStream(TickerStream):
+    """
+    Streams batch_count integers instead of the batches of ticker files, recording how many the reader produced, and
+    raises the exception after the last one if given.
+    """
+
+    def __init__(self, batch_count: int, exception: Optional[Exception] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.batch_count: int = batch_count
+        self.exception: Optional[Exception] = exception
+        self.produced_count: int = 0
+
+    def batches(self) -> Iterator[int]:
+        for batch in range(self.batch_count):
+            self.produced_count += 1
+            yield batch
+        if self.exception is not None:
+            raise self.exception
+
+
+def reader_threads() -> List[threading.Thread]:
+    return [thread for thread in threading.enumerate() if thread.name == 'ticker_stream_reader']
+
+
+@pytest.mark.parametrize('use_ticker_cache', [False, True])
+def test_batches_cover_every_minute_and_step_in_order(ticker_dir, tmp_path, use_ticker_cache):
+    ticker_stream: TickerStream = TickerStream(**{
+        'logger': logging.getLogger(__name__),
+        'ticker_dir': ticker_dir,
+        'ticker_cache_dir': str(tmp_path / 'cache') if use_ticker_cache else None,
+        'step_schedule': step_schedule,
+        'batch_minutes': 1000
+    })
+    batches: List[TickerBatch] = list(ticker_stream)
+
+    for ticker_filename in sorted(os.listdir(ticker_dir)):
+        file_batches: List[TickerBatch] = [batch for batch in batches if batch.ticker_filename == ticker_filename]
+        minutes: pandas.DatetimeIndex = MinuteIndex.from_ticker_df(
+            TickerCacheService.load_ticker_df(ticker_dir, ticker_filename)).minutes
+        # Nearly two days of minutes, in batches of 1000.
+        assert [len(batch.ticker_file) for batch in file_batches] == [1000, 1000, len(minutes) - 2000]
+        assert [(batch.is_start_of_file, batch.is_end_of_file) for batch in file_batches] == [
+            (True, False), (False, False), (False, True)]
+
+        batch_minutes: List[pandas.Timestamp] = [batch.ticker_file.minute(position) for batch in file_batches
+                                                 for position in range(len(batch.ticker_file))]
+        assert batch_minutes == list(minutes)
+        # Steps due across a batch boundary are kept.
+        step_positions: numpy.ndarray = numpy.concatenate([batch.step_positions + 1000 * index
+                                                           for index, batch in enumerate(file_batches)])
+        assert numpy.array_equal(step_positions, step_schedule.step_positions(minutes))
+    assert [batch.ticker_filename for batch in batches] == sorted(batch.ticker_filename for batch in batches)
+
+
+def test_reader_stays_at_most_max_queued_batches_ahead():
+    ticker_stream: CountingTickerStream = CountingTickerStream(100, max_queued_batches=2)
+    consumed: List[int] = []
+    for batch in ticker_stream:
+        consumed.append(batch)
+        time.sleep(0.01)
+        # The queued batches, and the one the reader waits to put.
+        assert ticker_stream.produced_count <= len(consumed) + 2 + 1
+    assert consumed == list(range(100))
+    assert not reader_threads()
+
+
+def test_reader_exceptions_are_raised_to_the_consumer_after_the_earlier_batches():
+    ticker_stream: CountingTickerStream = CountingTickerStream(3, exception=ValueError('corrupt ticker file'))
+    consumed: List[int] = []
+    with pytest.raises(ValueError, match='corrupt ticker file'):
+        for batch in ticker_stream:
+            consumed.append(batch)
+    assert consumed == [0, 1, 2]
+    assert not reader_threads()
+
+
+def test_stopping_early_stops_the_reader():
+    ticker_stream: CountingTickerStream = CountingTickerStream(100, max_queued_batches=1)
+    for batch in ticker_stream:
+        if batch == 5:
+            break
+    assert not reader_threads()
+    assert ticker_stream.produced_count < 10
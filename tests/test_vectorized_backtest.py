@@ -0,0 +1,164 @@
+import datetime
+import logging
+import os
+from typing import TYPE_CHECKING, Dict, List
+
+import numpy
+import pandas
+import pytest
+from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.pair import Pair
+
+from benchmarks.synthetic_tickers import generate_ticker_files
+from example_strategies.shared.step_schedule import StepSchedule
+from example_strategies.shared.strategy_state import StrategyState
+from example_strategies.shared.vectorized_backtest import VectorizedBacktest, buy_order, no_order, sell_order
+
+if TYPE_CHECKING:
+    from example_strategies.shared.backtest_service import BacktestService
+
+pair: Pair = Pair(base='USDT', quote='BTC')
+
+
+def minute_values(*minutes: int) -> numpy.ndarray:
+    start_value: int = int(pandas.Timestamp('2018-01-01', tz='UTC').value)
+    return numpy.array([start_value + minute * 60 * 10 ** 9 for minute in minutes], dtype=numpy.int64)
+
+
+def loaded_backtest(file_minutes: List[int], ticker_minutes: List[int], asks: List[float],
+                    bids: List[float]) -> VectorizedBacktest:
+    """
+    A VectorizedBacktest of one ticker file with the given minutes, in which the pair has a ticker in ticker_minutes.
+    """
+    vectorized_backtest: VectorizedBacktest = VectorizedBacktest(logger=logging.getLogger(__name__), pair=pair)
+    vectorized_backtest.file_minutes = [pandas.DatetimeIndex(pandas.to_datetime(minute_values(*file_minutes),
+                                                                                utc=True))]
+    vectorized_backtest.pair_minute_values = minute_values(*ticker_minutes)
+    vectorized_backtest.pair_asks = numpy.array(asks, dtype=numpy.float64)
+    vectorized_backtest.pair_bids = numpy.array(bids, dtype=numpy.float64)
+    return vectorized_backtest
+
+
+def test_step_prices_forward_fill_the_tickers_seen_at_earlier_steps():
+    # The pair has a ticker in minutes 1 and 3 only, so minute 1 is never seen: it isn't a step or the first minute.
+    vectorized_backtest: VectorizedBacktest = loaded_backtest(list(range(6)), [1, 3], [10.0, 30.0], [9.0, 29.0])
+    prices: Dict[str, numpy.ndarray] = vectorized_backtest.step_prices(minute_values(0, 2, 3, 5))
+    assert numpy.array_equal(prices['ask'], [numpy.nan, numpy.nan, 30.0, 30.0], equal_nan=True)
+    assert numpy.array_equal(prices['bid'], [numpy.nan, numpy.nan, 29.0, 29.0], equal_nan=True)
+
+    # A ticker in the first minute is seen when the exchange is initialised, before any step.
+    vectorized_backtest = loaded_backtest(list(range(6)), [0, 3], [5.0, 30.0], [4.0, 29.0])
+    prices = vectorized_backtest.step_prices(minute_values(2, 3, 5))
+    assert numpy.array_equal(prices['ask'], [5.0, 30.0, 30.0])
+    assert numpy.array_equal(prices['bid'], [4.0, 29.0, 29.0])
+
+
+def test_order_runs_equal_a_loop_over_the_steps():
+    random_state: numpy.random.RandomState = numpy.random.RandomState(0)
+    minutes: List[int] = list(range(0, 48 * 60, 30))
+    asks: numpy.ndarray = 100 * numpy.exp(numpy.cumsum(random_state.normal(0, 0.01, size=len(minutes))))
+    vectorized_backtest: VectorizedBacktest = loaded_backtest(minutes, minutes, list(asks), list(asks * 0.99))
+    # Runs of buys, sells and no orders of several lengths, including runs of one step.
+    hour_order_sides: numpy.ndarray = random_state.choice([buy_order, sell_order, no_order], size=24)
+
+    backtest_result: Dict = vectorized_backtest.run(**{
+        'step_schedule': StepSchedule(interval=datetime.timedelta(minutes=30)),
+        'order_sides': lambda hours: hour_order_sides[hours],
+        'balance_percent_per_trade': 0.25,
+        'order_padding_percent': 0.02,
+        'initial_base_capital': 1000.0
+    })
+
+    base_balance: float = 1000.0
+    quote_balance: float = 0.0
+    buy_order_count: int = 0
+    sell_order_count: int = 0
+    for step, minute in enumerate(minutes):
+        order_side: int = hour_order_sides[(minute // 60) % 24]
+        if order_side == buy_order:
+            spent: float = base_balance * 0.25
+            base_balance -= spent
+            quote_balance += spent / (asks[step] * 1.02)
+            buy_order_count += 1
+        elif order_side == sell_order and quote_balance > 0:
+            spent: float = quote_balance * 0.25
+            quote_balance -= spent
+            base_balance += spent * asks[step] * 0.99 * 0.98
+            sell_order_count += 1
+        assert numpy.isclose(backtest_result['base_balances'][step], base_balance)
+        assert numpy.isclose(backtest_result['quote_balances'][step], quote_balance)
+
+    assert numpy.isclose(backtest_result['final_base_balance'], base_balance)
+    assert numpy.isclose(backtest_result['final_quote_balance'], quote_balance)
+    assert (backtest_result['buy_order_count'], backtest_result['sell_order_count']) == (buy_order_count,
+                                                                                          sell_order_count)
+
+
+@pytest.fixture
+def synthetic_ticker_dir(tmp_path) -> str:
+    """
+    Three days of synthetic tickers, in which the traded pair has no ticker in some minutes, so that some steps fire
+    later than scheduled.
+    """
+    ticker_dir: str = str(tmp_path / 'tickers')
+    random_state: numpy.random.RandomState = numpy.random.RandomState(0)
+    for ticker_filename in generate_ticker_files(ticker_dir=ticker_dir, start='2018-01-01', days=3, pair_count=2,
+                                                 exchange_id=exchange_ids.binance, base=pair.base, seed=0):
+        ticker_filepath: str = os.path.join(ticker_dir, ticker_filename)
+        ticker_df: pandas.DataFrame = pandas.read_csv(ticker_filepath)
+        is_dropped: numpy.ndarray = (ticker_df['quote'] == pair.quote).values & (
+            random_state.rand(len(ticker_df)) < 0.3)
+        ticker_df[~is_dropped].to_csv(ticker_filepath, index=False)
+    return ticker_dir
+
+
+@pytest.mark.parametrize('strategy_name, parameters', [
+    ('cycle', {'executions_per_hour': 4, 'buy_window_utc_hour_start': 2, 'buy_window_utc_hour_end': 5,
+               'sell_window_utc_hour_start': 14, 'sell_window_utc_hour_end': 16}),
+    ('dca', {'executions_per_month': 30 * 24})
+])
+def test_vectorized_backtest_matches_the_event_driven_one(synthetic_ticker_dir, tmp_path, strategy_name, parameters):
+    # Imported here, as they need the backtest exchanges and the storage of trading_platform.
+    from example_strategies.shared.persistence import Persistence, PersistenceMode
+    from example_strategies.shared.strategy_registry import properties_with_overrides, strategies
+    from example_strategies.shared.strategy_runner import build_backtest_service
+
+    strategy: Dict = strategies[strategy_name]
+    parameters = dict(parameters, base_currency=pair.base, quote_currency=pair.quote)
+    properties: Dict = properties_with_overrides(strategy['properties_class'], parameters)
+
+    vectorized_backtest: VectorizedBacktest = VectorizedBacktest(**{
+        'logger': logging.getLogger(__name__),
+        'ticker_dir': synthetic_ticker_dir,
+        'exchange_id': properties['exchange_id_to_trade'],
+        'pair': pair
+    })
+    vectorized_backtest.load()
+    vectorized_result: Dict = vectorized_backtest.run(**{
+        'step_schedule': strategy['build'](properties, pair=pair)['step_schedule'],
+        'order_sides': lambda hours: strategy['vectorized_order_sides'](properties, hours),
+        'balance_percent_per_trade': properties['balance_percent_per_trade'],
+        'order_padding_percent': properties['order_padding_percent'],
+        'initial_base_capital': properties['initial_base_capital']
+    })
+
+    backtest_service: 'BacktestService' = build_backtest_service(**{
+        'logger': logging.getLogger(__name__),
+        'strategy_name': strategy_name,
+        'strategy_id': '{0}_strategy_vectorized_check'.format(strategy_name),
+        'parameters': parameters,
+        'ticker_dir': synthetic_ticker_dir,
+        'ticker_cache_dir': None,
+        'profit_summary_filepath': str(tmp_path / 'profit_summary.csv'),
+        'persistence': Persistence(PersistenceMode.in_memory)
+    })
+    backtest_service.run()
+    event_driven_state: StrategyState = backtest_service.strategy_executer_service.state
+
+    assert vectorized_result['buy_order_count'] > 0
+    assert vectorized_result['buy_order_count'] == event_driven_state.buy_order_count
+    assert vectorized_result['sell_order_count'] == getattr(event_driven_state, 'sell_order_count', 0)
+    assert numpy.isclose(vectorized_result['final_base_balance'],
+                         float(backtest_service.exchange.get_balance(pair.base).free), rtol=1e-6)
+    assert numpy.isclose(vectorized_result['final_quote_balance'],
+                         float(backtest_service.exchange.get_balance(pair.quote).free), rtol=1e-6)